@@ -1,59 +1,277 @@
 # utils/analysis.py
+from contextlib import closing
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 from rich.table import Table
 from rich.console import Console
+import csv
+import json
 import sqlite3
 
 console = Console()
 
-def view_interaction_history(db_path: str = "knowledge/dexter.db"):
-    """View interaction history from database"""
+# Columns shown and exported per telemetry table, and the column rows are ordered by in time
+TABLES = {
+    "interactions": (("timestamp", "type", "status", "content", "error", "duration"), "timestamp"),
+    "task_results": (("created_at", "task_id", "agent_name", "task_type", "status", "content", "error", "duration"),
+                     "created_at"),
+}
+ERROR_STATUSES = ("failed", "error")
+# Cursor for keyset pagination: (time column value, id) of the last row shown
+Cursor = Tuple[str, int]
+
+def _connect(db_path: str) -> sqlite3.Connection:
+    """Read-only connection, so analytics never create or lock the database for writing.
+
+    as_uri() percent-encodes the path, so names containing ?, # or % open
+    the file they name. Close it with contextlib.closing; as a context
+    manager a connection only ends the transaction.
+    """
+    return sqlite3.connect(f"{Path(db_path).resolve().as_uri()}?mode=ro", uri=True)
+
+def _since(hours: Optional[float]) -> str:
+    return str(datetime.now() - timedelta(hours=hours)) if hours else ""
+
+def _status_filter(column: str = "status") -> str:
+    return f"{column} IN ({', '.join(repr(status) for status in ERROR_STATUSES)})"
+
+
+def page_rows(db_path: str, table: str, limit: int = 50,
+              before: Optional[Cursor] = None,
+              filters: Optional[Dict[str, str]] = None) -> Tuple[List[Tuple], Optional[Cursor]]:
+    """Return one page of rows, newest first, and the cursor for the next page.
+
+    Pages are addressed by the (time, id) of their last row instead of an
+    OFFSET, so each page is an index range scan however deep it is.
+    Filters are equality matches, e.g. {"type": "objective_error"}.
+    """
+    columns, time_column = TABLES[table]
+    clauses = []
+    params: List[Any] = []
+    for column, value in (filters or {}).items():
+        if column not in columns:
+            raise ValueError(f"Unknown column {column} for {table}")
+        clauses.append(f"{column} = ?")
+        params.append(value)
+    if before:
+        clauses.append(f"({time_column}, id) < (?, ?)")
+        params.extend(before)
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+
+    with closing(_connect(db_path)) as conn:
+        rows = conn.execute(
+            f"""
+            SELECT id, {', '.join(columns)} FROM {table}
+            {where}
+            ORDER BY {time_column} DESC, id DESC
+            LIMIT ?
+            """,
+            params + [limit]
+        ).fetchall()
+
+    cursor = (rows[-1][1], rows[-1][0]) if len(rows) == limit else None
+    return [row[1:] for row in rows], cursor
+
+def _render_page(title: str, headers: List[str], rows: List[Tuple], cursor: Optional[Cursor],
+                 content_width: int = 80):
+    table = Table(title=title)
+    for header in headers:
+        table.add_column(header)
+    for row in rows:
+        table.add_row(*[
+            str(cell)[:content_width] if cell is not None else "" for cell in row
+        ])
+    console.print(table)
+    if cursor:
+        console.print(f"[dim]Next page: --before '{cursor[0]}' --before-id {cursor[1]}[/dim]")
+
+def view_interaction_history(db_path: str = "knowledge/dexter.db", limit: int = 50,
+                             before: Optional[Cursor] = None,
+                             interaction_type: Optional[str] = None,
+                             status: Optional[str] = None) -> Optional[Cursor]:
+    """View interaction history from database, one page at a time.
+
+    Returns the cursor to pass as ``before`` for the next page.
+    """
     try:
-        with sqlite3.connect(db_path) as conn:
-            cursor = conn.execute("""
-                SELECT timestamp, type, status, content, error
-                FROM interactions
-                ORDER BY timestamp DESC
-                LIMIT 50
-            """)
-            
-            table = Table(title="Recent Interactions")
-            table.add_column("Timestamp")
-            table.add_column("Type")
-            table.add_column("Status")
-            table.add_column("Content")
-            table.add_column("Error")
-            
-            for row in cursor.fetchall():
-                table.add_row(*[str(cell) for cell in row])
-            
-            console.print(table)
-            
+        filters = {key: value for key, value in (("type", interaction_type), ("status", status)) if value}
+        rows, cursor = page_rows(db_path, "interactions", limit, before, filters)
+        _render_page("Recent Interactions",
+                     ["Timestamp", "Type", "Status", "Content", "Error", "Duration"], rows, cursor)
+        return cursor
+
     except Exception as e:
         console.print(f"[red]Error viewing interaction history:[/red] {str(e)}")
 
-def view_task_results(db_path: str = "knowledge/dexter.db"):
-    """View task results from database"""
+def view_task_results(db_path: str = "knowledge/dexter.db", limit: int = 50,
+                      before: Optional[Cursor] = None,
+                      agent_name: Optional[str] = None,
+                      status: Optional[str] = None) -> Optional[Cursor]:
+    """View task results from database, one page at a time.
+
+    Returns the cursor to pass as ``before`` for the next page.
+    """
     try:
-        with sqlite3.connect(db_path) as conn:
-            cursor = conn.execute("""
-                SELECT created_at, task_id, agent_name, status, content, error
+        filters = {key: value for key, value in (("agent_name", agent_name), ("status", status)) if value}
+        rows, cursor = page_rows(db_path, "task_results", limit, before, filters)
+        _render_page("Recent Task Results",
+                     ["Timestamp", "Task ID", "Agent", "Task Type", "Status", "Content", "Error", "Duration"],
+                     rows, cursor)
+        return cursor
+
+    except Exception as e:
+        console.print(f"[red]Error viewing task results:[/red] {str(e)}")
+
+
+def hourly_throughput(db_path: str, since_hours: Optional[float] = 24) -> List[Dict[str, Any]]:
+    """Interactions and errors per hour, including hours already rolled up by retention"""
+    since = _since(since_hours)
+    with closing(_connect(db_path)) as conn:
+        rows = conn.execute(
+            f"""
+            SELECT hour, SUM(total), SUM(errors) FROM (
+                SELECT substr(timestamp, 1, 13) AS hour, COUNT(*) AS total,
+                       SUM({_status_filter()}) AS errors
+                FROM interactions WHERE timestamp >= ?
+                GROUP BY hour
+                UNION ALL
+                SELECT hour, SUM(count), SUM(CASE WHEN {_status_filter()} THEN count ELSE 0 END)
+                FROM interaction_rollups WHERE hour >= substr(?, 1, 13)
+                GROUP BY hour
+            )
+            GROUP BY hour
+            ORDER BY hour
+            """,
+            (since, since)
+        ).fetchall()
+    return [{"hour": hour, "interactions": total, "errors": errors or 0} for hour, total, errors in rows]
+
+def latency_percentiles(db_path: str, since_hours: Optional[float] = 24,
+                        group_by: str = "agent_name") -> List[Dict[str, Any]]:
+    """Task count, mean and nearest-rank p50/p95/p99 duration per group, computed in SQL"""
+    if group_by not in ("agent_name", "task_type", "status"):
+        raise ValueError(f"Cannot group task results by {group_by}")
+    with closing(_connect(db_path)) as conn:
+        rows = conn.execute(
+            f"""
+            WITH ranked AS (
+                SELECT {group_by} AS name, duration,
+                       ROW_NUMBER() OVER (PARTITION BY {group_by} ORDER BY duration) AS position,
+                       COUNT(*) OVER (PARTITION BY {group_by}) AS total
                 FROM task_results
-                ORDER BY created_at DESC
-                LIMIT 50
-            """)
-            
-            table = Table(title="Recent Task Results")
-            table.add_column("Timestamp")
-            table.add_column("Task ID")
-            table.add_column("Agent")
-            table.add_column("Status")
-            table.add_column("Content")
-            table.add_column("Error")
-            
-            for row in cursor.fetchall():
-                table.add_row(*[str(cell) for cell in row])
-            
-            console.print(table)
-            
+                WHERE created_at >= ? AND duration IS NOT NULL
+            )
+            SELECT name, MAX(total), AVG(duration),
+                   MIN(CASE WHEN position * 100 >= 50 * total THEN duration END),
+                   MIN(CASE WHEN position * 100 >= 95 * total THEN duration END),
+                   MIN(CASE WHEN position * 100 >= 99 * total THEN duration END),
+                   MAX(duration)
+            FROM ranked
+            GROUP BY name
+            ORDER BY MAX(total) DESC
+            """,
+            (_since(since_hours),)
+        ).fetchall()
+    return [
+        {"name": name, "count": count, "mean": mean, "p50": p50, "p95": p95, "p99": p99, "max": maximum}
+        for name, count, mean, p50, p95, p99, maximum in rows
+    ]
+
+def error_rates(db_path: str, since_hours: Optional[float] = 24) -> List[Dict[str, Any]]:
+    """Task count, failures and error rate per agent and task type"""
+    with closing(_connect(db_path)) as conn:
+        rows = conn.execute(
+            f"""
+            SELECT agent_name, task_type, COUNT(*), SUM({_status_filter()})
+            FROM task_results
+            WHERE created_at >= ?
+            GROUP BY agent_name, task_type
+            ORDER BY COUNT(*) DESC
+            """,
+            (_since(since_hours),)
+        ).fetchall()
+    return [
+        {"agent_name": agent, "task_type": task_type, "tasks": total,
+         "errors": errors or 0, "error_rate": (errors or 0) / total if total else 0.0}
+        for agent, task_type, total, errors in rows
+    ]
+
+def view_analytics(db_path: str = "knowledge/dexter.db", since_hours: Optional[float] = 24):
+    """Print throughput, latency and error-rate summaries for the last since_hours"""
+    try:
+        window = f"last {since_hours:g}h" if since_hours else "all time"
+
+        table = Table(title=f"Interactions per hour ({window})")
+        for column in ("Hour", "Interactions", "Errors"):
+            table.add_column(column)
+        for row in hourly_throughput(db_path, since_hours):
+            table.add_row(row["hour"], str(row["interactions"]), str(row["errors"]))
+        console.print(table)
+
+        table = Table(title=f"Task latency by agent ({window})")
+        for column in ("Agent", "Tasks", "Mean", "p50", "p95", "p99", "Max"):
+            table.add_column(column)
+        for row in latency_percentiles(db_path, since_hours):
+            table.add_row(str(row["name"]), str(row["count"]),
+                          *[f"{row[key]:.2f}s" for key in ("mean", "p50", "p95", "p99", "max")])
+        console.print(table)
+
+        table = Table(title=f"Error rate by agent and task type ({window})")
+        for column in ("Agent", "Task Type", "Tasks", "Errors", "Error Rate"):
+            table.add_column(column)
+        for row in error_rates(db_path, since_hours):
+            table.add_row(str(row["agent_name"]), str(row["task_type"]), str(row["tasks"]),
+                          str(row["errors"]), f"{row['error_rate']:.1%}")
+        console.print(table)
+
     except Exception as e:
-        console.print(f"[red]Error viewing task results:[/red] {str(e)}")
\ No newline at end of file
+        console.print(f"[red]Error viewing analytics:[/red] {str(e)}")
+
+
+def iter_rows(db_path: str, table: str, since_hours: Optional[float] = None,
+              batch_size: int = 5000) -> Iterator[Dict[str, Any]]:
+    """Yield rows oldest first in id order, batch_size rows per short read.
+
+    Each batch is a separate keyset query, so an export of any size holds
+    neither the whole table in memory nor a long-lived read transaction.
+    """
+    columns, time_column = TABLES[table]
+    with closing(_connect(db_path)) as conn:
+        start_id = 0
+        if since_hours:
+            start_id = conn.execute(
+                f"SELECT MIN(id) - 1 FROM {table} WHERE {time_column} >= ?", (_since(since_hours),)
+            ).fetchone()[0]
+            if start_id is None:
+                return
+        while True:
+            rows = conn.execute(
+                f"SELECT id, {', '.join(columns)} FROM {table} WHERE id > ? ORDER BY id LIMIT ?",
+                (start_id, batch_size)
+            ).fetchall()
+            if not rows:
+                return
+            for row in rows:
+                yield dict(zip(("id",) + columns, row))
+            start_id = rows[-1][0]
+
+def export_rows(db_path: str, table: str, output_path: str,
+                since_hours: Optional[float] = None, batch_size: int = 5000) -> int:
+    """Stream a telemetry table to CSV or JSONL (chosen by file suffix); returns rows written"""
+    if table not in TABLES:
+        raise ValueError(f"Unknown table {table}")
+    columns = ("id",) + TABLES[table][0]
+    written = 0
+    with open(output_path, "w", newline="", encoding="utf-8") as f:
+        if output_path.endswith(".csv"):
+            writer = csv.DictWriter(f, fieldnames=columns)
+            writer.writeheader()
+            for row in iter_rows(db_path, table, since_hours, batch_size):
+                writer.writerow(row)
+                written += 1
+        else:
+            for row in iter_rows(db_path, table, since_hours, batch_size):
+                f.write(json.dumps(row) + "\n")
+                written += 1
+    return written
@@ -2,9 +2,11 @@
 from dataclasses import dataclass, field
 from datetime import datetime
 from typing import Dict, Any, Optional, List
+import json
 from abc import ABC, abstractmethod
 from rich.console import Console
 from memory.manager import EnhancedMemoryManager
+from agents.context import ContextGatherer, ContextSource
 
 console = Console()
 
@@ -21,7 +23,9 @@ class Task:
     memory_references: List[str] = field(default_factory=list)
     subtasks: List['Task'] = field(default_factory=list)
     parent_task_id: Optional[str] = None
+    depends_on: List[str] = field(default_factory=list)
     error_message: Optional[str] = None
+    metrics: Dict[str, Any] = field(default_factory=dict)
     
     def mark_completed(self, result: Any):
         """Mark task as completed with result"""
@@ -57,7 +61,25 @@ class BaseAgent(ABC):
         # Store any additional attributes from kwargs
         for key, value in kwargs.items():
             setattr(self, key, value)
-
+        
+        # Context sources are fetched concurrently before each task
+        self.context_gatherer = ContextGatherer()
+        for source_name, fetch in self._context_sources().items():
+            self.context_gatherer.add_source(source_name, fetch)
+    
+    def _context_sources(self) -> Dict[str, ContextSource]:
+        """Context sources gathered for every task, keyed by context name"""
+        sources = {}
+        if getattr(self, 'memory_manager', None):
+            sources["relevant_memories"] = self._fetch_memories
+        return sources
+    
+    def add_context_source(self, name: str, fetch: ContextSource, timeout: Optional[float] = None):
+        """Register an extra context source, e.g. a tool call, with its own timeout"""
+        self.context_gatherer.add_source(name, fetch, timeout)
+    
+    async def _fetch_memories(self, task: Task) -> List[Dict[str, Any]]:
+        return await self.memory_manager.retrieve_memories_async(query=task.content, limit=5)
     
     @abstractmethod
     async def process_task(self, task: Task) -> Task:
@@ -115,13 +137,10 @@ Please process this task according to its type and requirements.
             for t in self.task_history[-3:]
         ]
         
-        # Add memory references if available
-        if hasattr(self, 'memory_manager') and self.memory_manager:
-            relevant_memories = await self.memory_manager.retrieve_memories(
-                query=task.content,
-                limit=5
-            )
-            context["relevant_memories"] = relevant_memories
+        # Fetch memories and any other registered sources concurrently
+        context.update(await self.context_gatherer.gather(
+            task, timings=task.metrics.setdefault("context", {})
+        ))
         
         return context
     
@@ -129,7 +148,7 @@ Please process this task according to its type and requirements.
         """Postprocess completed task"""
         # Store task in memory if available
         if hasattr(self, 'memory_manager') and self.memory_manager:
-            memory_id = await self.memory_manager.add_memory(
+            memory_id = await self.memory_manager.add_memory_async(
                 content=str(task.result),
                 memory_type=f"task_result_{task.type}",
                 context={"task_id": task.id}
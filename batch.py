@@ -0,0 +1,209 @@
+# utils/batch.py
+from typing import Any, Callable, Dict, Iterator, List, Optional, Set, Tuple
+from pathlib import Path
+import asyncio
+import json
+import math
+import time
+from rich.console import Console
+from rich.table import Table
+from utils.logger import logger
+
+console = Console()
+
+def iter_objectives(path: str,
+                    on_invalid: Optional[Callable[[int, str], None]] = None) -> Iterator[Tuple[str, str]]:
+    """Stream (id, objective) pairs from a JSONL or plain text file.
+
+    JSONL lines may be objects with an ``objective`` (or ``content``) and an
+    optional ``id``, or bare JSON strings. Text files hold one objective per
+    line. Lines without an id are identified by their line number.
+    Malformed JSONL lines are skipped and reported to ``on_invalid`` with
+    their line number and the parse error.
+    """
+    is_jsonl = Path(path).suffix in (".jsonl", ".ndjson")
+    with open(path, encoding="utf-8") as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            objective_id = f"line_{line_number}"
+            if is_jsonl:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError as e:
+                    logger.warning(f"Skipping line {line_number} of {path}: invalid JSON ({e})")
+                    if on_invalid:
+                        on_invalid(line_number, f"Invalid JSON: {e}")
+                    continue
+                if isinstance(record, dict):
+                    objective_id = str(record.get("id", objective_id))
+                    record = record.get("objective") or record.get("content")
+                if not record:
+                    logger.warning(f"Skipping line {line_number} of {path}: no objective")
+                    continue
+                line = str(record)
+            yield objective_id, line
+
+def objective_status(response: Dict[str, Any]) -> str:
+    """Status of the task behind a process_objective response.
+
+    process_objective reports "success" whenever it ran, even if the agent's
+    task failed, so the task's own status is what counts.
+    """
+    task = response.get("task")
+    return task.status if task is not None else response.get("status") or "error"
+
+def load_completed_ids(output_path: str) -> Set[str]:
+    """Ids whose task completed in a previous run of the same batch"""
+    completed = set()
+    if not Path(output_path).exists():
+        return completed
+    with open(output_path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                # A run killed mid-write can leave a truncated last line
+                continue
+            if record.get("status") == "completed":
+                completed.add(record["id"])
+    return completed
+
+def _end_last_line(path: str):
+    """Newline-terminate a line cut off by a killed run, so appended records parse"""
+    if not Path(path).exists():
+        return
+    with open(path, "rb+") as f:
+        if f.seek(0, 2) == 0:
+            return
+        f.seek(-1, 2)
+        if f.read(1) != b"\n":
+            f.write(b"\n")
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = min(len(sorted_values) - 1, max(0, math.ceil(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[rank]
+
+class BatchStats:
+    def __init__(self):
+        self.latencies: List[float] = []
+        self.succeeded = 0
+        self.failed = 0
+        self.skipped = 0
+        self.invalid = 0
+        self.started = time.perf_counter()
+
+    def record(self, latency: float, success: bool):
+        self.latencies.append(latency)
+        if success:
+            self.succeeded += 1
+        else:
+            self.failed += 1
+
+    def summary(self) -> Dict[str, Any]:
+        elapsed = time.perf_counter() - self.started
+        latencies = sorted(self.latencies)
+        processed = self.succeeded + self.failed
+        return {
+            "processed": processed,
+            "succeeded": self.succeeded,
+            "failed": self.failed,
+            "skipped": self.skipped,
+            "invalid": self.invalid,
+            "elapsed": elapsed,
+            "throughput": processed / elapsed if elapsed else 0.0,
+            "p50": percentile(latencies, 50),
+            "p95": percentile(latencies, 95),
+            "p99": percentile(latencies, 99),
+        }
+
+async def run_batch(orchestrator,
+                    input_path: str,
+                    output_path: str,
+                    concurrency: int = 4,
+                    resume: bool = True,
+                    agent=None) -> Dict[str, Any]:
+    """Process every objective in input_path, appending results to output_path.
+
+    At most ``concurrency`` objectives are in flight, and the input is read
+    only as fast as workers consume it. With ``resume`` objectives whose
+    task completed in output_path are skipped; failed ones run again. Unparseable input lines
+    are written to output_path with status "invalid" and the batch goes on.
+    """
+    completed = load_completed_ids(output_path) if resume else set()
+    if resume:
+        _end_last_line(output_path)
+    stats = BatchStats()
+    queue: asyncio.Queue = asyncio.Queue(maxsize=concurrency * 2)
+
+    with open(output_path, "a" if resume else "w", encoding="utf-8") as output:
+
+        def record_invalid(line_number: int, error: str):
+            record = {"id": f"line_{line_number}", "line": line_number, "status": "invalid", "error": error}
+            output.write(json.dumps(record) + "\n")
+            output.flush()
+            stats.invalid += 1
+
+        async def worker():
+            while True:
+                item = await queue.get()
+                if item is None:
+                    queue.task_done()
+                    return
+                objective_id, objective = item
+                start = time.perf_counter()
+                try:
+                    response = await orchestrator.process_objective(objective, agent=agent)
+                except Exception as e:
+                    response = {"status": "error", "error": str(e)}
+                latency = time.perf_counter() - start
+                status = objective_status(response)
+
+                record = {
+                    "id": objective_id,
+                    "objective": objective,
+                    "status": status,
+                    "task_id": response.get("task_id"),
+                    "result": response.get("result"),
+                    "error": response.get("error"),
+                    "latency": latency
+                }
+                output.write(json.dumps(record, default=str) + "\n")
+                output.flush()
+                stats.record(latency, status == "completed")
+                queue.task_done()
+
+        workers = [asyncio.create_task(worker()) for _ in range(concurrency)]
+        try:
+            for objective_id, objective in iter_objectives(input_path, on_invalid=record_invalid):
+                if objective_id in completed:
+                    stats.skipped += 1
+                    continue
+                await queue.put((objective_id, objective))
+            for _ in workers:
+                await queue.put(None)
+            await asyncio.gather(*workers)
+        finally:
+            for task in workers:
+                task.cancel()
+
+    return stats.summary()
+
+def print_batch_summary(summary: Dict[str, Any]):
+    table = Table(title="Batch Summary")
+    table.add_column("Metric")
+    table.add_column("Value")
+    table.add_row("Processed", str(summary["processed"]))
+    table.add_row("Succeeded", str(summary["succeeded"]))
+    table.add_row("Failed", str(summary["failed"]))
+    table.add_row("Skipped (resumed)", str(summary["skipped"]))
+    table.add_row("Invalid input lines", str(summary["invalid"]))
+    table.add_row("Elapsed", f"{summary['elapsed']:.1f}s")
+    table.add_row("Throughput", f"{summary['throughput']:.2f} objectives/s")
+    for key in ("p50", "p95", "p99"):
+        table.add_row(f"Latency {key}", f"{summary[key]:.2f}s")
+    console.print(table)
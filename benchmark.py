@@ -0,0 +1,362 @@
+# benchmarks/benchmark.py
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+import argparse
+import asyncio
+import json
+import platform
+import random
+import shutil
+import sqlite3
+import subprocess
+import tempfile
+import time
+from rich.console import Console
+from rich.table import Table
+
+from agents.dexter_agent import DexterAgent
+from agents.llm_client import LLMClient
+from agents.orchestrator import DexterOrchestrator
+from agents.response_cache import ResponseCache
+from benchmarks.fake_ollama import FakeOllama
+from database.operator import KnowledgeBase
+from database.storage import close_stores
+from memory.manager import EnhancedMemoryManager
+from toolbox.tools import ToolKit
+from utils.batch import percentile
+from utils.metrics import metrics
+
+console = Console()
+
+SIZES = {"10k": 10_000, "100k": 100_000, "1m": 1_000_000}
+MEMORY_TYPES = ["result", "observation", "conversation", "task_result_analysis"]
+DOC_TYPES = ["text", "markdown", "code", "html"]
+# Embeddings must not depend on downloaded models for results to be comparable
+EMBEDDING_MODEL = "hashing"
+
+class Corpus:
+    """Seeded generator of text with a Zipf-like word distribution"""
+
+    def __init__(self, seed: int, vocabulary: int = 5000):
+        self.random = random.Random(seed)
+        letters = "abcdefghijklmnopqrstuvwxyz"
+        self.words = list(dict.fromkeys(
+            "".join(self.random.choices(letters, k=self.random.randint(3, 10)))
+            for _ in range(vocabulary)
+        ))
+        self.weights = [1 / rank for rank in range(1, len(self.words) + 1)]
+
+    def sentence(self, low: int = 12, high: int = 60) -> str:
+        return " ".join(self.random.choices(self.words, self.weights, k=self.random.randint(low, high)))
+
+    def query(self) -> str:
+        # Skip the most frequent words so queries are selective
+        return " ".join(self.random.choices(self.words[50:], self.weights[50:], k=self.random.randint(2, 4)))
+
+
+def summarize(latencies: List[float], elapsed: Optional[float] = None) -> Dict[str, float]:
+    """Latency percentiles and throughput for a list of per-operation seconds"""
+    values = sorted(latencies)
+    elapsed = elapsed if elapsed is not None else sum(values)
+    return {
+        "count": len(values),
+        "elapsed": elapsed,
+        "throughput": len(values) / elapsed if elapsed else 0.0,
+        "mean": sum(values) / len(values) if values else 0.0,
+        "p50": percentile(values, 50),
+        "p95": percentile(values, 95),
+        "p99": percentile(values, 99),
+        "max": values[-1] if values else 0.0
+    }
+
+def measure(operation: Callable[[Any], Any], inputs: List[Any]) -> Dict[str, float]:
+    latencies = []
+    start = time.perf_counter()
+    for value in inputs:
+        began = time.perf_counter()
+        operation(value)
+        latencies.append(time.perf_counter() - began)
+    return summarize(latencies, time.perf_counter() - start)
+
+async def measure_async(operation, inputs: List[Any], concurrency: int = 1) -> Dict[str, float]:
+    latencies = []
+    slots = asyncio.Semaphore(concurrency)
+
+    async def timed(value):
+        async with slots:
+            began = time.perf_counter()
+            await operation(value)
+            latencies.append(time.perf_counter() - began)
+
+    start = time.perf_counter()
+    await asyncio.gather(*[timed(value) for value in inputs])
+    return summarize(latencies, time.perf_counter() - start)
+
+
+def _row_count(db_path: Path, table: str) -> int:
+    if not db_path.exists():
+        return -1
+    try:
+        with sqlite3.connect(db_path) as conn:
+            return conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+    except sqlite3.Error:
+        return -1
+
+def generate_memory_db(db_path: Path, rows: int, seed: int) -> float:
+    """Create memory.db with rows synthetic memories and its vector index; returns seconds taken"""
+    if _row_count(db_path, "memories") == rows:
+        return 0.0
+    for stale in db_path.parent.glob(f"{db_path.stem}.*"):
+        stale.unlink()
+    start = time.perf_counter()
+    corpus = Corpus(seed)
+    origin = datetime(2024, 1, 1)
+    manager = EnhancedMemoryManager(str(db_path), embedding_model=EMBEDDING_MODEL)
+    for offset in range(0, rows, 10_000):
+        batch = [
+            (
+                f"mem_bench_{index:08d}",
+                corpus.sentence(),
+                corpus.random.choice(MEMORY_TYPES),
+                str(origin + timedelta(seconds=index * 7)),
+                json.dumps({"task_id": f"task_{index}"})
+            )
+            for index in range(offset, min(rows, offset + 10_000))
+        ]
+        with manager.store.writer() as conn:
+            conn.executemany(
+                "INSERT INTO memories (id, content, type, timestamp, context) VALUES (?, ?, ?, ?, ?)",
+                batch
+            )
+    # Embed everything once so benchmark runs start from a saved index
+    manager._sync_index()
+    manager.close()
+    return time.perf_counter() - start
+
+def generate_knowledge_db(db_path: Path, rows: int, seed: int) -> float:
+    """Create dexter.db with rows documents and rows/10 knowledge entries; returns seconds taken"""
+    if _row_count(db_path, "documents") == rows:
+        return 0.0
+    for stale in db_path.parent.glob(f"{db_path.name}*"):
+        stale.unlink()
+    start = time.perf_counter()
+    corpus = Corpus(seed + 1)
+    knowledge_base = KnowledgeBase(str(db_path))
+    knowledge_base.add_documents(
+        (
+            {
+                "name": f"doc_{index:08d}",
+                "content": corpus.sentence(40, 150),
+                "doc_type": corpus.random.choice(DOC_TYPES),
+                "tags": corpus.random.sample(corpus.words[:200], 2)
+            }
+            for index in range(rows)
+        ),
+        batch_size=5000,
+        max_chunk_size=10_000
+    )
+    for offset in range(0, rows // 10, 5000):
+        knowledge_base.add_knowledge_entries(
+            {"topic": corpus.sentence(2, 5), "content": corpus.sentence(), "source": f"bench://{index}"}
+            for index in range(offset, min(rows // 10, offset + 5000))
+        )
+    knowledge_base.close()
+    return time.perf_counter() - start
+
+def copy_stores(data_dir: Path, work_dir: Path):
+    """Copy the synthetic stores so write benchmarks leave the originals untouched"""
+    for name in ("memory.db", "dexter.db"):
+        with sqlite3.connect(data_dir / name) as source, sqlite3.connect(work_dir / name) as target:
+            source.backup(target)
+    for vectors in data_dir.glob("memory.vectors*"):
+        shutil.copy(vectors, work_dir / vectors.name)
+
+
+async def run_size(label: str, rows: int, args) -> Dict[str, Any]:
+    data_dir = Path(args.data_dir) / label
+    data_dir.mkdir(parents=True, exist_ok=True)
+    corpus = Corpus(args.seed + 2)
+    queries = [corpus.query() for _ in range(args.queries)]
+    results: Dict[str, Any] = {"rows": rows}
+
+    console.print(f"[blue]{label}:[/blue] generating stores ({rows:,} rows)")
+    results["generate_seconds"] = {
+        "memory": generate_memory_db(data_dir / "memory.db", rows, args.seed),
+        "knowledge": generate_knowledge_db(data_dir / "dexter.db", rows, args.seed)
+    }
+    close_stores()
+
+    with tempfile.TemporaryDirectory(prefix="dexter-bench-") as work:
+        work_dir = Path(work)
+        copy_stores(data_dir, work_dir)
+
+        start = time.perf_counter()
+        manager = EnhancedMemoryManager(str(work_dir / "memory.db"), embedding_model=EMBEDDING_MODEL)
+        results["memory_open_seconds"] = time.perf_counter() - start
+        knowledge_base = KnowledgeBase(str(work_dir / "dexter.db"))
+
+        console.print(f"[blue]{label}:[/blue] reads")
+        results["retrieve_memories"] = measure(lambda query: manager.retrieve_memories(query, limit=5), queries)
+        keyword_queries = queries[:max(1, len(queries) // 10)]
+        results["retrieve_memories_keyword"] = measure(
+            lambda query: manager.retrieve_memories(query.split()[0], limit=5, mode="keyword"), keyword_queries
+        )
+        results["get_relevant_knowledge"] = await measure_async(knowledge_base.get_relevant_knowledge, queries)
+
+        console.print(f"[blue]{label}:[/blue] writes")
+        contents = [corpus.sentence() for _ in range(args.writes)]
+        start = time.perf_counter()
+        added = measure(lambda content: manager.add_memory(content, "result", {"bench": True}), contents)
+        manager.flush()
+        added["elapsed_with_flush"] = time.perf_counter() - start
+        added["throughput_with_flush"] = len(contents) / added["elapsed_with_flush"]
+        results["add_memory"] = added
+
+        results["add_document"] = measure(
+            lambda item: knowledge_base.add_document(f"bench_{item[0]}", item[1], "text"), list(enumerate(contents))
+        )
+        start = time.perf_counter()
+        inserted = knowledge_base.add_documents(
+            {"name": f"bulk_{index}", "content": content, "doc_type": "text"}
+            for index, content in enumerate(contents)
+        )
+        elapsed = time.perf_counter() - start
+        results["add_documents_bulk"] = {"count": inserted, "elapsed": elapsed,
+                                         "throughput": inserted / elapsed if elapsed else 0.0}
+
+        if not args.skip_e2e:
+            console.print(f"[blue]{label}:[/blue] end-to-end objectives")
+            results["process_objective"] = await run_objectives(manager, knowledge_base, work_dir, corpus, args)
+
+        # Drain the write-behind queues before their connections are closed
+        manager.close()
+        knowledge_base.close()
+        close_stores()
+    return results
+
+async def run_objectives(manager, knowledge_base, work_dir: Path, corpus: Corpus, args) -> Dict[str, Any]:
+    server = FakeOllama(
+        tokens=args.tokens,
+        token_latency=args.token_latency,
+        first_token_latency=args.first_token_latency,
+        max_parallel=args.concurrency
+    )
+    url = await server.start()
+    toolkit = ToolKit()
+    try:
+        agent = DexterAgent(
+            memory_manager=manager,
+            knowledge_base=knowledge_base,
+            toolkit=toolkit,
+            llm_client=LLMClient(host=url),
+            response_cache=ResponseCache(str(work_dir / "llm_cache.db"))
+        )
+        orchestrator = DexterOrchestrator(
+            manager, knowledge_base, toolkit,
+            model_limits={agent.model_name: args.concurrency}
+        )
+        orchestrator.register_agent(agent)
+        objectives = [f"Analyze {corpus.query()} and summarize {corpus.query()}" for _ in range(args.objectives)]
+
+        statuses: Dict[str, int] = {}
+
+        async def process(objective: str):
+            try:
+                response = await orchestrator.process_objective(objective)
+                status = response["status"] if response["status"] != "success" else response["task"].status
+            except Exception as e:
+                status = f"raised {type(e).__name__}: {str(e)}"
+            statuses[status] = statuses.get(status, 0) + 1
+
+        metrics.reset()
+        summary = await measure_async(process, objectives, concurrency=args.concurrency)
+        snapshot = metrics.snapshot()
+        summary["statuses"] = statuses
+        summary["llm_requests"] = server.requests
+        summary["stages"] = {
+            entry["labels"]["span"]: {key: entry[key] for key in ("count", "mean", "p50", "p95", "p99")}
+            for entry in snapshot["histograms"].get("dexter_span_seconds", [])
+        }
+        summary["tokens_per_second"] = [
+            {key: entry[key] for key in ("count", "mean", "p50")}
+            for entry in snapshot["histograms"].get("llm_tokens_per_second", [])
+        ]
+        return summary
+    finally:
+        await toolkit.cleanup()
+        await server.stop()
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def compare(baseline: Dict[str, Any], current: Dict[str, Any]):
+    """Print p50/p95 changes between two result files"""
+    table = Table(title="Benchmark comparison")
+    for column in ("Size", "Benchmark", "p50 before", "p50 after", "p95 before", "p95 after", "Change"):
+        table.add_column(column)
+    for size, results in current["results"].items():
+        before_size = baseline.get("results", {}).get(size, {})
+        for name, result in results.items():
+            before = before_size.get(name)
+            if not isinstance(result, dict) or not isinstance(before, dict) or "p50" not in result:
+                continue
+            change = (result["p50"] - before["p50"]) / before["p50"] * 100 if before["p50"] else 0.0
+            color = "red" if change > 10 else "green" if change < -10 else "white"
+            table.add_row(size, name,
+                          f"{before['p50'] * 1000:.2f}ms", f"{result['p50'] * 1000:.2f}ms",
+                          f"{before['p95'] * 1000:.2f}ms", f"{result['p95'] * 1000:.2f}ms",
+                          f"[{color}]{change:+.1f}%[/{color}]")
+    console.print(table)
+
+async def main():
+    parser = argparse.ArgumentParser(description='DexterGPT benchmarks')
+    parser.add_argument('--sizes', default='10k,100k', help=f"Comma-separated store sizes from {', '.join(SIZES)}")
+    parser.add_argument('--data-dir', default='benchmarks/data', help='Where synthetic stores are generated and reused')
+    parser.add_argument('--output', help='Results JSON (default: benchmarks/results/<timestamp>.json)')
+    parser.add_argument('--compare', help='Earlier results JSON to compare against')
+    parser.add_argument('--seed', type=int, default=1234)
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--writes', type=int, default=1000)
+    parser.add_argument('--objectives', type=int, default=20)
+    parser.add_argument('--concurrency', type=int, default=4)
+    parser.add_argument('--tokens', type=int, default=64, help='Tokens generated per fake LLM response')
+    parser.add_argument('--token-latency', type=float, default=0.01)
+    parser.add_argument('--first-token-latency', type=float, default=0.05)
+    parser.add_argument('--skip-e2e', action='store_true', help='Skip end-to-end objectives')
+    args = parser.parse_args()
+
+    sizes = [size.strip().lower() for size in args.sizes.split(",") if size.strip()]
+    unknown = [size for size in sizes if size not in SIZES]
+    if unknown:
+        parser.error(f"Unknown sizes: {', '.join(unknown)}")
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(),
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "args": vars(args)
+        },
+        "results": {}
+    }
+    for size in sizes:
+        report["results"][size] = await run_size(size, SIZES[size], args)
+
+    output = Path(args.output or f"benchmarks/results/{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2))
+    console.print(f"Results written to {output}")
+
+    if args.compare:
+        compare(json.loads(Path(args.compare).read_text()), report)
+    return report
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,20 @@
+# utils/config.py
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict
+import yaml
+
+CONFIG_PATH = "config/config.yaml"
+
+@lru_cache(maxsize=None)
+def load_config(path: str = CONFIG_PATH) -> Dict[str, Any]:
+    """Load config.yaml, returning an empty config if it is missing"""
+    config_file = Path(path)
+    if not config_file.exists():
+        return {}
+    with config_file.open() as f:
+        return yaml.safe_load(f) or {}
+
+def get_setting(section: str, key: str, default: Any = None, path: str = CONFIG_PATH) -> Any:
+    """Read a single setting from a config section"""
+    return (load_config(path).get(section) or {}).get(key, default)
@@ -0,0 +1,10 @@
+# tests/conftest.py
+import pytest
+from database.storage import close_stores
+
+@pytest.fixture(autouse=True)
+def isolated(tmp_path, monkeypatch):
+    """Run each test in its own directory and close any stores it opened"""
+    monkeypatch.chdir(tmp_path)
+    yield
+    close_stores()
@@ -0,0 +1,62 @@
+# agents/context.py
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple, Union
+import asyncio
+import inspect
+import time
+from utils.logger import logger
+
+# Receives the task and returns the context value (sync functions run in a thread)
+ContextSource = Callable[[Any], Union[Any, Awaitable[Any]]]
+
+class ContextGatherer:
+    """Fetches context from every registered source concurrently.
+
+    Each source runs under its own timeout. A source that times out or
+    raises is logged and left out of the context instead of failing or
+    delaying the task, so pre-LLM latency is bounded by the slowest
+    source's timeout rather than the sum of all lookups.
+    """
+
+    def __init__(self, default_timeout: float = 2.0):
+        self.default_timeout = default_timeout
+        self.sources: Dict[str, Tuple[ContextSource, float]] = {}
+
+    def add_source(self, name: str, fetch: ContextSource, timeout: Optional[float] = None):
+        self.sources[name] = (fetch, timeout or self.default_timeout)
+
+    def remove_source(self, name: str):
+        self.sources.pop(name, None)
+
+    async def gather(self, task, timings: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Return {source name: value} for every source that produced a non-empty value.
+
+        If timings is given, it is filled with per-source duration and outcome.
+        """
+        results = await asyncio.gather(*[
+            self._fetch(name, fetch, timeout, task)
+            for name, (fetch, timeout) in self.sources.items()
+        ])
+
+        context = {}
+        for name, value, outcome, duration in results:
+            if timings is not None:
+                timings[name] = {"status": outcome, "duration": duration}
+            if value:
+                context[name] = value
+        return context
+
+    async def _fetch(self, name: str, fetch: ContextSource, timeout: float, task):
+        start = time.perf_counter()
+        try:
+            if inspect.iscoroutinefunction(fetch):
+                pending = fetch(task)
+            else:
+                pending = asyncio.to_thread(fetch, task)
+            value = await asyncio.wait_for(pending, timeout=timeout)
+            return name, value, "ok", time.perf_counter() - start
+        except asyncio.TimeoutError:
+            logger.warning(f"Context source {name} timed out after {timeout}s")
+            return name, None, "timeout", time.perf_counter() - start
+        except Exception as e:
+            logger.warning(f"Context source {name} failed: {str(e)}")
+            return name, None, "error", time.perf_counter() - start
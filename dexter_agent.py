@@ -1,19 +1,41 @@
 # agents/dexter_agent.py
-from typing import Dict, Any
-import ollama
+from typing import Dict, Any, Optional, List
+import hashlib
+import inspect
 import json
 from rich.console import Console
 from .base import BaseAgent, Task
+from .context import ContextSource
+from .llm_client import LLMClient, TokenCallback
+from .prompt_builder import PromptBuilder
+from .response_cache import ResponseCache
+from utils.metrics import metrics
 
 console = Console()
 
+PROMPT_HEADER = """
+Task Type: {type}
+Task Content: {content}
+"""
+PROMPT_FOOTER = """
+Instructions:
+For analysis tasks, provide comprehensive information and insights.
+For code tasks, include working code with explanations.
+For research tasks, provide detailed findings and sources.
+
+Response:
+"""
+
 class DexterAgent(BaseAgent):
     def __init__(self, 
                  name: str = "DexterGPT",
                  model_name: str = "llama3.2",
                  memory_manager = None,
                  knowledge_base = None,
-                 toolkit = None):
+                 toolkit = None,
+                 llm_client: Optional[LLMClient] = None,
+                 response_cache: Optional[ResponseCache] = None,
+                 prompt_builder: Optional[PromptBuilder] = None):
         # Pass all arguments to parent class using kwargs
         super().__init__(
             name=name,
@@ -25,31 +47,72 @@ class DexterAgent(BaseAgent):
             model_name=model_name,
             memory_manager=memory_manager,
             knowledge_base=knowledge_base,
-            toolkit=toolkit
+            toolkit=toolkit,
+            llm_client=llm_client or LLMClient(),
+            response_cache=response_cache or ResponseCache(),
+            prompt_builder=prompt_builder or PromptBuilder(model_name)
         )
     
-    async def process_task(self, task: Task) -> Task:
+    @metrics.timed("agent.process_task")
+    async def process_task(self, task: Task,
+                           on_token: Optional[TokenCallback] = None,
+                           use_cache: bool = True) -> Task:
+        """Process a task, streaming generated tokens to on_token as they arrive.
+
+        Responses are served from the response cache when the same task was
+        answered before from the same knowledge; pass use_cache=False to
+        always call the model.
+        """
         try:
             # Get context
-            context = await self._get_context(task)
+            with metrics.span("agent.context"):
+                context = await self._get_context(task)
+            with metrics.span("agent.prompt"):
+                prompt = self._format_prompt(task, context)
+            metrics.observe("prompt_tokens_estimated", task.metrics["prompt"]["tokens"], model=self.model_name)
+            
+            cached = None
+            context_version = self._context_version(task, context, self._prompt_version())
+            if use_cache and self.response_cache:
+                with metrics.span("agent.cache_lookup"):
+                    cached = await self.response_cache.get_async(self.model_name, task.content, context_version)
+                metrics.inc("llm_response_cache_requests_total",
+                            result="miss" if cached is None else "hit")
             
-            # Process with Ollama
-            response = ollama.generate(
-                model=self.model_name,  # Use model_name instead of model
-                prompt=self._format_prompt(task, context)
-            )
+            if cached is not None:
+                if on_token:
+                    result = on_token(cached)
+                    if inspect.isawaitable(result):
+                        await result
+                task.result = cached
+                task.metrics["generation"] = {"model": self.model_name, "cached": True}
+            else:
+                # Process with Ollama
+                with metrics.span("agent.generate", model=self.model_name):
+                    generation = await self.llm_client.generate(
+                        model=self.model_name,
+                        prompt=prompt,
+                        on_token=on_token
+                    )
+                _record_generation(generation)
+                task.result = generation.text
+                task.metrics["generation"] = {**generation.to_dict(), "cached": False}
+                if self.response_cache and generation.text:
+                    await self.response_cache.set_async(
+                        self.model_name, task.content, generation.text, context_version
+                    )
             
             # Update task
-            task.result = response['response']
             task.status = "completed"
             
             # Store in memory if available
             if self.memory_manager:
-                memory_id = self.memory_manager.add_memory(
-                    content=str(task.result),
-                    memory_type="result",
-                    context={"task_id": task.id}
-                )
+                with metrics.span("agent.memory_write"):
+                    memory_id = await self.memory_manager.add_memory_async(
+                        content=str(task.result),
+                        memory_type="result",
+                        context={"task_id": task.id}
+                    )
                 if memory_id:
                     task.memory_references.append(memory_id)
             
@@ -59,39 +122,66 @@ class DexterAgent(BaseAgent):
             console.print(f"[red]Error in DexterAgent:[/red] {str(e)}")
             task.status = "failed"
             task.result = f"Error: {str(e)}"
+            # Keep whatever the model produced before failing
+            partial = getattr(e, "generation", None)
+            if partial is not None:
+                task.metrics["generation"] = {**partial.to_dict(), "cached": False, "partial_text": partial.text}
             return task
     
-    async def _get_context(self, task: Task) -> Dict[str, Any]:
-        context = {}
-        
+    @staticmethod
+    def _context_version(task: Task, context: Dict[str, Any], prompt_version: str = "") -> str:
+        """Identify the context a cached answer depends on.
+
+        Covers the prompt version, the task type, context supplied with the
+        task and the ids of the knowledge retrieved for it. Retrieved
+        memories are left out: they include this agent's own earlier
+        answers, so they change on every run.
+        """
+        knowledge = sorted(f"{item.get('type')}:{item.get('id')}" for item in context.get("knowledge") or [])
+        version = json.dumps([prompt_version, task.type, task.context, knowledge], sort_keys=True, default=str)
+        return hashlib.sha256(version.encode()).hexdigest()
+
+    def _prompt_version(self) -> str:
+        """Hash of the static prompt parts, so editing the template or budget invalidates cached answers"""
+        builder = self.prompt_builder.fingerprint() if self.prompt_builder else ""
+        return hashlib.sha256(f"{PROMPT_HEADER}\0{PROMPT_FOOTER}\0{builder}".encode()).hexdigest()
+
+    def _context_sources(self) -> Dict[str, ContextSource]:
+        sources = {}
         if self.memory_manager:
-            memories = self.memory_manager.retrieve_memories(task.content)
-            if memories:
-                context["memories"] = memories
-        
+            sources["memories"] = self._fetch_memories
         if self.knowledge_base:
-            try:
-                knowledge = await self.knowledge_base.get_relevant_knowledge(task.content)
-                if knowledge:
-                    context["knowledge"] = knowledge
-            except Exception as e:
-                console.print(f"[yellow]Warning: Could not retrieve knowledge: {str(e)}[/yellow]")
-        
+            sources["knowledge"] = self._fetch_knowledge
+        return sources
+    
+    async def _fetch_knowledge(self, task: Task) -> List[Dict[str, Any]]:
+        return await self.knowledge_base.get_relevant_knowledge(task.content)
+    
+    async def _get_context(self, task: Task) -> Dict[str, Any]:
+        # Start from context supplied with the task, e.g. results of dependencies
+        context = dict(task.context)
+        context.update(await self.context_gatherer.gather(
+            task, timings=task.metrics.setdefault("context", {})
+        ))
         return context
     
     def _format_prompt(self, task: Task, context: Dict[str, Any]) -> str:
-        prompt = f"""
-Task Type: {task.type}
-Task Content: {task.content}
+        """Build the prompt, fitting context to the token budget.
 
-Context:
-{json.dumps(context, indent=2)}
+        Token usage per section is recorded in task.metrics["prompt"].
+        """
+        header = PROMPT_HEADER.format(type=task.type, content=task.content)
+        build = self.prompt_builder.build(header, context, PROMPT_FOOTER)
+        task.metrics["prompt"] = build.report()
+        return build.text
 
-Instructions:
-For analysis tasks, provide comprehensive information and insights.
-For code tasks, include working code with explanations.
-For research tasks, provide detailed findings and sources.
 
-Response:
-"""
-        return prompt
\ No newline at end of file
+def _record_generation(generation):
+    labels = {"model": generation.model}
+    metrics.observe("llm_generation_seconds", generation.duration, **labels)
+    metrics.inc("llm_prompt_tokens_total", generation.prompt_tokens, **labels)
+    metrics.inc("llm_completion_tokens_total", generation.completion_tokens, **labels)
+    if generation.time_to_first_token is not None:
+        metrics.observe("llm_time_to_first_token_seconds", generation.time_to_first_token, **labels)
+    if generation.completion_tokens:
+        metrics.observe("llm_tokens_per_second", generation.tokens_per_second, **labels)
@@ -0,0 +1,68 @@
+# toolbox/extract.py
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Optional
+import asyncio
+import re
+import time
+from bs4 import BeautifulSoup
+
+try:
+    import lxml  # noqa: F401
+    PARSER = "lxml"
+except ImportError:
+    PARSER = "html.parser"
+
+# Elements that hold page chrome or code rather than readable text
+BOILERPLATE_TAGS = [
+    "script", "style", "noscript", "template", "svg", "canvas", "iframe",
+    "nav", "header", "footer", "aside", "form", "button"
+]
+BLANK_LINES = re.compile(r"\n\s*\n+")
+
+def extract_html(body: bytes, encoding: str = "utf-8") -> Dict[str, Any]:
+    """Parse an HTML document into its title and readable text.
+
+    Boilerplate elements are removed before text extraction and each block
+    of text goes on its own line. Runs in a worker process, so it only
+    takes and returns picklable values.
+    """
+    start = time.perf_counter()
+    html = body.decode(encoding, errors="replace")
+    soup = BeautifulSoup(html, PARSER)
+    title = soup.title.get_text(strip=True) if soup.title else None
+    for element in soup(BOILERPLATE_TAGS):
+        element.decompose()
+    root = soup.body or soup
+    text = BLANK_LINES.sub("\n", root.get_text(separator="\n", strip=True))
+    return {
+        "title": title,
+        "content": text,
+        "text_size": len(text),
+        "parse_time": time.perf_counter() - start,
+        "parser": PARSER
+    }
+
+
+class Extractor:
+    """Runs HTML extraction in a process pool, off the event loop.
+
+    The pool starts on first use. Use workers=0 to parse in the calling
+    process instead, e.g. where subprocesses are not available.
+    """
+
+    def __init__(self, workers: Optional[int] = None):
+        self.workers = workers
+        self._pool = None
+
+    async def extract(self, body: bytes, encoding: str = "utf-8") -> Dict[str, Any]:
+        if self.workers == 0:
+            return extract_html(body, encoding)
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.workers)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._pool, extract_html, body, encoding)
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
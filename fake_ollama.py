@@ -0,0 +1,109 @@
+# benchmarks/fake_ollama.py
+from datetime import datetime, timezone
+import argparse
+import asyncio
+import json
+import time
+from aiohttp import web
+
+class FakeOllama:
+    """Local stand-in for the Ollama HTTP API with controllable latency.
+
+    POST /api/generate streams ``tokens`` NDJSON chunks, the first after
+    ``first_token_latency`` seconds and each following one after
+    ``token_latency`` seconds, then a final chunk with token counts.
+    ``max_parallel`` bounds concurrent generations like OLLAMA_NUM_PARALLEL.
+    """
+
+    def __init__(self, tokens: int = 64, token_latency: float = 0.01,
+                 first_token_latency: float = 0.05, max_parallel: int = 4):
+        self.tokens = tokens
+        self.token_latency = token_latency
+        self.first_token_latency = first_token_latency
+        self.max_parallel = max_parallel
+        self.requests = 0
+        self._runner = None
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_post("/api/generate", self.generate)
+        app.router.add_get("/api/version", self.version)
+        return app
+
+    async def version(self, request: web.Request) -> web.Response:
+        return web.json_response({"version": "0.0.0-fake"})
+
+    async def generate(self, request: web.Request) -> web.StreamResponse:
+        body = await request.json()
+        self.requests += 1
+        model = body.get("model", "fake")
+        prompt_tokens = len(body.get("prompt", "").split())
+        start = time.perf_counter_ns()
+
+        async with self._slots:
+            if not body.get("stream", True):
+                await asyncio.sleep(self.first_token_latency + self.token_latency * (self.tokens - 1))
+                return web.json_response({
+                    **self._chunk(model, " ".join(f"tok{i}" for i in range(self.tokens)), True),
+                    **self._counts(prompt_tokens, start)
+                })
+
+            response = web.StreamResponse(headers={"Content-Type": "application/x-ndjson"})
+            await response.prepare(request)
+            await asyncio.sleep(self.first_token_latency)
+            for index in range(self.tokens):
+                if index:
+                    await asyncio.sleep(self.token_latency)
+                await response.write(json.dumps(self._chunk(model, f"tok{index} ", False)).encode() + b"\n")
+            final = {**self._chunk(model, "", True), **self._counts(prompt_tokens, start)}
+            await response.write(json.dumps(final).encode() + b"\n")
+            await response.write_eof()
+            return response
+
+    def _chunk(self, model: str, text: str, done: bool):
+        return {
+            "model": model,
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "response": text,
+            "done": done
+        }
+
+    def _counts(self, prompt_tokens: int, start: int):
+        return {
+            "done_reason": "stop",
+            "total_duration": time.perf_counter_ns() - start,
+            "prompt_eval_count": prompt_tokens,
+            "eval_count": self.tokens
+        }
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        """Serve in the running event loop; returns the base URL"""
+        self._slots = asyncio.Semaphore(self.max_parallel)
+        self._runner = web.AppRunner(self.app(), access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        bound_port = site._server.sockets[0].getsockname()[1]
+        return f"http://{host}:{bound_port}"
+
+    async def stop(self):
+        if self._runner:
+            await self._runner.cleanup()
+            self._runner = None
+
+
+async def _serve(args):
+    server = FakeOllama(args.tokens, args.token_latency, args.first_token_latency, args.max_parallel)
+    url = await server.start(args.host, args.port)
+    print(f"Fake Ollama listening on {url}")
+    await asyncio.Event().wait()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Fake Ollama server for benchmarks')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=11434)
+    parser.add_argument('--tokens', type=int, default=64)
+    parser.add_argument('--token-latency', type=float, default=0.01)
+    parser.add_argument('--first-token-latency', type=float, default=0.05)
+    parser.add_argument('--max-parallel', type=int, default=4)
+    asyncio.run(_serve(parser.parse_args()))
@@ -0,0 +1,124 @@
+# toolbox/http_cache.py
+from dataclasses import dataclass, asdict, field
+from pathlib import Path
+from typing import Dict, Optional
+import hashlib
+import json
+import os
+import re
+import time
+import uuid
+
+MAX_AGE_PATTERN = re.compile(r"max-age=(\d+)")
+
+@dataclass
+class CachedResponse:
+    url: str
+    status: int
+    headers: Dict[str, str] = field(default_factory=dict)
+    fetched_at: float = 0.0
+    body_hash: str = ""
+    body: bytes = b""
+
+    @property
+    def etag(self) -> Optional[str]:
+        return self.headers.get("ETag")
+
+    @property
+    def last_modified(self) -> Optional[str]:
+        return self.headers.get("Last-Modified")
+
+    def is_fresh(self, now: Optional[float] = None) -> bool:
+        """True while within the Cache-Control max-age sent by the server"""
+        cache_control = self.headers.get("Cache-Control", "")
+        if "no-cache" in cache_control:
+            return False
+        match = MAX_AGE_PATTERN.search(cache_control)
+        return bool(match) and (now or time.time()) - self.fetched_at < int(match.group(1))
+
+    def validators(self) -> Dict[str, str]:
+        """Headers that turn a GET for this URL into a conditional GET"""
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class HTTPCache:
+    """On-disk cache of HTTP responses, keyed by URL.
+
+    Each entry is a ``<sha256>.json`` metadata file next to a ``.body``
+    file. Responses without an ETag, Last-Modified or max-age are not stored
+    because they could never be revalidated or reused. Writes go through a
+    temporary file and ``os.replace`` so readers never see partial entries.
+    """
+
+    CACHED_HEADERS = ("ETag", "Last-Modified", "Cache-Control", "Content-Type")
+
+    def __init__(self, cache_dir: str = "cache/http", max_entry_size: int = 20 * 1024 * 1024):
+        # Created on first write, so constructing a cache never touches the disk
+        self.cache_dir = Path(cache_dir)
+        self.max_entry_size = max_entry_size
+
+    def _paths(self, url: str):
+        key = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        return self.cache_dir / f"{key}.json", self.cache_dir / f"{key}.body"
+
+    def get(self, url: str) -> Optional[CachedResponse]:
+        meta_path, body_path = self._paths(url)
+        try:
+            meta = json.loads(meta_path.read_text())
+            body = body_path.read_bytes()
+        except (OSError, ValueError):
+            return None
+        # Body and metadata are replaced separately; skip an entry caught mid-update
+        if meta.get("url") != url or meta.get("body_hash") != hashlib.sha256(body).hexdigest():
+            return None
+        return CachedResponse(body=body, **meta)
+
+    def set(self, url: str, status: int, headers, body: bytes) -> Optional[CachedResponse]:
+        """Store a 200 response if it can be revalidated or reused later.
+
+        headers must support case-insensitive lookup, as aiohttp's do.
+        """
+        kept = {name: headers[name] for name in self.CACHED_HEADERS if name in headers}
+        cache_control = kept.get("Cache-Control", "")
+        if (status != 200 or "no-store" in cache_control or len(body) > self.max_entry_size
+                or not ("ETag" in kept or "Last-Modified" in kept or "max-age" in cache_control)):
+            return None
+        entry = CachedResponse(url=url, status=status, headers=kept, fetched_at=time.time(),
+                               body_hash=hashlib.sha256(body).hexdigest(), body=body)
+        meta_path, body_path = self._paths(url)
+        meta = asdict(entry)
+        del meta["body"]
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        _write_atomic(body_path, body)
+        _write_atomic(meta_path, json.dumps(meta).encode("utf-8"))
+        return entry
+
+    def touch(self, entry: CachedResponse, headers=None) -> CachedResponse:
+        """Mark an entry as revalidated (304), taking any updated validators"""
+        for name in self.CACHED_HEADERS:
+            if headers and name in headers:
+                entry.headers[name] = headers[name]
+        entry.fetched_at = time.time()
+        meta_path, _ = self._paths(entry.url)
+        meta = asdict(entry)
+        del meta["body"]
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        _write_atomic(meta_path, json.dumps(meta).encode("utf-8"))
+        return entry
+
+    def clear(self):
+        for path in self.cache_dir.glob("*.json"):
+            path.unlink(missing_ok=True)
+        for path in self.cache_dir.glob("*.body"):
+            path.unlink(missing_ok=True)
+
+
+def _write_atomic(path: Path, data: bytes):
+    tmp_path = path.with_name(f"{path.name}.{uuid.uuid4().hex}.tmp")
+    tmp_path.write_bytes(data)
+    os.replace(tmp_path, path)
@@ -0,0 +1,260 @@
+# database/ingest.py
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+from pathlib import Path
+import codecs
+import itertools
+import mmap
+import os
+import time
+from rich.console import Console
+from rich.progress import (
+    BarColumn, DownloadColumn, Progress, TextColumn, TimeRemainingColumn, TransferSpeedColumn
+)
+from database.operator import KnowledgeBase, content_hash, iter_chunks
+from utils.config import get_setting
+
+console = Console()
+
+BLOCK_SIZE = 1024 * 1024
+# Files at least this large are streamed in-process instead of parsed in a worker
+STREAM_THRESHOLD = 64 * 1024 * 1024
+# Bytes of files parsed by workers but not yet written; bounds parsed chunks held in memory
+MAX_INFLIGHT_BYTES = 256 * 1024 * 1024
+# Chunk hashes remembered for deduplication within a run; well above the
+# rows add_documents holds before committing them where lookups can see them
+MAX_SEEN_HASHES = 100_000
+# Failed files listed in the summary
+MAX_REPORTED_ERRORS = 20
+
+def iter_files(path: str) -> Iterator[Path]:
+    """Yield the file at path, or every non-hidden file below a directory"""
+    root = Path(path)
+    if root.is_file():
+        yield root
+        return
+    for directory, dirnames, filenames in os.walk(root):
+        dirnames[:] = sorted(d for d in dirnames if not d.startswith("."))
+        for filename in sorted(filenames):
+            if not filename.startswith("."):
+                yield Path(directory) / filename
+
+def is_binary(path: Path) -> bool:
+    with open(path, "rb") as f:
+        return b"\0" in f.read(8192)
+
+def read_blocks(path: Path, block_size: int = BLOCK_SIZE) -> Iterator[str]:
+    """Stream a file as decoded text blocks, memory-mapping it when large"""
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size == 0:
+            return
+        if size >= block_size:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                for start in range(0, size, block_size):
+                    yield decoder.decode(mapped[start:start + block_size])
+        else:
+            yield decoder.decode(f.read())
+    tail = decoder.decode(b"", final=True)
+    if tail:
+        yield tail
+
+def parse_file(path: Path, max_chunk_size: int) -> List[str]:
+    """Read and chunk a whole file; runs in worker processes"""
+    if is_binary(path):
+        return []
+    return list(iter_chunks(read_blocks(path), max_chunk_size))
+
+class Deduplicator:
+    """Drop chunks whose whitespace-normalized content was already seen.
+
+    With a knowledge base, chunks already stored by earlier runs are
+    dropped too, so re-ingesting a tree adds only what changed. Stored
+    hashes are looked up once per batch of chunks, and only the most
+    recent max_seen hashes are remembered: older ones have been written
+    by then and are found in the knowledge base instead.
+    """
+
+    def __init__(self, knowledge_base: Optional[KnowledgeBase] = None,
+                 batch_size: int = 500, max_seen: int = MAX_SEEN_HASHES):
+        self.knowledge_base = knowledge_base
+        self.batch_size = batch_size
+        self.max_seen = max_seen
+        self.seen: "OrderedDict[str, None]" = OrderedDict()
+        self.duplicates = 0
+
+    def _remember(self, digest: str):
+        self.seen[digest] = None
+        if len(self.seen) > self.max_seen:
+            self.seen.popitem(last=False)
+
+    def filter(self, chunks: Iterable[str]) -> Iterator[Tuple[int, str]]:
+        """Yield (position, chunk) for new chunks, numbering from 1 by position in the input"""
+        numbered = enumerate(chunks, 1)
+        while True:
+            batch = [(number, chunk, content_hash(chunk))
+                     for number, chunk in itertools.islice(numbered, self.batch_size)]
+            if not batch:
+                return
+            stored = self.knowledge_base.stored_hashes([digest for _, _, digest in batch]) if self.knowledge_base else set()
+            for number, chunk, digest in batch:
+                if digest in self.seen or digest in stored:
+                    self.duplicates += 1
+                    continue
+                self._remember(digest)
+                yield number, chunk
+
+class IngestStats:
+    def __init__(self):
+        self.files = 0
+        self.skipped_files = 0
+        self.failed_files = 0
+        self.errors: List[Tuple[str, str]] = []
+        self.bytes = 0
+        self.chunks = 0
+        self.duplicates = 0
+        self.started = time.perf_counter()
+
+    def fail(self, path: Path, error: Exception):
+        self.failed_files += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append((str(path), str(error)))
+
+    def summary(self) -> Dict[str, Any]:
+        elapsed = time.perf_counter() - self.started
+        return {
+            "files": self.files,
+            "skipped_files": self.skipped_files,
+            "failed_files": self.failed_files,
+            "errors": self.errors,
+            "bytes": self.bytes,
+            "chunks": self.chunks,
+            "duplicates": self.duplicates,
+            "elapsed": elapsed,
+            "bytes_per_second": self.bytes / elapsed if elapsed else 0.0
+        }
+
+def _parsed_files(files: List[Tuple[Path, int]], max_chunk_size: int,
+                  workers: Optional[int]) -> Iterator[Tuple[Path, int, Any]]:
+    """Yield (path, size, chunks or exception), parsing small files across a process pool.
+
+    Files in flight are bounded both in number and by MAX_INFLIGHT_BYTES, so
+    parsed chunks never pile up faster than the writer can store them.
+    Large files are streamed in-process so they are never held in memory
+    whole. A file that fails to read or parse yields its exception.
+    """
+    small = [(path, size) for path, size in files if size < STREAM_THRESHOLD]
+    large = [(path, size) for path, size in files if size >= STREAM_THRESHOLD]
+
+    def result(future):
+        try:
+            return future.result()
+        except Exception as e:
+            return e
+
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        window = workers * 4
+        pending = deque()
+        inflight = 0
+        for path, size in small:
+            while pending and (len(pending) >= window or inflight + size > MAX_INFLIGHT_BYTES):
+                done_path, done_size, future = pending.popleft()
+                inflight -= done_size
+                yield done_path, done_size, result(future)
+            pending.append((path, size, pool.submit(parse_file, path, max_chunk_size)))
+            inflight += size
+        for path, size, future in pending:
+            yield path, size, result(future)
+
+    for path, size in large:
+        try:
+            binary = is_binary(path)
+        except OSError as e:
+            yield path, size, e
+            continue
+        yield path, size, [] if binary else iter_chunks(read_blocks(path), max_chunk_size)
+
+def ingest_path(knowledge_base: KnowledgeBase,
+                path: str,
+                workers: Optional[int] = None,
+                batch_size: int = 500,
+                max_chunk_size: Optional[int] = None) -> Dict[str, Any]:
+    """Ingest a file or directory tree into the knowledge base.
+
+    Files flow through a reader, chunker and deduplicator into batched
+    add_documents writes; progress is shown in bytes per second. A file
+    that cannot be read or parsed is counted in failed_files and ingest
+    carries on with the next one. Chunks already stored are skipped.
+    """
+    max_chunk_size = max_chunk_size or get_setting("knowledge_base", "max_chunk_size", 1000)
+    root = Path(path)
+    stats = IngestStats()
+    files = []
+    for file in iter_files(path):
+        try:
+            files.append((file, file.stat().st_size))
+        except OSError as e:
+            stats.fail(file, e)
+    deduplicator = Deduplicator(knowledge_base, batch_size=batch_size)
+
+    progress = Progress(
+        TextColumn("[bold blue]Ingesting"),
+        BarColumn(),
+        DownloadColumn(),
+        TransferSpeedColumn(),
+        TimeRemainingColumn(),
+        console=console
+    )
+
+    def documents() -> Iterator[Dict[str, Any]]:
+        for file, size, chunks in _parsed_files(files, max_chunk_size, workers):
+            progress.advance(task, size)
+            if isinstance(chunks, Exception):
+                stats.fail(file, chunks)
+                continue
+            name = str(file.relative_to(root)) if root.is_dir() else file.name
+            doc_type = file.suffix.lstrip(".") or "text"
+            found = False
+            try:
+                # Numbered by position in the file, so names stay stable across re-ingests
+                for number, chunk in deduplicator.filter(chunks):
+                    found = True
+                    stats.chunks += 1
+                    yield {
+                        "name": f"{name}#{number}",
+                        "content": chunk,
+                        "doc_type": doc_type,
+                        "tags": ["ingest", doc_type]
+                    }
+            except (OSError, UnicodeError) as e:
+                # Only streamed large files read lazily; chunks before the error are kept
+                stats.fail(file, e)
+                continue
+            # Throughput counts files read through, not ones that failed
+            stats.bytes += size
+            if found:
+                stats.files += 1
+            else:
+                stats.skipped_files += 1
+
+    with progress:
+        task = progress.add_task("ingest", total=sum(size for _, size in files))
+        knowledge_base.add_documents(documents(), batch_size=batch_size,
+                                     max_chunk_size=max_chunk_size)
+
+    stats.duplicates = deduplicator.duplicates
+    return stats.summary()
+
+def print_ingest_summary(summary: Dict[str, Any]):
+    console.print(
+        f"[green]Ingested {summary['chunks']} chunks from {summary['files']} files[/green] "
+        f"({summary['duplicates']} duplicate chunks, {summary['skipped_files']} files without new text) "
+        f"in {summary['elapsed']:.1f}s at {summary['bytes_per_second'] / 1024 / 1024:.1f} MB/s"
+    )
+    if summary['failed_files']:
+        console.print(f"[red]{summary['failed_files']} files could not be ingested:[/red]")
+        for path, error in summary['errors']:
+            console.print(f"  {path}: {error}")
@@ -0,0 +1,162 @@
+# agents/llm_client.py
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Union
+import asyncio
+import inspect
+import time
+import ollama
+
+TokenCallback = Callable[[str], Any]
+
+@dataclass
+class Generation:
+    text: str
+    model: str
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    time_to_first_token: Optional[float] = None
+    duration: float = 0.0
+    complete: bool = True
+
+    @property
+    def tokens_per_second(self) -> float:
+        if not self.completion_tokens or not self.duration:
+            return 0.0
+        generation_time = self.duration - (self.time_to_first_token or 0.0)
+        return self.completion_tokens / (generation_time or self.duration)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "model": self.model,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "time_to_first_token": self.time_to_first_token,
+            "duration": self.duration,
+            "tokens_per_second": self.tokens_per_second,
+            "complete": self.complete
+        }
+
+
+class GenerationTimeout(TimeoutError):
+    """The whole generation took longer than its timeout.
+
+    ``generation`` holds whatever text arrived before the deadline.
+    """
+
+    def __init__(self, message: str, generation: Optional[Generation] = None):
+        super().__init__(message)
+        self.generation = generation
+
+
+class FirstTokenTimeout(GenerationTimeout):
+    """The model produced no output within ``first_token_timeout``"""
+
+
+class LLMClient:
+    """Non-blocking Ollama client that streams tokens.
+
+    Each call is bounded by ``first_token_timeout`` (time until the model
+    starts answering) and ``timeout`` (whole generation). Cancelling the
+    awaiting task closes the stream, which stops generation on the server.
+
+    When generate() fails part way, the partial output is kept as an
+    incomplete Generation on the exception's ``generation`` attribute.
+    """
+
+    def __init__(self,
+                 host: Optional[str] = None,
+                 timeout: float = 300.0,
+                 first_token_timeout: float = 60.0,
+                 keep_alive: Optional[Union[float, str]] = None,
+                 client: Optional[ollama.AsyncClient] = None):
+        self.client = client or ollama.AsyncClient(host=host)
+        self.timeout = timeout
+        self.first_token_timeout = first_token_timeout
+        self.keep_alive = keep_alive
+
+    async def stream(self, model: str, prompt: str,
+                     options: Optional[Dict[str, Any]] = None,
+                     first_token_timeout: Optional[float] = None) -> AsyncIterator[Any]:
+        """Yield raw response chunks as the model produces them"""
+        if first_token_timeout is None:
+            first_token_timeout = self.first_token_timeout
+        message = f"{model} produced no output within {first_token_timeout}s"
+        # asyncio.timeout rather than wait_for: on 3.11 wait_for can swallow the
+        # cancellation from generate()'s overall timeout if the call finishes
+        # in the same loop iteration
+        try:
+            async with asyncio.timeout(first_token_timeout):
+                chunks = await self.client.generate(
+                    model=model,
+                    prompt=prompt,
+                    stream=True,
+                    options=options,
+                    keep_alive=self.keep_alive
+                )
+        except TimeoutError:
+            raise FirstTokenTimeout(message)
+        iterator = chunks.__aiter__()
+        try:
+            try:
+                async with asyncio.timeout(first_token_timeout):
+                    first = await iterator.__anext__()
+            except TimeoutError:
+                raise FirstTokenTimeout(message)
+            yield first
+            async for chunk in iterator:
+                yield chunk
+        except StopAsyncIteration:
+            return
+        finally:
+            if hasattr(iterator, "aclose"):
+                await iterator.aclose()
+
+    async def generate(self, model: str, prompt: str,
+                       on_token: Optional[TokenCallback] = None,
+                       options: Optional[Dict[str, Any]] = None,
+                       timeout: Optional[float] = None,
+                       first_token_timeout: Optional[float] = None) -> Generation:
+        """Generate a full response, passing each token to on_token as it arrives"""
+        if timeout is None:
+            timeout = self.timeout
+        start = time.perf_counter()
+        generation = Generation(text="", model=model)
+        parts = []
+
+        try:
+            async with asyncio.timeout(timeout):
+                async for chunk in self.stream(model, prompt, options, first_token_timeout):
+                    token = chunk['response']
+                    if token:
+                        if generation.time_to_first_token is None:
+                            generation.time_to_first_token = time.perf_counter() - start
+                        parts.append(token)
+                        if on_token:
+                            result = on_token(token)
+                            if inspect.isawaitable(result):
+                                await result
+                    if chunk.get('done'):
+                        generation.prompt_tokens = chunk.get('prompt_eval_count') or 0
+                        generation.completion_tokens = chunk.get('eval_count') or len(parts)
+        except BaseException as e:
+            generation.complete = False
+            generation.completion_tokens = generation.completion_tokens or len(parts)
+            self._finish(generation, parts, start)
+            if isinstance(e, FirstTokenTimeout):
+                e.generation = generation
+                raise
+            if isinstance(e, TimeoutError):
+                raise GenerationTimeout(
+                    f"Generation with {model} timed out after {timeout}s", generation
+                ) from e
+            # Keep the partial answer for callers that recover, e.g. on Ctrl+C
+            e.generation = generation
+            raise
+
+        self._finish(generation, parts, start)
+        return generation
+
+    @staticmethod
+    def _finish(generation: Generation, parts: List[str], start: float):
+        generation.text = "".join(parts)
+        generation.duration = time.perf_counter() - start
@@ -1,22 +1,115 @@
 # utils/logger.py
+import atexit
+import json
 import logging
+import logging.handlers
+import queue
+from datetime import datetime
 from rich.logging import RichHandler
 from pathlib import Path
+from utils.config import get_setting
+
+DEFAULT_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+# Attributes every LogRecord has; anything else was passed through ``extra``
+RECORD_ATTRIBUTES = set(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+
+_listener = None
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line, including any ``extra`` fields"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "timestamp": datetime.fromtimestamp(record.created).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "module": record.module,
+            "line": record.lineno,
+            "thread": record.threadName
+        }
+        for key, value in vars(record).items():
+            if key not in RECORD_ATTRIBUTES:
+                entry[key] = value
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    """Hands records to the listener thread, deferring formatting to it.
+
+    Only the message arguments are merged here; exc_info is kept so the
+    console handler can still render rich tracebacks.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = logging.makeLogRecord(vars(record))
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
+def _file_handler(path: Path) -> logging.Handler:
+    backup_count = get_setting("logging", "backup_count", 5)
+    if get_setting("logging", "rotation", "size") == "time":
+        return logging.handlers.TimedRotatingFileHandler(
+            path, when=get_setting("logging", "when", "midnight"),
+            backupCount=backup_count, encoding="utf-8"
+        )
+    return logging.handlers.RotatingFileHandler(
+        path, maxBytes=get_setting("logging", "max_bytes", 10 * 1024 * 1024),
+        backupCount=backup_count, encoding="utf-8"
+    )
 
 def setup_logger(name: str = "DexterGPT"):
+    """Route all logging through a queue to a background writer thread.
+
+    Callers only enqueue records; the console and rotating file handlers
+    format and write them on the listener thread. Levels, file path,
+    rotation and JSON output come from the ``logging`` section of
+    config.yaml, with per-logger overrides under ``logging.levels``.
+    """
+    global _listener
+    if _listener is not None:
+        return logging.getLogger(name)
+
+    level = get_setting("logging", "level", "INFO")
+    log_file = Path(get_setting("logging", "file", "logs/dextergpt.log"))
     # Create logs directory if it doesn't exist
-    Path("logs").mkdir(exist_ok=True)
-    
-    # Configure logging
-    logging.basicConfig(
-        level=logging.INFO,
-        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-        handlers=[
-            RichHandler(rich_tracebacks=True),
-            logging.FileHandler(f"logs/dextergpt.log")
-        ]
+    log_file.parent.mkdir(parents=True, exist_ok=True)
+
+    console_handler = RichHandler(rich_tracebacks=True)
+    console_handler.setLevel(get_setting("logging", "console_level", level))
+    file_handler = _file_handler(log_file)
+    file_handler.setLevel(get_setting("logging", "file_level", level))
+    if get_setting("logging", "json", False):
+        file_handler.setFormatter(JsonFormatter())
+    else:
+        file_handler.setFormatter(logging.Formatter(get_setting("logging", "format", DEFAULT_FORMAT)))
+
+    log_queue = queue.SimpleQueue()
+    _listener = logging.handlers.QueueListener(
+        log_queue, console_handler, file_handler, respect_handler_level=True
     )
-    
+    _listener.start()
+    atexit.register(stop_logging)
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(_QueueHandler(log_queue))
+    root.setLevel(level)
+    for logger_name, logger_level in (get_setting("logging", "levels", {}) or {}).items():
+        logging.getLogger(logger_name).setLevel(logger_level)
+
     return logging.getLogger(name)
 
-logger = setup_logger()
\ No newline at end of file
+def stop_logging():
+    """Flush queued records and stop the writer thread"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+logger = setup_logger()
@@ -1,48 +1,162 @@
 # main.py
-import os
+import time
+
+_START = time.perf_counter()
+
 import argparse
-from rich.console import Console
-from rich.panel import Panel
-import ollama
-import asyncio
+import sys
+from contextlib import contextmanager
 from pathlib import Path
+from typing import Any, Dict, Optional
 
-from agents.base import Task
-from agents.dexter_agent import DexterAgent
-from agents.orchestrator import DexterOrchestrator
-from memory.manager import EnhancedMemoryManager
-from database.operator import KnowledgeBase
-from toolbox.tools import ToolKit
-from utils.analysis import view_interaction_history
-from utils.analysis import view_task_results
+DEFAULT_DB = "knowledge/dexter.db"
+DEFAULT_MODEL = "llama3.2"
+# Seconds spent importing each group of modules, reported by --import-time
+IMPORT_TIMES = {"startup": time.perf_counter() - _START}
 
-console = Console()
+@contextmanager
+def _importing(label: str):
+    """Time a block of imports deferred until a command needs them"""
+    start = time.perf_counter()
+    yield
+    IMPORT_TIMES[label] = IMPORT_TIMES.get(label, 0.0) + time.perf_counter() - start
 
-async def main():
-    parser = argparse.ArgumentParser(description='DexterGPT CLI')
-    parser.add_argument('-o', '--objective', type=str, help='Task objective')
-    parser.add_argument('-f', '--file', type=str, help='Path to input file')
-    args = parser.parse_args()
+_console = None
 
-    try:
-        # Initialize components
-        memory_manager = EnhancedMemoryManager()
-        knowledge_base = KnowledgeBase()
-        toolkit = ToolKit()
-        
-        # Initialize agent with correct parameters
-        dexter_agent = DexterAgent(
+def get_console():
+    """Rich console, created on first use so commands that never print skip importing rich"""
+    global _console
+    if _console is None:
+        with _importing("rich"):
+            from rich.console import Console
+        _console = Console()
+    return _console
+
+def print_import_times():
+    from rich.table import Table
+
+    table = Table(title="Import time")
+    table.add_column("Modules")
+    table.add_column("Time", justify="right")
+    for label, seconds in IMPORT_TIMES.items():
+        table.add_row(label, f"{seconds * 1000:.1f}ms")
+    table.add_row("total", f"{sum(IMPORT_TIMES.values()) * 1000:.1f}ms")
+    get_console().print(table)
+
+
+class Components:
+    """Stores, toolkit and default agent shared by a pipeline command"""
+
+    def __init__(self, model_name: str):
+        with _importing("agents"):
+            from agents.dexter_agent import DexterAgent
+            from memory.manager import EnhancedMemoryManager
+            from database.operator import KnowledgeBase
+            from toolbox.tools import ToolKit
+
+        self.memory_manager = EnhancedMemoryManager()
+        self.knowledge_base = KnowledgeBase()
+        self.toolkit = ToolKit()
+        self.agent = DexterAgent(
             name="DexterGPT",
-            model_name="llama3.2",
-            memory_manager=memory_manager,
-            knowledge_base=knowledge_base,
-            toolkit=toolkit
+            model_name=model_name,
+            memory_manager=self.memory_manager,
+            knowledge_base=self.knowledge_base,
+            toolkit=self.toolkit
+        )
+
+    async def close(self):
+        """Close the HTTP session, then flush and close the stores, as DexterServer.stop does"""
+        from database.storage import close_stores
+
+        await self.toolkit.cleanup()
+        self.memory_manager.close()
+        self.knowledge_base.close()
+        close_stores()
+
+class AnswerView:
+    """Live panel showing an answer as its tokens arrive.
+
+    Timings are taken from when the view opens, so time to first token
+    includes context retrieval and prompt building as the user sees it.
+    While streaming, an answer taller than the terminal is cut off with an
+    ellipsis rather than redrawn below itself; when the view closes, the
+    live panel is replaced by the full text, including after an interrupt.
+    """
+
+    def __init__(self):
+        from rich.live import Live
+
+        self.parts = []
+        self.start = time.perf_counter()
+        self.first_token = None
+        self.closed = False
+        self.live = Live(self, console=get_console(), refresh_per_second=10,
+                         vertical_overflow="ellipsis", transient=True)
+
+    def __enter__(self):
+        self.live.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.closed = True
+        self.elapsed = time.perf_counter() - self.start
+        # Stop on an empty frame; Live would otherwise redraw it in full
+        self.live.update("")
+        self.live.stop()
+        if self.parts:
+            get_console().print(self)
+
+    def add(self, token: str):
+        if self.first_token is None:
+            self.first_token = time.perf_counter() - self.start
+        self.parts.append(token)
+
+    @property
+    def text(self) -> str:
+        return "".join(self.parts)
+
+    def __rich__(self):
+        from rich.panel import Panel
+        from rich.text import Text
+
+        elapsed = time.perf_counter() - self.start
+        status = f"{len(self.parts)} tokens · {elapsed:.1f}s" if self.parts else f"waiting for first token · {elapsed:.1f}s"
+        return Panel(Text(self.text), subtitle=None if self.closed else status, subtitle_align="right")
+
+    def print_stats(self, generation: Optional[Dict[str, Any]] = None):
+        """Print time to first token, tokens/sec and total duration"""
+        generation = generation or {}
+        if generation.get("cached"):
+            get_console().print(f"[dim]Served from the response cache in {self.elapsed:.2f}s[/dim]")
+            return
+        tokens = generation.get("completion_tokens") or len(self.parts)
+        tokens_per_second = generation.get("tokens_per_second")
+        if not tokens_per_second and self.first_token is not None and self.elapsed > self.first_token:
+            tokens_per_second = len(self.parts) / (self.elapsed - self.first_token)
+        first_token = f"{self.first_token:.2f}s" if self.first_token is not None else "-"
+        get_console().print(
+            f"[dim]Time to first token {first_token} · {tokens_per_second or 0:.1f} tokens/s · "
+            f"{tokens} tokens · {self.elapsed:.2f}s total[/dim]"
         )
-        
+
+def _print_interrupted(view: AnswerView):
+    get_console().print(f"[yellow]Stopped[/yellow] after {len(view.parts)} tokens; partial answer kept above")
+    view.print_stats()
+
+async def run_command(args):
+    if args.server:
+        return await run_on_server(args)
+
+    from asyncio import CancelledError
+    with _importing("agents"):
+        from agents.base import Task
+
+    components = Components(args.model)
+    try:
         # Get objective
         objective = args.objective or input("Please enter your objective: ")
-        
-        # Create task
+
         task = Task(
             id="task_1",
             content=objective,
@@ -50,22 +164,287 @@ async def main():
             priority=1,
             context={}
         )
-        
-        # Process task
-        result = await dexter_agent.process_task(task)
-        
+        view = AnswerView()
+        try:
+            with view:
+                result = await components.agent.process_task(task, on_token=view.add)
+        except (KeyboardInterrupt, CancelledError):
+            _print_interrupted(view)
+            raise
+
         # Display result
         if result.status == "completed":
-            console.print("[green]Task completed successfully[/green]")
-            console.print(Panel(str(result.result)))
+            get_console().print("[green]Task completed successfully[/green]")
+            view.print_stats(result.metrics.get("generation"))
         else:
-            console.print(f"[red]Task failed:[/red] {result.result}")
-        
+            get_console().print(f"[red]Task failed:[/red] {result.result}")
         return result
-        
+    finally:
+        await components.close()
+
+async def run_on_server(args):
+    """Send the objective to a running server and render the answer as it streams"""
+    from asyncio import CancelledError
+    with _importing("server client"):
+        from server import stream_objective
+
+    objective = args.objective or input("Please enter your objective: ")
+    result = None
+    view = AnswerView()
+    try:
+        with view:
+            async for event in stream_objective(objective, args.server):
+                if event["event"] == "token":
+                    view.add(event["text"])
+                elif event["event"] == "result":
+                    result = event
+    except (KeyboardInterrupt, CancelledError):
+        _print_interrupted(view)
+        raise
+
+    if result and result["status"] == "success" and result.get("task_status") == "completed":
+        get_console().print("[green]Task completed successfully[/green]")
+        view.print_stats(result.get("generation"))
+    else:
+        get_console().print(f"[red]Task failed:[/red] {result and (result.get('error') or result.get('result'))}")
+    return result
+
+async def serve_command(args):
+    with _importing("server"):
+        from server import serve
+
+    await serve(
+        host=args.host,
+        port=args.port,
+        socket_path=args.socket,
+        model_name=args.model,
+        keep_alive=args.keep_alive,
+        concurrency=args.concurrency
+    )
+
+async def batch_command(args):
+    with _importing("agents"):
+        from agents.orchestrator import DexterOrchestrator
+        from utils.batch import run_batch, print_batch_summary
+
+    components = Components(args.model)
+    try:
+        orchestrator = DexterOrchestrator(components.memory_manager, components.knowledge_base, components.toolkit)
+        orchestrator.register_agent(components.agent)
+        output_path = args.output or f"{Path(args.file).with_suffix('')}.results.jsonl"
+        summary = await run_batch(
+            orchestrator,
+            args.file,
+            output_path,
+            concurrency=args.concurrency,
+            resume=not args.no_resume,
+            agent=components.agent
+        )
+        print_batch_summary(summary)
+        get_console().print(f"Results written to {output_path}")
+        return summary
+    finally:
+        await components.close()
+
+def ingest_command(args):
+    with _importing("knowledge base"):
+        from database.operator import KnowledgeBase
+        from database.ingest import ingest_path, print_ingest_summary
+        from database.storage import close_stores
+
+    knowledge_base = KnowledgeBase()
+    try:
+        summary = ingest_path(knowledge_base, args.path, workers=args.workers)
+    finally:
+        knowledge_base.close()
+        close_stores()
+    print_ingest_summary(summary)
+    return summary
+
+async def feeds_command(args):
+    with _importing("feeds"):
+        from database.operator import KnowledgeBase
+        from toolbox.tools import ToolKit
+        from toolbox.rss import FeedPoller
+        from database.storage import close_stores
+
+    knowledge_base = KnowledgeBase()
+    toolkit = ToolKit()
+    poller = FeedPoller(knowledge_base, toolkit)
+    try:
+        new_items = await poller.poll_due()
+    finally:
+        await toolkit.cleanup()
+        knowledge_base.close()
+        close_stores()
+    for feed in poller.stats():
+        status = f"[red]{feed['last_error']}[/red]" if feed['last_error'] else f"{feed['new_items']} new"
+        get_console().print(f"{feed['name']}: {status}")
+    return new_items
+
+def _cursor(args):
+    return (args.before, args.before_id) if args.before else None
+
+def history_command(args):
+    with _importing("analysis"):
+        from utils.analysis import view_interaction_history
+    return view_interaction_history(args.db, args.limit, _cursor(args), args.type, args.status)
+
+def results_command(args):
+    with _importing("analysis"):
+        from utils.analysis import view_task_results
+    return view_task_results(args.db, args.limit, _cursor(args), args.agent, args.status)
+
+def analytics_command(args):
+    with _importing("analysis"):
+        from utils.analysis import view_analytics
+    return view_analytics(args.db, args.since_hours)
+
+def export_command(args):
+    with _importing("analysis"):
+        from utils.analysis import export_rows
+    written = export_rows(args.db, args.table, args.output, args.since_hours, args.batch_size)
+    get_console().print(f"Exported {written} {args.table} rows to {args.output}")
+    return written
+
+
+def _add_page_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument('--db', default=DEFAULT_DB, help='Knowledge base database')
+    parser.add_argument('-n', '--limit', type=int, default=50, help='Rows per page')
+    parser.add_argument('--before', type=str, help='Show rows older than this timestamp (from the previous page)')
+    parser.add_argument('--before-id', type=int, default=0, help='Row id paired with --before')
+    parser.add_argument('--status', type=str, help='Only rows with this status')
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description='DexterGPT CLI')
+    parser.add_argument('--metrics-out', type=str, help='Write metrics and traces on exit (.prom for Prometheus text, otherwise JSON)')
+    parser.add_argument('--import-time', action='store_true', help='Report time spent importing modules')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run = commands.add_parser('run', help='Process a single objective')
+    run.add_argument('objective', nargs='?', help='Task objective (prompted for if omitted)')
+    run.add_argument('-m', '--model', default=DEFAULT_MODEL, help='Model used by the agent')
+    run.add_argument('--server', type=str, help='Send the objective to a running server (URL or unix socket path)')
+    run.set_defaults(handler=run_command, pipeline=True)
+
+    serve = commands.add_parser('serve', help='Keep agents, stores and the model loaded and serve objectives')
+    serve.add_argument('--host', type=str, help='Interface to listen on (default: server.host)')
+    serve.add_argument('--port', type=int, help='Port to listen on (default: server.port)')
+    serve.add_argument('--socket', type=str, help='Listen on this unix socket instead of host/port')
+    serve.add_argument('-m', '--model', type=str, help='Model used by the agent (default: models.primary_model)')
+    serve.add_argument('--keep-alive', type=str, help='How long Ollama keeps the model loaded, e.g. 30m or -1 (default: server.keep_alive)')
+    serve.add_argument('-c', '--concurrency', type=int, help='Objectives processed at once (default: server.concurrency)')
+    serve.set_defaults(handler=serve_command, pipeline=True)
+
+    batch = commands.add_parser('batch', help='Run a JSONL or text file of objectives')
+    batch.add_argument('file', help='Path to a JSONL or text file of objectives')
+    batch.add_argument('--output', type=str, help='Batch results JSONL (default: <file>.results.jsonl)')
+    batch.add_argument('-c', '--concurrency', type=int, default=4, help='Objectives processed concurrently')
+    batch.add_argument('--no-resume', action='store_true', help='Reprocess objectives that already succeeded in the output file')
+    batch.add_argument('-m', '--model', default=DEFAULT_MODEL, help='Model used by the agent')
+    batch.set_defaults(handler=batch_command, pipeline=True)
+
+    ingest = commands.add_parser('ingest', help='Ingest a file or directory into the knowledge base')
+    ingest.add_argument('path', help='File or directory to ingest')
+    ingest.add_argument('--workers', type=int, help='Parser processes (default: CPU count)')
+    ingest.set_defaults(handler=ingest_command, pipeline=True)
+
+    feeds = commands.add_parser('feeds', help='Poll the configured RSS feeds once and store new items')
+    feeds.set_defaults(handler=feeds_command, pipeline=True)
+
+    history = commands.add_parser('history', help='Page through logged interactions')
+    _add_page_arguments(history)
+    history.add_argument('--type', type=str, help='Only interactions of this type')
+    history.set_defaults(handler=history_command, pipeline=False)
+
+    results = commands.add_parser('results', help='Page through task results')
+    _add_page_arguments(results)
+    results.add_argument('--agent', type=str, help='Only results from this agent')
+    results.set_defaults(handler=results_command, pipeline=False)
+
+    analytics = commands.add_parser('analytics', help='Throughput, latency and error-rate summaries')
+    analytics.add_argument('--db', default=DEFAULT_DB, help='Knowledge base database')
+    analytics.add_argument('--since-hours', type=float, default=24, help='Window to summarise (0 for all time)')
+    analytics.set_defaults(handler=analytics_command, pipeline=False)
+
+    export = commands.add_parser('export', help='Stream a telemetry table to CSV or JSONL')
+    export.add_argument('table', choices=['interactions', 'task_results'])
+    export.add_argument('output', help='Output file; .csv for CSV, otherwise JSONL')
+    export.add_argument('--db', default=DEFAULT_DB, help='Knowledge base database')
+    export.add_argument('--since-hours', type=float, help='Only rows from the last N hours')
+    export.add_argument('--batch-size', type=int, default=5000, help='Rows read per query')
+    export.set_defaults(handler=export_command, pipeline=False)
+    return parser
+
+# Flags from before subcommands, and the command each one now runs
+LEGACY_FLAGS = {"-o": "run", "--objective": "run", "-f": "batch", "--file": "batch"}
+GLOBAL_FLAGS = {"--metrics-out": 1, "--import-time": 0}
+
+def translate_legacy_args(argv):
+    """Rewrite `-o OBJECTIVE` and `-f FILE` into the `run` and `batch` commands.
+
+    Global options move ahead of the command and everything else follows
+    it, so old invocations such as `-f objectives.jsonl -c 8` keep working.
+    """
+    commands = set(LEGACY_FLAGS.values()) | {"serve", "ingest", "feeds", "history", "results", "analytics", "export"}
+    for index, arg in enumerate(argv):
+        if arg in commands:
+            return argv
+        flag, has_value, value = arg.partition("=")
+        if flag not in LEGACY_FLAGS:
+            continue
+        if has_value:
+            rest = argv[:index] + argv[index + 1:]
+        elif index + 1 < len(argv):
+            value = argv[index + 1]
+            rest = argv[:index] + argv[index + 2:]
+        else:
+            return argv
+        command = LEGACY_FLAGS[flag]
+        get_console().print(f"[yellow]Warning: {flag} is deprecated;[/yellow] use the `{command}` command instead")
+
+        head, tail = [], []
+        position = 0
+        while position < len(rest):
+            name = rest[position].partition("=")[0]
+            taken = 1 + (GLOBAL_FLAGS[name] if name in GLOBAL_FLAGS and "=" not in rest[position] else 0)
+            (head if name in GLOBAL_FLAGS else tail).extend(rest[position:position + taken])
+            position += taken
+        return head + [command, value] + tail
+    return argv
+
+def _write_metrics(args):
+    with _importing("metrics"):
+        from utils.config import get_setting
+        from utils.metrics import metrics
+
+    metrics_path = args.metrics_out or get_setting("metrics", "export_path")
+    if metrics_path and metrics.enabled:
+        metrics.write(metrics_path)
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else list(argv)
+    args = build_parser().parse_args(translate_legacy_args(argv))
+    result = None
+    try:
+        outcome = args.handler(args)
+        if hasattr(outcome, "__await__"):
+            with _importing("asyncio"):
+                import asyncio
+            outcome = asyncio.run(outcome)
+        result = outcome
+
+    except KeyboardInterrupt:
+        get_console().print("[yellow]Interrupted[/yellow]")
     except Exception as e:
-        console.print(f"[red]Error:[/red] {str(e)}")
-        return None
+        get_console().print(f"[red]Error:[/red] {str(e)}")
+    finally:
+        # Only commands that run the pipeline record metrics
+        if args.pipeline or args.metrics_out:
+            _write_metrics(args)
+        if args.import_time:
+            print_import_times()
+    return result
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    main()
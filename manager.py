@@ -1,19 +1,104 @@
 # memory/manager.py
 from typing import List, Dict, Any, Optional
-import sqlite3
-from datetime import datetime
+from pathlib import Path
+from datetime import datetime, timedelta, timezone
+from itertools import groupby
+import asyncio
+import hashlib
 import json
+import math
+import os
+import threading
+import time
 from rich.console import Console
+from database.storage import BatchWriter, get_store
+from memory.tiers import MemoryTiers
+from memory.vector_index import VectorIndex, get_embedder
+from utils.config import get_setting
+from utils.logger import logger
+from utils.metrics import metrics
 
 console = Console()
 
+_id_lock = threading.Lock()
+_last_id_ns = 0
+# Distinguishes ids minted by different processes sharing one database
+_ID_NODE = os.urandom(2).hex()
+
+def new_memory_id() -> str:
+    """Unique memory id that sorts in creation order, e.g. mem_20240101_120000_000000001_ab12"""
+    global _last_id_ns
+    with _id_lock:
+        # Never repeat or go backwards, even within one clock tick
+        ns = max(time.time_ns(), _last_id_ns + 1)
+        _last_id_ns = ns
+    seconds, fraction = divmod(ns, 1_000_000_000)
+    return f"mem_{time.strftime('%Y%m%d_%H%M%S', time.localtime(seconds))}_{fraction:09d}_{_ID_NODE}"
+
+def _utc_now() -> datetime:
+    """Naive UTC time, the convention of SQLite's CURRENT_TIMESTAMP"""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+def _local_to_utc(value: Optional[str]) -> Optional[str]:
+    """Convert a naive local timestamp written by older versions to naive UTC"""
+    try:
+        local = datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        return value
+    # astimezone() on a naive datetime applies the local offset in effect at that time, DST included
+    return str(local.astimezone(timezone.utc).replace(tzinfo=None))
+
 class EnhancedMemoryManager:
-    def __init__(self, db_path: str = "memory.db"):
+    def __init__(self, db_path: str = "memory.db",
+                 embedding_model: Optional[str] = None,
+                 index_flush_every: int = 100,
+                 max_working_memory: Optional[int] = None,
+                 max_short_term: Optional[int] = None,
+                 compression_ratio: Optional[float] = None,
+                 compaction_enabled: Optional[bool] = None,
+                 compaction_age_days: int = 30,
+                 compaction_interval: float = 3600,
+                 write_batch_size: int = 500,
+                 write_flush_interval: float = 0.05):
         self.db_path = db_path
+        self.index_flush_every = index_flush_every
+        self.tiers = MemoryTiers(
+            max_working=(max_working_memory if max_working_memory is not None
+                         else get_setting("memory", "max_working_memory", 10)),
+            max_short_term=(max_short_term if max_short_term is not None
+                            else get_setting("memory", "max_short_term", 20))
+        )
+        self.compression_ratio = (compression_ratio if compression_ratio is not None
+                                  else get_setting("memory", "compression_ratio", 0.8))
+        self.compaction_enabled = (compaction_enabled if compaction_enabled is not None
+                                   else get_setting("memory", "compaction_enabled", False))
+        self.compaction_age_days = compaction_age_days
+        self.compaction_interval = compaction_interval
+        self._last_compaction = time.monotonic()
+        self._compacting = threading.Lock()
+        self._unsaved_vectors = 0
+        self._index_lock = threading.Lock()
+        # Memories accepted by add_memory but not yet committed
+        self._pending: Dict[str, Dict[str, Any]] = {}
+        self.store = get_store(db_path)
         self.setup_database()
-    
+        self.writer = BatchWriter(
+            self.store,
+            self._write_memories,
+            after_write=self._memories_written,
+            on_failure=self._memories_dropped,
+            batch_size=write_batch_size,
+            flush_interval=write_flush_interval,
+            name="memory-writer"
+        )
+        self.embedder = get_embedder(embedding_model or get_setting("memory", "embedding_model"))
+        self.index = VectorIndex.load(
+            self._index_path(), self.embedder.dim, self.embedder.name
+        )
+        self._sync_index()
+
     def setup_database(self):
-        with sqlite3.connect(self.db_path) as conn:
+        with self.store.writer() as conn:
             conn.execute("""
                 CREATE TABLE IF NOT EXISTS memories (
                     id TEXT PRIMARY KEY,
@@ -23,25 +108,205 @@ class EnhancedMemoryManager:
                     context TEXT
                 )
             """)
-    
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_memories_timestamp ON memories(timestamp)")
+            # Originals replaced by a compaction digest (digest_id)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS memories_archive (
+                    id TEXT PRIMARY KEY,
+                    content TEXT,
+                    type TEXT,
+                    timestamp DATETIME,
+                    context TEXT,
+                    digest_id TEXT
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_memories_archive_digest ON memories_archive(digest_id)")
+            self._migrate(conn)
+
+    def _migrate(self, conn):
+        """Apply schema migrations tracked in PRAGMA user_version"""
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+
+        if version < 1:
+            # Timestamps used to be local time; they are UTC now, like CURRENT_TIMESTAMP
+            if conn.execute("SELECT 1 FROM memories LIMIT 1").fetchone() or \
+                    conn.execute("SELECT 1 FROM memories_archive LIMIT 1").fetchone():
+                logger.info("Converting memory timestamps from local time to UTC")
+                conn.create_function("local_to_utc", 1, _local_to_utc, deterministic=True)
+                conn.execute("UPDATE memories SET timestamp = local_to_utc(timestamp)")
+                conn.execute("UPDATE memories_archive SET timestamp = local_to_utc(timestamp)")
+            conn.execute("PRAGMA user_version = 1")
+
+    def _index_path(self) -> Optional[str]:
+        """Vector index files live next to the database, e.g. memory.vectors.*"""
+        if self.db_path == ":memory:":
+            return None
+        return str(Path(self.db_path).with_suffix(".vectors"))
+
+    def _sync_index(self, batch_size: int = 1000):
+        """Embed rows written since the index was last saved"""
+        try:
+            with self.store.reader() as conn:
+                while True:
+                    rows = conn.execute(
+                        "SELECT rowid, id, content FROM memories WHERE rowid > ? ORDER BY rowid LIMIT ?",
+                        (self.index.last_rowid, batch_size)
+                    ).fetchall()
+                    if not rows:
+                        break
+                    vectors = self.embedder.embed([row[2] for row in rows])
+                    with self._index_lock:
+                        self.index.add([row[1] for row in rows], vectors)
+                        self.index.last_rowid = rows[-1][0]
+                    self._unsaved_vectors += len(rows)
+            self.save_index()
+        except Exception as e:
+            console.print(f"[red]Error syncing memory index:[/red] {str(e)}")
+
+    def save_index(self):
+        """Persist vectors added since the last save"""
+        with self._index_lock:
+            if self._unsaved_vectors:
+                self.index.save()
+                self._unsaved_vectors = 0
+
+    def flush(self):
+        """Wait until every memory added so far is committed"""
+        self.writer.flush()
+
+    def close(self):
+        """Drain pending writes and persist the vector index"""
+        self.writer.close()
+        self.save_index()
+
+    @metrics.timed("memory.add")
     def add_memory(self, content: str, memory_type: str, context: Dict[str, Any] = None) -> Optional[str]:
+        """Queue a memory for writing and return its id immediately.
+
+        The row is committed by the background writer in a batch; until then
+        it is already visible to retrieval through the tiers and the vector
+        index. Call flush() or close() to wait for durability.
+        """
         try:
-            memory_id = f"mem_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
-            
-            with sqlite3.connect(self.db_path) as conn:
-                conn.execute(
-                    "INSERT INTO memories (id, content, type, timestamp, context) VALUES (?, ?, ?, ?, ?)",
-                    (memory_id, content, memory_type, datetime.now(), json.dumps(context))
-                )
-            
+            memory_id = new_memory_id()
+            memory = {
+                'id': memory_id,
+                'content': content,
+                'type': memory_type,
+                'timestamp': str(_utc_now()),
+                'context': context
+            }
+            self._pending[memory_id] = memory
+            self.tiers.add(memory)
+            try:
+                vectors = self.embedder.embed([content])
+                with self._index_lock:
+                    self.index.add([memory_id], vectors)
+                    self._unsaved_vectors += 1
+
+                self.writer.submit(memory)
+            except Exception:
+                self._memories_dropped([memory])
+                raise
+            if self._unsaved_vectors >= self.index_flush_every:
+                self.save_index()
+            self._maybe_compact()
+
             return memory_id
         except Exception as e:
             console.print(f"[red]Error adding memory:[/red] {str(e)}")
             return None
-    
-    def retrieve_memories(self, query: str, limit: int = 5) -> List[Dict[str, Any]]:
+
+    def _write_memories(self, conn, memories: List[Dict[str, Any]]):
+        conn.executemany(
+            "INSERT INTO memories (id, content, type, timestamp, context) VALUES (?, ?, ?, ?, ?)",
+            [(memory['id'], memory['content'], memory['type'], memory['timestamp'],
+              json.dumps(memory['context'])) for memory in memories]
+        )
+        rowid = conn.execute("SELECT MAX(rowid) FROM memories").fetchone()[0]
+        with self._index_lock:
+            self.index.last_rowid = max(self.index.last_rowid, rowid or 0)
+
+    def _memories_written(self, memories: List[Dict[str, Any]]):
+        for memory in memories:
+            self._pending.pop(memory['id'], None)
+
+    def _memories_dropped(self, memories: List[Dict[str, Any]]):
+        """Forget memories that will never be committed"""
+        memory_ids = [memory['id'] for memory in memories]
+        for memory_id in memory_ids:
+            self._pending.pop(memory_id, None)
+        self.tiers.discard(memory_ids)
+        with self._index_lock:
+            self.index.remove(memory_ids)
+
+    async def add_memory_async(self, content: str, memory_type: str,
+                               context: Dict[str, Any] = None) -> Optional[str]:
+        """add_memory without blocking the event loop"""
+        return await asyncio.to_thread(self.add_memory, content, memory_type, context)
+
+    async def retrieve_memories_async(self, query: str, limit: int = 5,
+                                      mode: str = "vector") -> List[Dict[str, Any]]:
+        """retrieve_memories without blocking the event loop"""
+        return await asyncio.to_thread(self.retrieve_memories, query, limit, mode)
+
+    @metrics.timed("memory.retrieve")
+    def retrieve_memories(self, query: str, limit: int = 5, mode: str = "vector") -> List[Dict[str, Any]]:
+        """Retrieve memories by embedding similarity ("vector") or substring match ("keyword")"""
+        if mode == "vector" and len(self.index):
+            memories = self._retrieve_by_vector(query, limit)
+            if memories:
+                return memories
+        return self._retrieve_by_keyword(query, limit)
+
+    def _retrieve_by_vector(self, query: str, limit: int) -> List[Dict[str, Any]]:
+        try:
+            vector = self.embedder.embed([query])[0]
+            with self._index_lock:
+                hits = self.index.search(vector, limit)
+            if not hits:
+                return []
+
+            # Serve hot memories from the in-process tiers, only misses touch disk
+            memories = []
+            missing = []
+            for memory_id, score in hits:
+                memory = self.tiers.get(memory_id) or self._pending.get(memory_id)
+                if memory is not None:
+                    memories.append({**memory, 'score': score})
+                else:
+                    missing.append(memory_id)
+            metrics.inc("memory_tier_cache_requests_total", len(memories), result="hit")
+            metrics.inc("memory_tier_cache_requests_total", len(missing), result="miss")
+
+            if missing:
+                scores = dict(hits)
+                with self.store.reader() as conn:
+                    cursor = conn.execute(
+                        f"""
+                        SELECT id, content, type, timestamp, context
+                        FROM memories
+                        WHERE id IN ({','.join('?' * len(missing))})
+                        """,
+                        missing
+                    )
+                    for row in cursor.fetchall():
+                        memory = self._row_to_memory(row)
+                        self.tiers.cache(memory)
+                        memories.append({**memory, 'score': scores[memory['id']]})
+
+            memories.sort(key=lambda memory: memory['score'], reverse=True)
+            return memories
+        except Exception as e:
+            console.print(f"[red]Error retrieving memories:[/red] {str(e)}")
+            return []
+
+    def _retrieve_by_keyword(self, query: str, limit: int) -> List[Dict[str, Any]]:
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            # Queued memories are only searchable by SQL once committed
+            if self._pending:
+                self.writer.flush()
+            with self.store.reader() as conn:
                 cursor = conn.execute(
                     """
                     SELECT id, content, type, timestamp, context
@@ -52,18 +317,148 @@ class EnhancedMemoryManager:
                     """,
                     (f"%{query}%", limit)
                 )
-                
-                memories = []
-                for row in cursor.fetchall():
-                    memories.append({
-                        'id': row[0],
-                        'content': row[1],
-                        'type': row[2],
-                        'timestamp': row[3],
-                        'context': json.loads(row[4]) if row[4] else None
-                    })
-                
-                return memories
+
+                return [self._row_to_memory(row) for row in cursor.fetchall()]
         except Exception as e:
             console.print(f"[red]Error retrieving memories:[/red] {str(e)}")
-            return []
\ No newline at end of file
+            return []
+
+    def get_recent_memories(self, limit: int = 5) -> List[Dict[str, Any]]:
+        """Most recently used memories, served from the working set without touching disk"""
+        return self.tiers.recent(limit)
+
+    def _maybe_compact(self):
+        """Start a background compaction once per compaction_interval, if enabled"""
+        if not self.compaction_enabled:
+            return
+        if time.monotonic() - self._last_compaction < self.compaction_interval:
+            return
+        self._last_compaction = time.monotonic()
+        threading.Thread(target=self.compact_long_term, daemon=True).start()
+
+    def compact_long_term(self, max_age_days: Optional[int] = None, batch_size: int = 500) -> int:
+        """Replace old long-term memories of the same type and day with one digest each.
+
+        A digest holds an excerpt (the first compression_ratio) of each
+        original and lists their ids in context["digest_of"]. The originals
+        are moved to memories_archive, not deleted, so get_memory still
+        resolves them. Returns the number of memories archived.
+        """
+        if not self._compacting.acquire(blocking=False):
+            return 0
+        try:
+            cutoff = _utc_now() - timedelta(days=max_age_days or self.compaction_age_days)
+            archived = 0
+            batch = []
+            digests = []
+            with self.store.reader() as conn:
+                rows = conn.execute(
+                    """
+                    SELECT id, content, type, timestamp, context
+                    FROM memories
+                    WHERE timestamp < ? AND id NOT LIKE 'cmp_%'
+                    ORDER BY type, timestamp
+                    """,
+                    (cutoff,)
+                )
+                groups = groupby(
+                    (self._row_to_memory(row) for row in rows),
+                    key=lambda memory: (memory['type'], str(memory['timestamp'])[:10])
+                )
+                for (memory_type, day), group in groups:
+                    # Memories still cached in a tier are in active use
+                    group = [memory for memory in group if memory['id'] not in self.tiers]
+                    if len(group) < 2:
+                        continue
+                    batch.append(self._digest_group(memory_type, day, group))
+                    archived += len(group)
+                    if sum(len(ids) for _, ids in batch) >= batch_size:
+                        self._write_digests(batch)
+                        digests.extend(batch)
+                        batch = []
+            if batch:
+                self._write_digests(batch)
+                digests.extend(batch)
+
+            if digests:
+                self._index_digests(digests)
+                console.print(f"[blue]Compacted {archived} long-term memories into {len(digests)} digests[/blue]")
+            return archived
+        except Exception as e:
+            console.print(f"[red]Error compacting memories:[/red] {str(e)}")
+            return 0
+        finally:
+            self._compacting.release()
+
+    def _digest_group(self, memory_type: str, day: str, group: List[Dict[str, Any]]):
+        ids = [memory['id'] for memory in group]
+        content = "\n".join(
+            (memory['content'] or "")[:math.ceil(len(memory['content'] or "") * self.compression_ratio)]
+            for memory in group
+        )
+        digest = hashlib.sha1("".join(ids).encode()).hexdigest()[:8]
+        compacted = {
+            'id': f"cmp_{day.replace('-', '')}_{digest}",
+            'content': content,
+            'type': memory_type,
+            'timestamp': group[-1]['timestamp'],
+            'context': {"digest_of": ids}
+        }
+        return compacted, ids
+
+    def _write_digests(self, batch):
+        """Insert each digest and move its originals to memories_archive in one transaction"""
+        with self.store.writer() as conn:
+            for compacted, ids in batch:
+                conn.execute(
+                    "INSERT OR REPLACE INTO memories (id, content, type, timestamp, context) VALUES (?, ?, ?, ?, ?)",
+                    (compacted['id'], compacted['content'], compacted['type'],
+                     compacted['timestamp'], json.dumps(compacted['context']))
+                )
+                placeholders = ','.join('?' * len(ids))
+                conn.execute(
+                    f"""
+                    INSERT OR REPLACE INTO memories_archive (id, content, type, timestamp, context, digest_id)
+                    SELECT id, content, type, timestamp, context, ? FROM memories WHERE id IN ({placeholders})
+                    """,
+                    [compacted['id'], *ids]
+                )
+                conn.execute(f"DELETE FROM memories WHERE id IN ({placeholders})", ids)
+        self.tiers.discard([memory_id for _, ids in batch for memory_id in ids])
+
+    def _index_digests(self, digests):
+        """Swap archived vectors for digest vectors, then save the index once"""
+        vectors = self.embedder.embed([compacted['content'] for compacted, _ in digests])
+        with self.store.reader() as conn:
+            rowid = conn.execute("SELECT MAX(rowid) FROM memories").fetchone()[0]
+        with self._index_lock:
+            self.index.remove([memory_id for _, ids in digests for memory_id in ids])
+            self.index.add([compacted['id'] for compacted, _ in digests], vectors)
+            self.index.last_rowid = max(self.index.last_rowid, rowid or 0)
+            self._unsaved_vectors += len(digests)
+        self.save_index()
+
+    def get_memory(self, memory_id: str) -> Optional[Dict[str, Any]]:
+        """Look up one memory by id, including originals archived by compaction"""
+        memory = self.tiers.get(memory_id) or self._pending.get(memory_id)
+        if memory is not None:
+            return memory
+        with self.store.reader() as conn:
+            for table in ("memories", "memories_archive"):
+                row = conn.execute(
+                    f"SELECT id, content, type, timestamp, context FROM {table} WHERE id = ?",
+                    (memory_id,)
+                ).fetchone()
+                if row:
+                    return self._row_to_memory(row)
+        return None
+
+    @staticmethod
+    def _row_to_memory(row) -> Dict[str, Any]:
+        return {
+            'id': row[0],
+            'content': row[1],
+            'type': row[2],
+            'timestamp': row[3],
+            'context': json.loads(row[4]) if row[4] else None
+        }
@@ -0,0 +1,287 @@
+# utils/metrics.py
+from bisect import bisect_left
+from collections import deque
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+import functools
+import inspect
+import json
+import math
+import threading
+import time
+from utils.config import get_setting
+
+# Seconds, from sub-millisecond lookups up to long generations
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+                   1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+RATE_BUCKETS = (1, 2, 5, 10, 20, 35, 50, 75, 100, 150, 250, 500)
+TOKEN_BUCKETS = (64, 128, 256, 512, 1024, 2048, 4096, 8192, 16384)
+SIZE_BUCKETS = (100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+# Children kept per span, so long-running parents stay bounded
+MAX_CHILDREN = 256
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus style"""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def quantile(self, q: float) -> float:
+        """Estimate a quantile by interpolating within its bucket"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            if seen + count >= rank and count:
+                lower = self.buckets[index - 1] if index else 0.0
+                upper = self.buckets[index] if index < len(self.buckets) else self.max
+                return lower + (upper - lower) * (rank - seen) / count
+            seen += count
+        return self.max
+
+    def summary(self) -> Dict[str, float]:
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "mean": self.sum / self.count if self.count else 0.0,
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+            "p99": self.quantile(0.99),
+            "max": self.max
+        }
+
+
+class Span:
+    """A timed stage; nested spans become children of the enclosing one"""
+
+    __slots__ = ("metrics", "name", "labels", "start", "duration", "status", "children", "_token")
+
+    def __init__(self, metrics: 'Metrics', name: str, labels: Dict[str, str]):
+        self.metrics = metrics
+        self.name = name
+        self.labels = labels
+        self.children: List['Span'] = []
+        self.duration = 0.0
+        self.status = "ok"
+
+    def __enter__(self):
+        parent = _current_span.get()
+        if parent is not None and len(parent.children) < MAX_CHILDREN:
+            parent.children.append(self)
+        self._token = _current_span.set(self)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.duration = time.perf_counter() - self.start
+        _current_span.reset(self._token)
+        if exc_type is not None:
+            self.status = "error"
+        self.metrics._finish(self)
+        return False
+
+    async def __aenter__(self):
+        return self.__enter__()
+
+    async def __aexit__(self, exc_type, exc, tb):
+        return self.__exit__(exc_type, exc, tb)
+
+    def set_status(self, status: str):
+        self.status = status
+
+    def to_dict(self) -> Dict[str, Any]:
+        trace = {"name": self.name, "duration": self.duration, "status": self.status}
+        if self.labels:
+            trace["labels"] = self.labels
+        if self.children:
+            trace["children"] = [child.to_dict() for child in self.children]
+        return trace
+
+
+class _NoopSpan:
+    """Shared stand-in returned by span() while metrics are disabled"""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        return False
+
+    def set_status(self, status: str):
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+_current_span: ContextVar[Optional[Span]] = ContextVar("dexter_current_span", default=None)
+
+
+class Metrics:
+    """Process-wide counters, histograms and traces.
+
+    span() times a pipeline stage into the ``dexter_span_seconds`` histogram
+    (labelled by span name) and nests inside any enclosing span, so each
+    top-level span leaves a trace of where its time went. When disabled,
+    span() returns a shared no-op object and recording calls return
+    immediately, so instrumentation can stay in place at negligible cost.
+    """
+
+    def __init__(self, enabled: bool = True, max_traces: int = 100):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._counters: Dict[str, Dict[LabelKey, float]] = {}
+        self._histograms: Dict[str, Dict[LabelKey, Histogram]] = {}
+        self._buckets: Dict[str, tuple] = {}
+        self.traces = deque(maxlen=max_traces)
+
+    def register_histogram(self, name: str, buckets):
+        self._buckets[name] = tuple(buckets)
+
+    def span(self, name: str, **labels):
+        if not self.enabled:
+            return NOOP_SPAN
+        return Span(self, name, labels)
+
+    def timed(self, name: str):
+        """Decorator wrapping a sync or async function in a span"""
+        def decorator(func):
+            if inspect.iscoroutinefunction(func):
+                @functools.wraps(func)
+                async def async_wrapper(*args, **kwargs):
+                    with self.span(name):
+                        return await func(*args, **kwargs)
+                return async_wrapper
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.span(name):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def inc(self, name: str, amount: float = 1, **labels):
+        if not self.enabled:
+            return
+        key = _label_key(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + amount
+
+    def observe(self, name: str, value: float, **labels):
+        if not self.enabled:
+            return
+        key = _label_key(labels)
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = series[key] = Histogram(self._buckets.get(name, LATENCY_BUCKETS))
+            histogram.observe(value)
+
+    def _finish(self, span: Span):
+        self.observe("dexter_span_seconds", span.duration, span=span.name)
+        if span.status != "ok":
+            self.inc("dexter_span_errors_total", span=span.name, status=span.status)
+        if _current_span.get() is None:
+            self.traces.append(span.to_dict())
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+            self.traces.clear()
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Counters, histogram summaries, cache hit rates and recent traces"""
+        with self._lock:
+            counters = {
+                name: [{"labels": dict(key), "value": value} for key, value in series.items()]
+                for name, series in self._counters.items()
+            }
+            histograms = {
+                name: [{"labels": dict(key), **histogram.summary()} for key, histogram in series.items()]
+                for name, series in self._histograms.items()
+            }
+            hit_rates = {}
+            for name, series in self._counters.items():
+                if not name.endswith("_cache_requests_total"):
+                    continue
+                total = sum(series.values())
+                hits = sum(value for key, value in series.items() if dict(key).get("result") != "miss")
+                hit_rates[name[:-len("_requests_total")]] = hits / total if total else 0.0
+        return {
+            "timestamp": time.time(),
+            "counters": counters,
+            "histograms": histograms,
+            "cache_hit_rates": hit_rates,
+            "traces": list(self.traces)
+        }
+
+    def to_prometheus(self) -> str:
+        """Render counters and histograms in the Prometheus text exposition format"""
+        lines = []
+        with self._lock:
+            for name, series in sorted(self._counters.items()):
+                lines.append(f"# TYPE {name} counter")
+                for key, value in series.items():
+                    lines.append(f"{name}{_format_labels(key)} {_format_value(value)}")
+            for name, series in sorted(self._histograms.items()):
+                lines.append(f"# TYPE {name} histogram")
+                for key, histogram in series.items():
+                    cumulative = 0
+                    for bound, count in zip(histogram.buckets + (math.inf,), histogram.counts):
+                        cumulative += count
+                        le = "+Inf" if bound == math.inf else _format_value(bound)
+                        lines.append(f"{name}_bucket{_format_labels(key + (('le', le),))} {cumulative}")
+                    lines.append(f"{name}_sum{_format_labels(key)} {_format_value(histogram.sum)}")
+                    lines.append(f"{name}_count{_format_labels(key)} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+    def write(self, path: str):
+        """Export to a file: Prometheus text for .prom/.txt, JSON otherwise"""
+        target = Path(path)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        if target.suffix in (".prom", ".txt"):
+            target.write_text(self.to_prometheus())
+        else:
+            target.write_text(json.dumps(self.snapshot(), indent=2, default=str))
+
+
+def _label_key(labels: Dict[str, Any]) -> LabelKey:
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+def _format_labels(key: LabelKey) -> str:
+    if not key:
+        return ""
+    escaped = (value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, value in key)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(key, escaped)) + "}"
+
+def _format_value(value: float) -> str:
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+metrics = Metrics(enabled=get_setting("metrics", "enabled", True))
+metrics.register_histogram("llm_tokens_per_second", RATE_BUCKETS)
+metrics.register_histogram("prompt_tokens_estimated", TOKEN_BUCKETS)
+metrics.register_histogram("toolkit_page_bytes", SIZE_BUCKETS)
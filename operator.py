@@ -1,29 +1,111 @@
 # database/operator.py
+import asyncio
+import hashlib
+import itertools
+import re
 import sqlite3
 from datetime import datetime
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Iterable, Iterator, Set, Tuple
 import json
 from utils.logger import logger
+from database.storage import get_store
+from database.telemetry import TelemetryStore, get_telemetry
+from utils.config import get_setting
+from utils.metrics import metrics
 from rich.console import Console
 
 console = Console()
 
+# (content table, FTS5 table, indexed columns)
+FTS_TABLES = [
+    ("documents", "documents_fts", ("name", "content")),
+    ("knowledge_entries", "knowledge_fts", ("topic", "content")),
+]
+
+def _split_point(text: str, max_size: int, start: int = 0) -> int:
+    """Index to cut text[start:] at, preferring paragraph, line, sentence and word breaks"""
+    for separator in ("\n\n", "\n", ". ", " "):
+        index = text.rfind(separator, start, start + max_size)
+        if index > start + max_size // 2:
+            return index + len(separator)
+    return start + max_size
+
+def iter_chunks(blocks: Iterable[str], max_size: int) -> Iterator[str]:
+    """Split a stream of text blocks into chunks of at most max_size characters.
+
+    Chunks are cut from an offset into the buffer, and the consumed prefix
+    is dropped once per block, so a large block is split in linear time.
+    """
+    buffer = ""
+    for block in blocks:
+        buffer += block
+        start = 0
+        while len(buffer) - start > max_size:
+            cut = _split_point(buffer, max_size, start)
+            chunk = buffer[start:cut].strip()
+            start = cut
+            if chunk:
+                yield chunk
+        buffer = buffer[start:]
+    if buffer.strip():
+        yield buffer.strip()
+
+def content_hash(text: str) -> str:
+    """Hash of whitespace-normalized text, used to skip documents already stored"""
+    return hashlib.blake2b(" ".join(text.split()).encode(), digest_size=16).hexdigest()
+
+def _name_chunks(name: str, chunks: Iterator[str]) -> Iterator[Tuple[str, str]]:
+    """Pair chunks with names, numbering them only when there is more than one"""
+    first = next(chunks, None)
+    if first is None:
+        return
+    second = next(chunks, None)
+    if second is None:
+        yield name, first
+        return
+    for number, chunk in enumerate(itertools.chain([first, second], chunks), 1):
+        yield f"{name}#{number}", chunk
+
+def _fts_query(query: str) -> str:
+    """Turn free text into an FTS5 query matching any of its terms"""
+    terms = re.findall(r"\w+", query.lower())
+    return " OR ".join(f'"{term}"' for term in dict.fromkeys(terms))
+
 class KnowledgeBase:
     def __init__(self, db_path: str = "knowledge/dexter.db"):
         self.db_path = db_path
+        self.fts_enabled = True
+        self.store = get_store(db_path)
         self.setup_database()
+        get_telemetry(self.store)
+    
+    @property
+    def telemetry(self) -> TelemetryStore:
+        """Interaction and task-result log, shared by every KnowledgeBase on this database"""
+        return get_telemetry(self.store)
+    
+    def flush(self):
+        """Wait until every logged interaction and task result is committed"""
+        self.telemetry.flush()
+    
+    def close(self):
+        """Commit queued telemetry and stop its writer thread"""
+        telemetry = get_telemetry(self.store, create=False)
+        if telemetry:
+            telemetry.close()
     
     def setup_database(self):
         """Initialize database with tables"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self.store.writer() as conn:
                 conn.execute("""
                     CREATE TABLE IF NOT EXISTS documents (
                         id INTEGER PRIMARY KEY,
                         name TEXT,
                         content TEXT,
                         doc_type TEXT,
-                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                        content_hash TEXT
                     )
                 """)
                 
@@ -54,14 +136,141 @@ class KnowledgeBase:
                         PRIMARY KEY(document_id, tag_id)
                     )
                 """)
+
+                self._migrate(conn)
         except Exception as e:
             console.print(f"[red]Error setting up database:[/red] {str(e)}")
+
+    def _migrate(self, conn: sqlite3.Connection):
+        """Apply schema migrations tracked in PRAGMA user_version"""
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+
+        if version < 1:
+            try:
+                self._create_fts_tables(conn)
+            except sqlite3.OperationalError as e:
+                # SQLite built without FTS5, keep using LIKE scans
+                logger.warning(f"FTS5 unavailable, falling back to LIKE search: {str(e)}")
+                self.fts_enabled = False
+            else:
+                logger.info("Backfilling full-text index for existing knowledge")
+                conn.execute("INSERT INTO documents_fts(documents_fts) VALUES ('rebuild')")
+                conn.execute("INSERT INTO knowledge_fts(knowledge_fts) VALUES ('rebuild')")
+                conn.execute("PRAGMA user_version = 1")
+
+        self._add_content_hashes(conn)
+
+    def _add_content_hashes(self, conn: sqlite3.Connection):
+        """Add and backfill documents.content_hash on databases created without it"""
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(documents)")}
+        if "content_hash" not in columns:
+            logger.info("Backfilling content hashes for existing documents")
+            conn.execute("ALTER TABLE documents ADD COLUMN content_hash TEXT")
+            # Older update triggers fire on any column; recreate them so the
+            # backfill does not rewrite the full-text index
+            conn.execute("DROP TRIGGER IF EXISTS documents_fts_update")
+            conn.create_function("content_hash", 1, content_hash, deterministic=True)
+            conn.execute("UPDATE documents SET content_hash = content_hash(content) WHERE content IS NOT NULL")
+            if self.fts_enabled:
+                self._create_fts_tables(conn)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_documents_content_hash ON documents(content_hash)")
+
+    def _create_fts_tables(self, conn: sqlite3.Connection):
+        """Create external-content FTS5 tables kept in sync by triggers"""
+        for table, fts_table, columns in FTS_TABLES:
+            column_list = ", ".join(columns)
+            new_values = ", ".join(f"new.{column}" for column in columns)
+            old_values = ", ".join(f"old.{column}" for column in columns)
+
+            conn.execute(f"""
+                CREATE VIRTUAL TABLE IF NOT EXISTS {fts_table} USING fts5(
+                    {column_list},
+                    content='{table}',
+                    content_rowid='id',
+                    tokenize='porter unicode61'
+                )
+            """)
+            conn.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS {table}_fts_insert AFTER INSERT ON {table} BEGIN
+                    INSERT INTO {fts_table}(rowid, {column_list}) VALUES (new.id, {new_values});
+                END
+            """)
+            conn.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS {table}_fts_delete AFTER DELETE ON {table} BEGIN
+                    INSERT INTO {fts_table}({fts_table}, rowid, {column_list})
+                    VALUES ('delete', old.id, {old_values});
+                END
+            """)
+            conn.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS {table}_fts_update AFTER UPDATE OF {column_list} ON {table} BEGIN
+                    INSERT INTO {fts_table}({fts_table}, rowid, {column_list})
+                    VALUES ('delete', old.id, {old_values});
+                    INSERT INTO {fts_table}(rowid, {column_list}) VALUES (new.id, {new_values});
+                END
+            """)
     
     async def get_relevant_knowledge(self, query: str, limit: int = 5) -> List[Dict[str, Any]]:
-        """Retrieve relevant knowledge based on query"""
+        """Retrieve relevant knowledge without blocking the event loop"""
+        return await asyncio.to_thread(self.search_knowledge, query, limit)
+
+    @metrics.timed("knowledge.search")
+    def search_knowledge(self, query: str, limit: int = 5) -> List[Dict[str, Any]]:
+        """Retrieve knowledge ranked by BM25 relevance to the query"""
+        if not self.fts_enabled:
+            return self._search_like(query, limit)
+
+        match = _fts_query(query)
+        if not match:
+            return []
+
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                # First try to find exact matches
+            with self.store.reader() as conn:
+                # rank is bm25(), where lower means more relevant
+                cursor = conn.execute("""
+                    SELECT * FROM (
+                        SELECT d.id, d.content, d.doc_type, d.created_at, documents_fts.rank,
+                               snippet(documents_fts, 1, '[', ']', '...', 16)
+                        FROM documents_fts
+                        JOIN documents d ON d.id = documents_fts.rowid
+                        WHERE documents_fts MATCH ?
+                        ORDER BY documents_fts.rank
+                        LIMIT ?
+                    )
+                    UNION ALL
+                    SELECT * FROM (
+                        SELECT k.id, k.content, 'knowledge', k.created_at, knowledge_fts.rank,
+                               snippet(knowledge_fts, 1, '[', ']', '...', 16)
+                        FROM knowledge_fts
+                        JOIN knowledge_entries k ON k.id = knowledge_fts.rowid
+                        WHERE knowledge_fts MATCH ?
+                        ORDER BY knowledge_fts.rank
+                        LIMIT ?
+                    )
+                    ORDER BY 5
+                    LIMIT ?
+                """, (match, limit, match, limit, limit))
+
+                results = []
+                for row in cursor.fetchall():
+                    results.append({
+                        'id': row[0],
+                        'content': row[1],
+                        'type': row[2],
+                        'timestamp': row[3],
+                        'score': -row[4],
+                        'snippet': row[5]
+                    })
+
+                return results
+
+        except Exception as e:
+            console.print(f"[red]Error retrieving knowledge:[/red] {str(e)}")
+            return []
+
+    def _search_like(self, query: str, limit: int) -> List[Dict[str, Any]]:
+        """Substring search used when FTS5 is not available"""
+        try:
+            with self.store.reader() as conn:
                 cursor = conn.execute("""
                     SELECT id, content, doc_type, created_at
                     FROM documents
@@ -73,7 +282,7 @@ class KnowledgeBase:
                     ORDER BY created_at DESC
                     LIMIT ?
                 """, (f"%{query}%", f"%{query}%", limit))
-                
+
                 results = []
                 for row in cursor.fetchall():
                     results.append({
@@ -82,51 +291,30 @@ class KnowledgeBase:
                         'type': row[2],
                         'timestamp': row[3]
                     })
-                
+
                 return results
-                
+
         except Exception as e:
             console.print(f"[red]Error retrieving knowledge:[/red] {str(e)}")
             return []
-    
+
     def add_document(self, name: str, content: str, doc_type: str, 
                     tags: List[str] = None) -> Optional[int]:
         """Add a document to the knowledge base"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self.store.writer() as conn:
                 cursor = conn.execute(
                     """
-                    INSERT INTO documents (name, content, doc_type)
-                    VALUES (?, ?, ?)
+                    INSERT INTO documents (name, content, doc_type, content_hash)
+                    VALUES (?, ?, ?, ?)
                     """,
-                    (name, content, doc_type)
+                    (name, content, doc_type, content_hash(content))
                 )
                 doc_id = cursor.lastrowid
                 
                 # Add tags if provided
                 if tags:
-                    for tag in tags:
-                        # Insert tag if it doesn't exist
-                        conn.execute(
-                            "INSERT OR IGNORE INTO tags (name) VALUES (?)",
-                            (tag,)
-                        )
-                        
-                        # Get tag id
-                        cursor = conn.execute(
-                            "SELECT id FROM tags WHERE name = ?",
-                            (tag,)
-                        )
-                        tag_id = cursor.fetchone()[0]
-                        
-                        # Link document to tag
-                        conn.execute(
-                            """
-                            INSERT INTO document_tags (document_id, tag_id)
-                            VALUES (?, ?)
-                            """,
-                            (doc_id, tag_id)
-                        )
+                    self._link_tags(conn, [(doc_id, tags)])
                 
                 return doc_id
                 
@@ -134,11 +322,122 @@ class KnowledgeBase:
             console.print(f"[red]Error adding document:[/red] {str(e)}")
             return None
     
+    @metrics.timed("knowledge.add_documents")
+    def add_documents(self, documents: Iterable[Dict[str, Any]],
+                      batch_size: int = 500,
+                      max_chunk_size: Optional[int] = None) -> int:
+        """Add many documents, committing batch_size rows per transaction.
+
+        Each document is a dict with ``name``, ``content``, ``doc_type`` and
+        optional ``tags``. ``content`` may be a string or an iterable of text
+        blocks; it is split into chunks of at most max_chunk_size characters
+        (knowledge_base.max_chunk_size in config.yaml), stored as separate
+        rows named ``name#1``, ``name#2``, ... when there is more than one.
+        Documents are consumed lazily, so memory use is bounded by one batch.
+        Returns the number of rows inserted. Errors propagate to the caller;
+        batches committed before the error stay committed.
+        """
+        max_chunk_size = max_chunk_size or get_setting("knowledge_base", "max_chunk_size", 1000)
+        batch = []
+        inserted = 0
+
+        for document in documents:
+            content = document["content"]
+            blocks = [content] if isinstance(content, str) else content
+            tags = document.get("tags") or []
+            for name, chunk in _name_chunks(document["name"], iter_chunks(blocks, max_chunk_size)):
+                batch.append((name, chunk, document.get("doc_type"), tags))
+                if len(batch) >= batch_size:
+                    inserted += self._write_documents(batch)
+                    batch = []
+
+        if batch:
+            inserted += self._write_documents(batch)
+        return inserted
+
+    def _write_documents(self, rows: List[Tuple[str, str, str, List[str]]]) -> int:
+        """Insert one batch of (name, content, doc_type, tags) rows in a single transaction"""
+        with self.store.writer() as conn:
+            tagged = []
+            for name, content, doc_type, tags in rows:
+                cursor = conn.execute(
+                    "INSERT INTO documents (name, content, doc_type, content_hash) VALUES (?, ?, ?, ?)",
+                    (name, content, doc_type, content_hash(content))
+                )
+                if tags:
+                    tagged.append((cursor.lastrowid, tags))
+            self._link_tags(conn, tagged)
+        return len(rows)
+
+    def stored_hashes(self, digests: List[str]) -> Set[str]:
+        """The subset of these content_hash values already stored"""
+        found = set()
+        with self.store.reader() as conn:
+            # Stay below SQLite's bound parameter limit
+            for start in range(0, len(digests), 500):
+                part = digests[start:start + 500]
+                cursor = conn.execute(
+                    f"SELECT content_hash FROM documents WHERE content_hash IN ({','.join('?' * len(part))})",
+                    part
+                )
+                found.update(row[0] for row in cursor)
+        return found
+
+    def _link_tags(self, conn: sqlite3.Connection, doc_tags: List[Tuple[int, List[str]]]):
+        """Create missing tags and link them to documents, resolving all tag ids at once"""
+        names = list({tag for _, tags in doc_tags for tag in tags})
+        if not names:
+            return
+        conn.executemany("INSERT OR IGNORE INTO tags (name) VALUES (?)", [(name,) for name in names])
+
+        tag_ids = {}
+        # Stay below SQLite's bound parameter limit
+        for start in range(0, len(names), 500):
+            part = names[start:start + 500]
+            cursor = conn.execute(
+                f"SELECT name, id FROM tags WHERE name IN ({','.join('?' * len(part))})",
+                part
+            )
+            tag_ids.update(cursor.fetchall())
+
+        conn.executemany(
+            "INSERT OR IGNORE INTO document_tags (document_id, tag_id) VALUES (?, ?)",
+            [(doc_id, tag_ids[tag]) for doc_id, tags in doc_tags for tag in set(tags)]
+        )
+    
+    def log_interaction(self, interaction_type: str, content: Any = None,
+                        status: str = "success", error: Optional[str] = None,
+                        duration: Optional[float] = None):
+        """Record an interaction in the background; never blocks or raises"""
+        self.telemetry.log_interaction(interaction_type, content, status, error, duration)
+    
+    def log_task_result(self, task_id: str, agent_name: Optional[str], status: str,
+                        content: Any = None, error: Optional[str] = None,
+                        duration: Optional[float] = None, task_type: Optional[str] = None):
+        """Record a task result in the background; never blocks or raises"""
+        self.telemetry.log_task_result(task_id, agent_name, status, content, error, duration, task_type)
+    
+    @metrics.timed("knowledge.add_entries")
+    def add_knowledge_entries(self, entries: Iterable[Dict[str, Any]]) -> int:
+        """Insert knowledge entries (topic, content, source, relevance) in one transaction"""
+        rows = [
+            (entry["topic"], entry["content"], entry.get("source"), entry.get("relevance", 1.0))
+            for entry in entries
+        ]
+        if not rows:
+            return 0
+        with self.store.writer() as conn:
+            conn.executemany(
+                "INSERT INTO knowledge_entries (topic, content, source, relevance) VALUES (?, ?, ?, ?)",
+                rows
+            )
+        return len(rows)
+    
     def add_knowledge(self, topic: str, content: str, 
                      source: str = None, relevance: float = 1.0) -> Optional[int]:
         """Add a knowledge entry"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self.store.writer() as conn:
                 cursor = conn.execute(
                     """
                     INSERT INTO knowledge_entries 
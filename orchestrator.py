@@ -1,40 +1,98 @@
 # agents/orchestrator.py
 import asyncio
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, List
 from datetime import datetime
 import json
+import re
+import time
+import uuid
 import ollama
 from rich.console import Console
 from utils.logger import logger
 
 from agents.base import Task, BaseAgent
+from agents.llm_client import TokenCallback
+from agents.pool import AgentPool, ModelLimiter, PoolMember
+from agents.scheduler import TaskScheduler
 from memory.manager import EnhancedMemoryManager
 from database.operator import KnowledgeBase
 from toolbox.tools import ToolKit
+from utils.metrics import metrics
 
 console = Console()
 
+# Numbered ("1." / "2)") or bulleted ("-" / "*") lines of a multi-part objective
+STEP_PATTERN = re.compile(r"^\s*(?:\d+[.)]|[-*\u2022])\s+(.+)$")
+STEP_REFERENCE = re.compile(r"\bsteps?\s+(\d+)", re.IGNORECASE)
+SEQUENTIAL_PREFIXES = ("then", "after that", "using", "based on", "finally")
+
+# Capability an agent must list to be routed tasks of each type
+TASK_CAPABILITIES = {
+    "code_generation": "code_generation",
+    "research": "research",
+    "analysis": "task_analysis"
+}
+# Pool used when no agent has a task type's capability
+DEFAULT_CAPABILITY = "task_analysis"
+
 class DexterOrchestrator:
     def __init__(self, 
                  memory_manager: EnhancedMemoryManager,
                  knowledge_base: KnowledgeBase,
-                 toolkit: ToolKit):
+                 toolkit: ToolKit,
+                 max_concurrency: int = 4,
+                 model_limits: Optional[Dict[str, int]] = None):
         self.memory_manager = memory_manager
         self.knowledge_base = knowledge_base
         self.toolkit = toolkit
         self.agents = {}
+        self.pools: Dict[str, AgentPool] = {}
+        self._pool_members: Dict[int, PoolMember] = {}
+        self.model_limiter = ModelLimiter(model_limits)
         self.task_history = []
+        self.scheduler = TaskScheduler(max_concurrency=max_concurrency)
     
     def register_agent(self, agent: BaseAgent):
-        """Register an agent with the orchestrator"""
+        """Register an agent, adding it to the pool of each of its capabilities.
+
+        Registering several instances of an agent grows its pools; tasks go
+        to whichever instance has the fewest outstanding tasks.
+        """
         self.agents[agent.name] = agent
+        if id(agent) in self._pool_members:
+            return
+        member = self._pool_members[id(agent)] = PoolMember(agent)
+        for capability in agent.capabilities:
+            if capability not in self.pools:
+                self.pools[capability] = AgentPool(capability, self.model_limiter)
+            self.pools[capability].add(member)
+    
+    def pool_metrics(self) -> Dict[str, Any]:
+        """Queue depth and load of every agent pool, plus callers waiting per model"""
+        return {
+            "pools": {capability: pool.metrics() for capability, pool in self.pools.items()},
+            "models_waiting": dict(self.model_limiter.waiting)
+        }
     
-    async def process_objective(self, objective: str, agent: Optional[BaseAgent] = None) -> Dict[str, Any]:
+    @metrics.timed("orchestrator.objective")
+    async def process_objective(self, objective: str,
+                                agent: Optional[BaseAgent] = None,
+                                subtasks: Optional[List[Task]] = None,
+                                on_token: Optional[TokenCallback] = None) -> Dict[str, Any]:
+        """Process an objective, running it as a subtask graph when it has several parts.
+
+        subtasks may be given explicitly (linked through depends_on); otherwise
+        they are planned from numbered or bulleted steps in the objective.
+        on_token receives the tokens of the answer as they are generated; for
+        a subtask graph only the final subtask's tokens are streamed.
+        """
+        start = time.perf_counter()
         try:
             logger.info(f"Processing objective: {objective}")
             
             task = Task(
-                id=f"task_{datetime.now().strftime('%Y%m%d_%H%M%S')}",
+                # Unique across objectives started in the same second
+                id=f"task_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}",
                 content=objective,
                 type=self._determine_task_type(objective),
                 priority=1,
@@ -48,16 +106,23 @@ class DexterOrchestrator:
             )
             
             # Process task
-            if agent:
-                result = await self._process_with_agent(task, agent)
+            for subtask in subtasks or self._plan_subtasks(task):
+                task.add_subtask(subtask)
+            
+            if task.subtasks:
+                result = await self._process_task_graph(task, agent, on_token)
+            elif agent:
+                result = await self._process_with_limit(task, agent, on_token)
             else:
-                result = await self._route_and_process_task(task)
+                result = await self._route_and_process_task(task, on_token)
             
             # Log completion
             self.knowledge_base.log_interaction(
                 interaction_type="objective_complete",
-                content=str(result.result),
-                status=result.status
+                content=result.result,
+                status=result.status,
+                error=result.error_message,
+                duration=time.perf_counter() - start
             )
             
             return {
@@ -76,7 +141,8 @@ class DexterOrchestrator:
                 interaction_type="objective_error",
                 content=objective,
                 status="error",
-                error=str(e)
+                error=str(e),
+                duration=time.perf_counter() - start
             )
             
             return {
@@ -85,33 +151,56 @@ class DexterOrchestrator:
                 "task_id": task.id if 'task' in locals() else None
             }
     
-    async def _process_with_agent(self, task: Task, agent: BaseAgent) -> Task:
-        """Process task with specific agent"""
+    async def _process_with_agent(self, task: Task, agent: BaseAgent,
+                                  on_token: Optional[TokenCallback] = None) -> Task:
+        """Process task with specific agent, recording the outcome in the telemetry store"""
+        start = time.perf_counter()
         try:
-            return await agent.process_task(task)
+            if on_token:
+                task = await agent.process_task(task, on_token=on_token)
+            else:
+                task = await agent.process_task(task)
         except Exception as e:
             console.print(f"[red]Error in agent processing:[/red] {str(e)}")
             task.status = "failed"
             task.result = f"Error: {str(e)}"
-            return task
+        
+        self.knowledge_base.log_task_result(
+            task_id=task.id,
+            agent_name=agent.name,
+            status=task.status,
+            content=task.result,
+            error=task.error_message or (task.result if task.status == "failed" else None),
+            duration=time.perf_counter() - start,
+            task_type=task.type
+        )
+        return task
     
-    async def _route_and_process_task(self, task: Task) -> Task:
-        """Route task to appropriate agent"""
+    async def _process_with_limit(self, task: Task, agent: BaseAgent,
+                                  on_token: Optional[TokenCallback] = None) -> Task:
+        """Process task with a specific agent within its model's concurrency cap"""
+        async with self.model_limiter.slot(getattr(agent, 'model_name', agent.name)):
+            return await self._process_with_agent(task, agent, on_token)
+    
+    async def _route_and_process_task(self, task: Task,
+                                      on_token: Optional[TokenCallback] = None) -> Task:
+        """Route task to the least-loaded agent of the pool for its type"""
         try:
-            # Get appropriate agent
-            agent_name = self._select_agent(task)
-            agent = self.agents.get(agent_name)
+            pool = self._select_pool(task)
+            handled_by = {}
             
-            if not agent:
-                raise ValueError(f"Agent {agent_name} not found")
+            async def run(task: Task, agent: BaseAgent) -> Task:
+                handled_by["agent"] = agent.name
+                return await self._process_with_agent(task, agent, on_token)
             
-            # Process with selected agent
-            result = await self._process_with_agent(task, agent)
+            with metrics.span("orchestrator.dispatch", pool=pool.capability):
+                result = await pool.dispatch(task, run)
             
             # Store in task history
             self.task_history.append({
                 "task_id": task.id,
-                "agent": agent_name,
+                "agent": handled_by.get("agent"),
+                "pool": pool.capability,
                 "status": result.status,
                 "timestamp": datetime.now().isoformat()
             })
@@ -124,6 +213,72 @@ class DexterOrchestrator:
             task.result = f"Error: {str(e)}"
             return task
     
+    async def _process_task_graph(self, task: Task, agent: Optional[BaseAgent] = None,
+                                  on_token: Optional[TokenCallback] = None) -> Task:
+        """Run task.subtasks through the scheduler; the last subtask's result is the task's result"""
+        final = task.subtasks[-1]
+        
+        async def run(subtask: Task) -> Task:
+            stream = on_token if subtask.id == final.id else None
+            if agent:
+                return await self._process_with_limit(subtask, agent, stream)
+            return await self._route_and_process_task(subtask, stream)
+        
+        try:
+            await self.scheduler.run(task.subtasks, run)
+        except ValueError as e:
+            task.mark_failed(str(e))
+            task.result = f"Error: {str(e)}"
+            return task
+        
+        if final.status == "completed":
+            task.mark_completed(final.result)
+        else:
+            failed = [subtask.id for subtask in task.subtasks if subtask.status != "completed"]
+            task.mark_failed(f"Subtasks failed: {', '.join(failed)}")
+            task.result = final.result
+        return task
+    
+    def _plan_subtasks(self, task: Task) -> List[Task]:
+        """Split a multi-step objective into a dependency graph of subtasks.
+
+        Each step is independent unless it starts with a sequencing word
+        ("then", "using", ...) or refers to "step N", in which case it depends
+        on the previous or the referenced step. A final subtask combines all
+        step results into the answer.
+        """
+        steps = [match.group(1).strip() for match in map(STEP_PATTERN.match, task.content.splitlines()) if match]
+        if len(steps) < 2:
+            return []
+        
+        subtasks = []
+        for number, step in enumerate(steps, 1):
+            depends_on = [
+                f"{task.id}.{int(reference)}"
+                for reference in STEP_REFERENCE.findall(step)
+                if 0 < int(reference) < number
+            ]
+            if not depends_on and number > 1 and step.lower().startswith(SEQUENTIAL_PREFIXES):
+                depends_on = [f"{task.id}.{number - 1}"]
+            subtasks.append(Task(
+                id=f"{task.id}.{number}",
+                content=step,
+                type=self._determine_task_type(step),
+                priority=task.priority,
+                context={},
+                depends_on=depends_on
+            ))
+        
+        subtasks.append(Task(
+            id=f"{task.id}.final",
+            content=f"Combine the results of the previous steps into a complete answer to: {task.content}",
+            type=task.type,
+            priority=task.priority,
+            context={},
+            depends_on=[subtask.id for subtask in subtasks]
+        ))
+        return subtasks
+    
     def _determine_task_type(self, objective: str) -> str:
         """Determine task type from objective"""
         objective_lower = objective.lower()
@@ -135,14 +290,13 @@ class DexterOrchestrator:
         else:
             return "analysis"
     
-    def _select_agent(self, task: Task) -> str:
-        """Select appropriate agent based on task type"""
-        if task.type == "code_generation":
-            return "CodeAgent"
-        elif task.type == "research":
-            return "ResearchAgent"
-        else:
-            return "DexterGPT"
+    def _select_pool(self, task: Task) -> AgentPool:
+        """Select the agent pool for a task's type, falling back to the default pool"""
+        capability = TASK_CAPABILITIES.get(task.type, task.type)
+        pool = self.pools.get(capability) or self.pools.get(DEFAULT_CAPABILITY)
+        if not pool:
+            raise ValueError(f"No agent registered for {capability}")
+        return pool
     
     def _extract_project_info(self, task: Task) -> Dict[str, Any]:
         """Extract project information from completed task"""
@@ -0,0 +1,141 @@
+# agents/pool.py
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+import asyncio
+import time
+from agents.base import BaseAgent, Task
+from utils.config import get_setting
+from utils.metrics import metrics
+
+AgentRunner = Callable[[Task, BaseAgent], Awaitable[Task]]
+
+class ModelLimiter:
+    """Caps how many requests run at once against each model.
+
+    Limits come from the ``models.concurrency`` config mapping of model name
+    to slots, with its ``default`` entry used for unlisted models. Pools
+    whose agents share a model therefore share its slots, so pools can be
+    sized to what the Ollama host serves in parallel.
+    """
+
+    def __init__(self, limits: Optional[Dict[str, int]] = None, default_limit: Optional[int] = None):
+        configured = get_setting("models", "concurrency", {}) or {}
+        self.limits = {**configured, **(limits or {})}
+        self.default_limit = default_limit or self.limits.pop("default", 2)
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        self.waiting: Dict[str, int] = {}
+
+    def limit(self, model_name: str) -> int:
+        return self.limits.get(model_name, self.default_limit)
+
+    @asynccontextmanager
+    async def slot(self, model_name: str):
+        semaphore = self._semaphores.get(model_name)
+        if semaphore is None:
+            semaphore = self._semaphores[model_name] = asyncio.Semaphore(self.limit(model_name))
+        self.waiting[model_name] = self.waiting.get(model_name, 0) + 1
+        try:
+            await semaphore.acquire()
+        finally:
+            self.waiting[model_name] -= 1
+        try:
+            yield
+        finally:
+            semaphore.release()
+
+
+@dataclass
+class PoolMember:
+    agent: BaseAgent
+    outstanding: int = 0
+    dispatched: int = 0
+
+
+@dataclass
+class PoolStats:
+    queued: int = 0
+    in_flight: int = 0
+    max_queue_depth: int = 0
+    dispatched: int = 0
+    completed: int = 0
+    failed: int = 0
+    total_wait: float = 0.0
+
+
+class AgentPool:
+    """Agents serving one capability, dispatched least-outstanding-first.
+
+    Each task goes to the member with the fewest outstanding tasks (ties go
+    to the member that has been dispatched least), then waits for a slot on
+    that agent's model before running. Tasks waiting for a slot count
+    towards the pool's queue depth.
+    """
+
+    def __init__(self, capability: str, limiter: ModelLimiter):
+        self.capability = capability
+        self.limiter = limiter
+        self.members: List[PoolMember] = []
+        self.stats = PoolStats()
+
+    def add(self, member: PoolMember):
+        """Add a member; members shared between pools share their outstanding count"""
+        self.members.append(member)
+
+    def __len__(self) -> int:
+        return len(self.members)
+
+    def select(self) -> PoolMember:
+        if not self.members:
+            raise ValueError(f"No agents in pool {self.capability}")
+        return min(self.members, key=lambda member: (member.outstanding, member.dispatched))
+
+    async def dispatch(self, task: Task, runner: AgentRunner) -> Task:
+        """Run task on the least-loaded member once its model has a free slot"""
+        member = self.select()
+        member.outstanding += 1
+        member.dispatched += 1
+        self.stats.dispatched += 1
+        self.stats.queued += 1
+        self.stats.max_queue_depth = max(self.stats.max_queue_depth, self.stats.queued)
+        queued_at = time.perf_counter()
+        waiting = True
+        try:
+            async with self.limiter.slot(getattr(member.agent, 'model_name', member.agent.name)):
+                waiting = False
+                self.stats.queued -= 1
+                wait = time.perf_counter() - queued_at
+                self.stats.total_wait += wait
+                metrics.observe("agent_pool_wait_seconds", wait, pool=self.capability)
+                self.stats.in_flight += 1
+                try:
+                    result = await runner(task, member.agent)
+                finally:
+                    self.stats.in_flight -= 1
+        finally:
+            member.outstanding -= 1
+            if waiting:
+                # Cancelled before a slot freed up
+                self.stats.queued -= 1
+                self.stats.dispatched -= 1
+
+        if result.status == "completed":
+            self.stats.completed += 1
+        else:
+            self.stats.failed += 1
+        return result
+
+    def metrics(self) -> Dict[str, Any]:
+        started = self.stats.dispatched - self.stats.queued
+        return {
+            "agents": len(self.members),
+            "queue_depth": self.stats.queued,
+            "in_flight": self.stats.in_flight,
+            "max_queue_depth": self.stats.max_queue_depth,
+            "dispatched": self.stats.dispatched,
+            "completed": self.stats.completed,
+            "failed": self.stats.failed,
+            "avg_wait": self.stats.total_wait / started if started else 0.0,
+            "outstanding": {f"{member.agent.name}#{index}": member.outstanding
+                            for index, member in enumerate(self.members)}
+        }
@@ -0,0 +1,216 @@
+# agents/prompt_builder.py
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+import json
+import math
+import re
+from utils.config import get_setting
+
+TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]")
+
+# Average characters per token of each model family's tokenizer on English text
+CHARS_PER_TOKEN = {
+    "llama": 4.0,
+    "mistral": 3.8,
+    "codellama": 3.5,
+    "gemma": 4.2,
+    "qwen": 3.8,
+}
+
+class TokenCounter:
+    """Estimates token counts for a model.
+
+    Pass ``tokenizer`` (text -> token count) for exact counts. Otherwise
+    words are counted as BPE-like pieces of about one token per
+    ``chars_per_token`` characters for the model family, and punctuation
+    as one token each.
+    """
+
+    def __init__(self, model_name: str = "", tokenizer: Optional[Callable[[str], int]] = None):
+        self.tokenizer = tokenizer
+        family = next((name for name in sorted(CHARS_PER_TOKEN, key=len, reverse=True)
+                       if model_name.lower().startswith(name)), None)
+        self.chars_per_token = CHARS_PER_TOKEN.get(family, 4.0)
+
+    def count(self, text: str) -> int:
+        if self.tokenizer:
+            return self.tokenizer(text)
+        return sum(
+            max(1, math.ceil(len(piece) / self.chars_per_token))
+            for piece in TOKEN_PATTERN.findall(text)
+        )
+
+    def truncate(self, text: str, max_tokens: int) -> str:
+        """Cut text at a word boundary so it fits in max_tokens"""
+        if self.count(text) <= max_tokens:
+            return text
+        cut = int(max_tokens * self.chars_per_token)
+        while cut > 0:
+            shortened = text[:cut].rsplit(" ", 1)[0] + " ..."
+            if self.count(shortened) <= max_tokens:
+                return shortened
+            cut = int(cut * 0.9)
+        return ""
+
+
+@dataclass
+class ContextItem:
+    section: str
+    text: str
+    relevance: float = 1.0
+    timestamp: Optional[datetime] = None
+    label: str = ""
+
+    def rank(self, now: datetime, half_life_hours: float) -> float:
+        """Relevance discounted by age, halving every half_life_hours"""
+        if self.timestamp is None:
+            return self.relevance
+        age_hours = max(0.0, (_as_utc(now) - _as_utc(self.timestamp)).total_seconds() / 3600)
+        return self.relevance * (0.5 + 0.5 * 0.5 ** (age_hours / half_life_hours))
+
+
+@dataclass
+class PromptBuild:
+    text: str
+    tokens: int
+    budget: int
+    sections: Dict[str, int] = field(default_factory=dict)
+    included: int = 0
+    truncated: int = 0
+    dropped: int = 0
+
+    def report(self) -> Dict[str, Any]:
+        return {
+            "tokens": self.tokens,
+            "budget": self.budget,
+            "sections": self.sections,
+            "included": self.included,
+            "truncated": self.truncated,
+            "dropped": self.dropped
+        }
+
+
+class PromptBuilder:
+    """Assembles prompts whose context fits a token budget.
+
+    Context values are flattened into items, ranked by relevance and
+    recency, and added best-first until the budget is spent. Each item is
+    truncated to ``max_item_tokens`` (a quarter of the budget by default) so
+    one long document cannot crowd out the rest; the item that crosses the
+    budget is truncated to what is left and later items are dropped. Items
+    are serialized as compact one-line entries grouped by section.
+    """
+
+    def __init__(self,
+                 model_name: str = "",
+                 max_context_tokens: Optional[int] = None,
+                 max_item_tokens: Optional[int] = None,
+                 min_item_tokens: int = 32,
+                 half_life_hours: Optional[float] = None,
+                 tokenizer: Optional[Callable[[str], int]] = None):
+        self.counter = TokenCounter(model_name, tokenizer)
+        self.max_context_tokens = max_context_tokens or get_setting("prompt", "max_context_tokens", 2048)
+        self.max_item_tokens = max_item_tokens or max(1, self.max_context_tokens // 4)
+        self.min_item_tokens = min_item_tokens
+        self.half_life_hours = half_life_hours or get_setting("prompt", "recency_half_life_hours", 24.0)
+
+    def fingerprint(self) -> str:
+        """The settings that shape a prompt, for keys that must change with them"""
+        return json.dumps([self.max_context_tokens, self.max_item_tokens, self.min_item_tokens,
+                           self.half_life_hours, self.counter.chars_per_token,
+                           getattr(self.counter.tokenizer, "__qualname__", None)])
+
+    def build(self, header: str, context: Dict[str, Any], footer: str) -> PromptBuild:
+        """Render header, the budgeted context and footer into one prompt"""
+        header_tokens = self.counter.count(header)
+        footer_tokens = self.counter.count(footer)
+
+        now = datetime.now(timezone.utc)
+        items = sorted(
+            self._items(context),
+            key=lambda item: item.rank(now, self.half_life_hours),
+            reverse=True
+        )
+
+        remaining = self.max_context_tokens
+        chosen: Dict[str, List[str]] = {}
+        section_tokens: Dict[str, int] = {}
+        build = PromptBuild(text="", tokens=0, budget=self.max_context_tokens)
+
+        for item in items:
+            line = f"- {item.label}{item.text}" if item.label else f"- {item.text}"
+            tokens = self.counter.count(line)
+            if tokens > min(remaining, self.max_item_tokens):
+                if remaining < self.min_item_tokens:
+                    build.dropped += 1
+                    continue
+                line = self.counter.truncate(line, min(remaining, self.max_item_tokens))
+                tokens = self.counter.count(line)
+                build.truncated += 1
+            remaining -= tokens
+            chosen.setdefault(item.section, []).append(line)
+            section_tokens[item.section] = section_tokens.get(item.section, 0) + tokens
+            build.included += 1
+
+        body = "\n\n".join(
+            f"## {section}\n" + "\n".join(lines) for section, lines in chosen.items()
+        )
+        build.text = f"{header}\nContext:\n{body or '(none)'}\n{footer}"
+        build.sections = {"header": header_tokens, **section_tokens, "footer": footer_tokens}
+        build.tokens = self.counter.count(build.text)
+        return build
+
+    def _items(self, context: Dict[str, Any]) -> List[ContextItem]:
+        items = []
+        for section, value in context.items():
+            if isinstance(value, list):
+                scores = [entry.get('score') for entry in value if isinstance(entry, dict)]
+                top_score = max((score for score in scores if score), default=None)
+                for entry in value:
+                    items.append(self._entry_item(section, entry, top_score))
+            elif isinstance(value, dict):
+                # e.g. dependency_results: {task id: result}, always highly relevant
+                for key, entry in value.items():
+                    items.append(ContextItem(section, _compact(entry), relevance=2.0, label=f"[{key}] "))
+            elif value not in (None, ""):
+                items.append(ContextItem(section, _compact(value)))
+        return items
+
+    def _entry_item(self, section: str, entry: Any, top_score: Optional[float]) -> ContextItem:
+        if not isinstance(entry, dict):
+            return ContextItem(section, _compact(entry))
+        score = entry.get('score')
+        relevance = score / top_score if score and top_score else 0.5
+        timestamp = _parse_timestamp(entry.get('timestamp'))
+        label_parts = [str(part) for part in (entry.get('type'), str(timestamp.date()) if timestamp else None) if part]
+        return ContextItem(
+            section,
+            _compact(entry.get('content') or entry.get('snippet') or entry),
+            relevance=relevance,
+            timestamp=timestamp,
+            label=f"[{', '.join(label_parts)}] " if label_parts else ""
+        )
+
+
+def _compact(value: Any) -> str:
+    """Single-line text for a context value; structures use compact JSON"""
+    if not isinstance(value, str):
+        value = json.dumps(value, separators=(",", ":"), default=str)
+    return " ".join(value.split())
+
+def _as_utc(value: datetime) -> datetime:
+    """Aware UTC datetime; naive values are UTC, as SQLite's CURRENT_TIMESTAMP writes them"""
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+def _parse_timestamp(value: Any) -> Optional[datetime]:
+    if isinstance(value, datetime):
+        return value
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(str(value))
+    except ValueError:
+        return None
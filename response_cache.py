@@ -0,0 +1,154 @@
+# agents/response_cache.py
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+import asyncio
+import hashlib
+import threading
+import time
+from database.storage import get_store
+from utils.config import get_setting
+
+class ResponseCache:
+    """Two-tier cache of model responses.
+
+    Entries are keyed on the model, the normalized task content and a
+    ``context_version`` supplied by the caller, rather than the full prompt:
+    prompts embed retrieved memories, which change every time an answer is
+    written back, so keying on them would make repeats almost never hit.
+    Lookups check an in-memory LRU first and fall back to a SQLite table,
+    promoting disk hits into memory. Entries expire after ``ttl`` seconds
+    and the disk tier is trimmed to ``max_disk_entries`` least recently used
+    rows.
+    """
+
+    def __init__(self,
+                 db_path: Optional[str] = None,
+                 max_memory_entries: int = 256,
+                 max_disk_entries: int = 10_000,
+                 ttl: float = 7 * 24 * 3600,
+                 evict_every: int = 100):
+        self.max_memory_entries = max_memory_entries
+        self.max_disk_entries = max_disk_entries
+        self.ttl = ttl
+        self.evict_every = evict_every
+        self._memory: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._writes = 0
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.store = get_store(db_path or get_setting("models", "response_cache_path", "cache/llm_cache.db"))
+        self.setup_database()
+
+    def setup_database(self):
+        with self.store.writer() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS llm_cache (
+                    key TEXT PRIMARY KEY,
+                    model TEXT,
+                    response TEXT,
+                    created_at REAL,
+                    accessed_at REAL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_llm_cache_accessed ON llm_cache(accessed_at)")
+
+    @staticmethod
+    def make_key(model: str, content: str, context_version: str = "") -> str:
+        normalized = " ".join(content.split())
+        return hashlib.sha256(f"{model}\0{normalized}\0{context_version}".encode()).hexdigest()
+
+    def get(self, model: str, content: str, context_version: str = "") -> Optional[str]:
+        key = self.make_key(model, content, context_version)
+        now = time.time()
+
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry and now - entry[1] < self.ttl:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                return entry[0]
+            self._memory.pop(key, None)
+
+        with self.store.reader() as conn:
+            row = conn.execute(
+                "SELECT response, created_at FROM llm_cache WHERE key = ? AND created_at > ?",
+                (key, now - self.ttl)
+            ).fetchone()
+
+        if not row:
+            with self._lock:
+                self.misses += 1
+            return None
+
+        with self.store.writer() as conn:
+            conn.execute("UPDATE llm_cache SET accessed_at = ? WHERE key = ?", (now, key))
+        with self._lock:
+            self.disk_hits += 1
+            self._remember(key, row[0], row[1])
+        return row[0]
+
+    def set(self, model: str, content: str, response: str, context_version: str = ""):
+        key = self.make_key(model, content, context_version)
+        now = time.time()
+
+        with self._lock:
+            self._remember(key, response, now)
+            self._writes += 1
+            evict = self._writes % self.evict_every == 0
+
+        with self.store.writer() as conn:
+            conn.execute(
+                """
+                INSERT OR REPLACE INTO llm_cache (key, model, response, created_at, accessed_at)
+                VALUES (?, ?, ?, ?, ?)
+                """,
+                (key, model, response, now, now)
+            )
+        if evict:
+            self.evict()
+
+    def _remember(self, key: str, response: str, created_at: float):
+        self._memory[key] = (response, created_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+
+    def evict(self):
+        """Drop expired entries and trim the disk tier to its size limit"""
+        with self.store.writer() as conn:
+            conn.execute("DELETE FROM llm_cache WHERE created_at <= ?", (time.time() - self.ttl,))
+            conn.execute(
+                """
+                DELETE FROM llm_cache WHERE key IN (
+                    SELECT key FROM llm_cache ORDER BY accessed_at DESC LIMIT -1 OFFSET ?
+                )
+                """,
+                (self.max_disk_entries,)
+            )
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+        with self.store.writer() as conn:
+            conn.execute("DELETE FROM llm_cache")
+
+    async def get_async(self, model: str, content: str, context_version: str = "") -> Optional[str]:
+        """get() without blocking the event loop on the disk tier"""
+        return await asyncio.to_thread(self.get, model, content, context_version)
+
+    async def set_async(self, model: str, content: str, response: str, context_version: str = ""):
+        """set() without blocking the event loop on the disk tier"""
+        await asyncio.to_thread(self.set, model, content, response, context_version)
+
+    def stats(self) -> Dict[str, Any]:
+        hits = self.memory_hits + self.disk_hits
+        lookups = hits + self.misses
+        return {
+            "hits": hits,
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": hits / lookups if lookups else 0.0,
+            "memory_entries": len(self._memory)
+        }
@@ -0,0 +1,243 @@
+# toolbox/rss.py
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, List, Optional
+import asyncio
+import hashlib
+import html
+import re
+import time
+import xml.etree.ElementTree as ET
+from rich.console import Console
+from database.operator import KnowledgeBase
+from toolbox.tools import ToolKit
+from utils.config import get_setting
+from utils.logger import logger
+
+console = Console()
+
+ATOM = "{http://www.w3.org/2005/Atom}"
+CONTENT_ENCODED = "{http://purl.org/rss/1.0/modules/content/}encoded"
+TAGS = re.compile(r"<[^>]+>")
+PARSE_CHUNK = 64 * 1024
+
+@dataclass
+class Feed:
+    name: str
+    url: str
+    interval: float
+    next_poll: float = 0.0
+    polls: int = 0
+    unchanged: int = 0
+    new_items: int = 0
+    last_error: Optional[str] = None
+
+
+def _text(element: Optional[ET.Element]) -> str:
+    if element is None:
+        return ""
+    return html.unescape(TAGS.sub(" ", "".join(element.itertext()))).strip()
+
+def _item(element: ET.Element) -> Dict[str, str]:
+    """Flatten an RSS <item> or Atom <entry> into guid, title, link and text"""
+    if element.tag == f"{ATOM}entry":
+        link = element.find(f"{ATOM}link")
+        title = _text(element.find(f"{ATOM}title"))
+        text = _text(element.find(f"{ATOM}content")) or _text(element.find(f"{ATOM}summary"))
+        link_url = link.get("href", "") if link is not None else ""
+        guid = _text(element.find(f"{ATOM}id")) or link_url
+    else:
+        title = _text(element.find("title"))
+        text = _text(element.find(CONTENT_ENCODED)) or _text(element.find("description"))
+        link_url = _text(element.find("link"))
+        guid = _text(element.find("guid")) or link_url
+    text = " ".join(text.split())
+    content_hash = hashlib.sha256(f"{title}\n{text}".encode("utf-8")).hexdigest()
+    return {
+        "guid": guid or content_hash,
+        "hash": content_hash,
+        "title": title,
+        "link": link_url,
+        "text": text
+    }
+
+def iter_feed_items(body: bytes) -> Iterator[Dict[str, str]]:
+    """Parse RSS 2.0 or Atom incrementally, yielding items as they complete.
+
+    Each parsed item is cleared from the tree, so memory stays bounded by
+    one item rather than the whole feed.
+    """
+    parser = ET.XMLPullParser(events=("end",))
+    for start in range(0, len(body), PARSE_CHUNK):
+        parser.feed(body[start:start + PARSE_CHUNK])
+        for _, element in parser.read_events():
+            if element.tag in ("item", f"{ATOM}entry"):
+                yield _item(element)
+                element.clear()
+    parser.close()
+    for _, element in parser.read_events():
+        if element.tag in ("item", f"{ATOM}entry"):
+            yield _item(element)
+
+
+class FeedPoller:
+    """Keeps the knowledge base fresh from the RSS/Atom feeds in config.yaml.
+
+    Feeds are fetched through ToolKit, so unchanged feeds cost a conditional
+    GET and are not parsed. Items already seen, by GUID or by content hash,
+    are skipped; new ones are inserted into knowledge_entries in a single
+    transaction per poll. Each feed is polled every ``interval`` seconds
+    (its own ``interval`` key or tools.rss_interval).
+    """
+
+    def __init__(self,
+                 knowledge_base: KnowledgeBase,
+                 toolkit: ToolKit,
+                 feeds: Optional[List[Dict[str, Any]]] = None,
+                 default_interval: Optional[float] = None):
+        self.knowledge_base = knowledge_base
+        self.toolkit = toolkit
+        default_interval = default_interval or get_setting("tools", "rss_interval", 900)
+        self.feeds = [
+            Feed(name=feed["name"], url=feed["url"], interval=feed.get("interval", default_interval))
+            for feed in (get_setting("tools", "rss_feeds", []) if feeds is None else feeds)
+        ]
+        self._task: Optional[asyncio.Task] = None
+        self.setup_database()
+
+    def setup_database(self):
+        with self.knowledge_base.store.writer() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS feed_items (
+                    guid TEXT PRIMARY KEY,
+                    content_hash TEXT,
+                    feed TEXT,
+                    seen_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_feed_items_hash ON feed_items(content_hash)")
+
+    async def poll_feed(self, feed: Feed) -> int:
+        """Fetch one feed and store its new items; returns the number inserted"""
+        feed.polls += 1
+        feed.next_poll = time.monotonic() + feed.interval
+        response = await self.toolkit.fetch(feed.url)
+        if "error" in response or response["status"] != 200:
+            feed.last_error = response.get("error") or f"HTTP {response['status']}"
+            logger.warning(f"Polling feed {feed.name} failed: {feed.last_error}")
+            return 0
+        feed.last_error = None
+        if response["cache"] in ("fresh", "revalidated"):
+            feed.unchanged += 1
+            return 0
+
+        try:
+            inserted = await asyncio.to_thread(self._store_items, feed, response["body"])
+        except ET.ParseError as e:
+            feed.last_error = f"Invalid feed: {str(e)}"
+            logger.warning(f"Polling feed {feed.name} failed: {feed.last_error}")
+            return 0
+        feed.new_items += inserted
+        return inserted
+
+    def _store_items(self, feed: Feed, body: bytes) -> int:
+        items = {}
+        hashes = set()
+        for item in iter_feed_items(body):
+            if item["guid"] not in items and item["hash"] not in hashes:
+                items[item["guid"]] = item
+                hashes.add(item["hash"])
+        if not items:
+            return 0
+
+        with self.knowledge_base.store.writer() as conn:
+            seen = set()
+            guids = list(items)
+            # Stay below SQLite's bound parameter limit
+            for start in range(0, len(guids), 250):
+                part = guids[start:start + 250]
+                part_hashes = [items[guid]["hash"] for guid in part]
+                cursor = conn.execute(
+                    f"""
+                    SELECT guid, content_hash FROM feed_items
+                    WHERE guid IN ({','.join('?' * len(part))})
+                       OR content_hash IN ({','.join('?' * len(part))})
+                    """,
+                    part + part_hashes
+                )
+                for guid, content_hash in cursor:
+                    seen.update((guid, content_hash))
+
+            new_items = [
+                item for guid, item in items.items()
+                if guid not in seen and item["hash"] not in seen
+            ]
+            conn.executemany(
+                "INSERT INTO feed_items (guid, content_hash, feed) VALUES (?, ?, ?)",
+                [(item["guid"], item["hash"], feed.name) for item in new_items]
+            )
+            return self.knowledge_base.add_knowledge_entries(
+                {
+                    "topic": item["title"] or feed.name,
+                    "content": item["text"] or item["title"],
+                    "source": item["link"] or feed.url
+                }
+                for item in new_items
+            )
+
+    async def _poll_isolated(self, feed: Feed) -> int:
+        """poll_feed, recording any error on the feed instead of raising it"""
+        try:
+            return await self.poll_feed(feed)
+        except Exception as e:
+            feed.last_error = str(e) or type(e).__name__
+            logger.error(f"Polling feed {feed.name} failed: {feed.last_error}")
+            return 0
+
+    async def poll_due(self) -> Dict[str, int]:
+        """Poll every feed whose interval has elapsed, concurrently.
+
+        A feed that raises is counted as 0 new items so the others, and the
+        background loop, carry on.
+        """
+        now = time.monotonic()
+        due = [feed for feed in self.feeds if feed.next_poll <= now]
+        counts = await asyncio.gather(*[self._poll_isolated(feed) for feed in due])
+        return {feed.name: count for feed, count in zip(due, counts)}
+
+    async def run(self):
+        """Poll feeds until cancelled, sleeping until the next one is due"""
+        while self.feeds:
+            new_items = await self.poll_due()
+            if any(new_items.values()):
+                logger.info(f"Feeds added {sum(new_items.values())} new items: {new_items}")
+            next_poll = min(feed.next_poll for feed in self.feeds)
+            await asyncio.sleep(max(1.0, next_poll - time.monotonic()))
+
+    def start(self) -> Optional[asyncio.Task]:
+        """Start polling in the background if tools.rss_enabled is set"""
+        if not get_setting("tools", "rss_enabled", False):
+            return None
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self.run())
+        return self._task
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> List[Dict[str, Any]]:
+        return [
+            {
+                "name": feed.name,
+                "polls": feed.polls,
+                "unchanged": feed.unchanged,
+                "new_items": feed.new_items,
+                "last_error": feed.last_error
+            }
+            for feed in self.feeds
+        ]
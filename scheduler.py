@@ -0,0 +1,104 @@
+# agents/scheduler.py
+from typing import Awaitable, Callable, Dict, List, Set
+import asyncio
+import heapq
+from agents.base import Task
+from utils.logger import logger
+
+TaskRunner = Callable[[Task], Awaitable[Task]]
+
+class TaskScheduler:
+    """Runs a dependency graph of tasks with bounded concurrency.
+
+    A task becomes ready once every task in its ``depends_on`` has
+    completed; ready tasks start in ``priority`` order (lower values first)
+    while fewer than ``max_concurrency`` are running. Results of finished
+    dependencies are passed to dependents in
+    ``context["dependency_results"]``. If a dependency fails, its dependents
+    are marked failed without being run.
+    """
+
+    def __init__(self, max_concurrency: int = 4):
+        self.max_concurrency = max_concurrency
+
+    @staticmethod
+    def validate(tasks: List[Task]):
+        """Raise ValueError for unknown dependencies or cycles"""
+        ids = {task.id for task in tasks}
+        for task in tasks:
+            unknown = set(task.depends_on) - ids
+            if unknown:
+                raise ValueError(f"Task {task.id} depends on unknown tasks: {sorted(unknown)}")
+
+        remaining = {task.id: len(set(task.depends_on)) for task in tasks}
+        dependents = _dependents(tasks)
+        ready = [task_id for task_id, count in remaining.items() if count == 0]
+        visited = 0
+        while ready:
+            task_id = ready.pop()
+            visited += 1
+            for dependent in dependents[task_id]:
+                remaining[dependent] -= 1
+                if remaining[dependent] == 0:
+                    ready.append(dependent)
+        if visited != len(tasks):
+            raise ValueError("Task dependencies contain a cycle")
+
+    async def run(self, tasks: List[Task], runner: TaskRunner) -> List[Task]:
+        """Run all tasks and return them in their original order"""
+        self.validate(tasks)
+        by_id = {task.id: task for task in tasks}
+        order = {task.id: index for index, task in enumerate(tasks)}
+        remaining: Dict[str, Set[str]] = {task.id: set(task.depends_on) for task in tasks}
+        dependents = _dependents(tasks)
+
+        ready = []
+        for task in tasks:
+            if not remaining[task.id]:
+                heapq.heappush(ready, (task.priority, order[task.id], task.id))
+
+        running: Dict[asyncio.Task, str] = {}
+        try:
+            while ready or running:
+                while ready and len(running) < self.max_concurrency:
+                    _, _, task_id = heapq.heappop(ready)
+                    running[asyncio.create_task(runner(by_id[task_id]))] = task_id
+
+                done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                for finished in done:
+                    task = by_id[running.pop(finished)]
+                    if finished.exception():
+                        task.mark_failed(str(finished.exception()))
+                        task.result = f"Error: {finished.exception()}"
+                    self._release(task, by_id, remaining, dependents, ready, order)
+        finally:
+            for pending in running:
+                pending.cancel()
+
+        return tasks
+
+    def _release(self, task: Task, by_id, remaining, dependents, ready, order):
+        """Hand a finished task's result to its dependents and queue any that became ready"""
+        for dependent_id in dependents[task.id]:
+            dependent = by_id[dependent_id]
+            if dependent.status == "failed":
+                continue
+            if task.status != "completed":
+                logger.warning(f"Skipping {dependent_id}: dependency {task.id} {task.status}")
+                dependent.mark_failed(f"Dependency {task.id} did not complete")
+                dependent.result = f"Error: dependency {task.id} did not complete"
+                self._release(dependent, by_id, remaining, dependents, ready, order)
+                continue
+
+            dependent.context.setdefault("dependency_results", {})[task.id] = task.result
+            remaining[dependent_id].discard(task.id)
+            if not remaining[dependent_id]:
+                heapq.heappush(ready, (dependent.priority, order[dependent_id], dependent_id))
+
+
+def _dependents(tasks: List[Task]) -> Dict[str, List[str]]:
+    dependents = {task.id: [] for task in tasks}
+    for task in tasks:
+        for dependency in set(task.depends_on):
+            dependents[dependency].append(task.id)
+    return dependents
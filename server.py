@@ -0,0 +1,261 @@
+# server.py
+from typing import Any, AsyncIterator, Dict, Optional
+import asyncio
+import json
+import time
+import aiohttp
+from aiohttp import web
+from utils.config import get_setting
+from utils.logger import logger
+from utils.metrics import metrics
+
+DEFAULT_PORT = 8765
+
+class DexterServer:
+    """Long-running process that answers objectives over a local socket.
+
+    The orchestrator, its agents, the database connections and the ToolKit
+    session are created once and shared by every request, and Ollama is
+    asked to keep the model loaded for ``keep_alive`` between requests.
+    At most ``concurrency`` objectives run at once; up to ``max_queue``
+    more wait for a slot and further requests are rejected with a 503.
+
+    POST /objective with {"objective": "..."} streams NDJSON events:
+    {"event": "queued", "position": n}, then {"event": "token", "text": ...}
+    per generated token and a final {"event": "result", ...}.
+    GET /health reports queue and pool state, GET /metrics serves the
+    metrics registry in Prometheus text format. Until setup() has finished,
+    /objective and /health answer 503. If the client disconnects while its
+    objective runs, the generation is cancelled and nothing is recorded.
+    """
+
+    def __init__(self,
+                 model_name: Optional[str] = None,
+                 keep_alive: Optional[str] = None,
+                 concurrency: Optional[int] = None,
+                 max_queue: Optional[int] = None):
+        self.model_name = model_name or get_setting("models", "primary_model", "llama3.2")
+        self.keep_alive = keep_alive or get_setting("server", "keep_alive", "30m")
+        self.concurrency = concurrency or get_setting("server", "concurrency", 4)
+        self.max_queue = max_queue if max_queue is not None else get_setting("server", "max_queue", 64)
+        self.queued = 0
+        self.running = 0
+        self.served = 0
+        self._slots = None
+        self._runner = None
+        self.ready = False
+        self.memory_manager = None
+        self.knowledge_base = None
+        self.toolkit = None
+        self.orchestrator = None
+        self.feed_poller = None
+
+    async def setup(self):
+        """Open the stores, build the agents and load the model"""
+        # Imported here so clients using stream_objective stay lightweight
+        from agents.dexter_agent import DexterAgent
+        from agents.llm_client import LLMClient
+        from agents.orchestrator import DexterOrchestrator
+        from memory.manager import EnhancedMemoryManager
+        from database.operator import KnowledgeBase
+        from toolbox.rss import FeedPoller
+        from toolbox.tools import ToolKit
+
+        self.memory_manager = EnhancedMemoryManager()
+        self.knowledge_base = KnowledgeBase()
+        self.toolkit = ToolKit()
+        await self.toolkit.initialize()
+        self.llm_client = LLMClient(keep_alive=self.keep_alive)
+        self.agent = DexterAgent(
+            name="DexterGPT",
+            model_name=self.model_name,
+            memory_manager=self.memory_manager,
+            knowledge_base=self.knowledge_base,
+            toolkit=self.toolkit,
+            llm_client=self.llm_client
+        )
+        self.orchestrator = DexterOrchestrator(self.memory_manager, self.knowledge_base, self.toolkit)
+        self.orchestrator.register_agent(self.agent)
+        self.feed_poller = FeedPoller(self.knowledge_base, self.toolkit)
+        self.feed_poller.start()
+        self._slots = asyncio.Semaphore(self.concurrency)
+        await self.warm_up()
+        self.ready = True
+
+    async def warm_up(self):
+        """Load the model now rather than on the first request"""
+        start = time.perf_counter()
+        try:
+            # An empty prompt makes Ollama load the model without generating
+            await self.llm_client.client.generate(model=self.model_name, prompt="", keep_alive=self.keep_alive)
+            logger.info(f"Loaded {self.model_name} in {time.perf_counter() - start:.2f}s (keep_alive={self.keep_alive})")
+        except Exception as e:
+            logger.warning(f"Could not preload {self.model_name}: {str(e)}")
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_post("/objective", self.handle_objective)
+        app.router.add_get("/health", self.handle_health)
+        app.router.add_get("/metrics", self.handle_metrics)
+        return app
+
+    async def handle_objective(self, request: web.Request) -> web.StreamResponse:
+        try:
+            body = await request.json()
+            objective = body["objective"]
+        except (ValueError, KeyError, TypeError):
+            return web.json_response({"error": "Expected a JSON body with an objective"}, status=400)
+        if not self.ready:
+            return web.json_response({"error": "Server is starting, try again later"}, status=503)
+        if self.queued >= self.max_queue:
+            metrics.inc("server_requests_total", status="rejected")
+            return web.json_response({"error": "Server busy, try again later"}, status=503)
+
+        response = web.StreamResponse(headers={"Content-Type": "application/x-ndjson"})
+        await response.prepare(request)
+        start = time.perf_counter()
+        try:
+            self.queued += 1
+            try:
+                await self._send(response, event="queued", position=self.queued + self.running)
+                await self._slots.acquire()
+            finally:
+                self.queued -= 1
+            metrics.observe("server_queue_wait_seconds", time.perf_counter() - start)
+
+            self.running += 1
+            disconnected = False
+            try:
+                async def on_token(token: str):
+                    nonlocal disconnected
+                    try:
+                        if request.transport is None or request.transport.is_closing():
+                            raise ConnectionResetError("Client went away")
+                        await self._send(response, event="token", text=token)
+                    except ConnectionResetError:
+                        # Cancel the generation; a write error would fail the task in the agent
+                        disconnected = True
+                        raise asyncio.CancelledError()
+
+                try:
+                    result = await self.orchestrator.process_objective(objective, on_token=on_token)
+                except asyncio.CancelledError:
+                    if not disconnected:
+                        raise
+                    raise ConnectionResetError("Client disconnected during generation")
+            finally:
+                self.running -= 1
+                self.served += 1
+                self._slots.release()
+
+            task = result.get("task")
+            answered = task.subtasks[-1] if task and task.subtasks else task
+            await self._send(
+                response,
+                event="result",
+                status=result["status"],
+                task_status=answered.status if answered else None,
+                result=result.get("result"),
+                error=result.get("error"),
+                task_id=result.get("task_id"),
+                duration=time.perf_counter() - start,
+                generation=answered.metrics.get("generation") if answered else None
+            )
+            await response.write_eof()
+            metrics.inc("server_requests_total", status=result["status"])
+        except ConnectionResetError:
+            metrics.inc("server_requests_total", status="disconnected")
+            logger.info("Client disconnected before the objective finished")
+        return response
+
+    async def _send(self, response: web.StreamResponse, **event: Any):
+        await response.write(json.dumps(event, default=str).encode() + b"\n")
+
+    async def handle_health(self, request: web.Request) -> web.Response:
+        if not self.ready:
+            return web.json_response({"status": "starting", "model": self.model_name}, status=503)
+        return web.json_response({
+            "status": "ok",
+            "model": self.model_name,
+            "queued": self.queued,
+            "running": self.running,
+            "served": self.served,
+            **self.orchestrator.pool_metrics(),
+            "feeds": self.feed_poller.stats()
+        })
+
+    async def handle_metrics(self, request: web.Request) -> web.Response:
+        return web.Response(text=metrics.to_prometheus(), content_type="text/plain")
+
+    async def start(self, host: str = "127.0.0.1", port: int = DEFAULT_PORT,
+                    socket_path: Optional[str] = None) -> str:
+        """Serve on a unix socket if socket_path is given, else on host:port; returns the address"""
+        self._runner = web.AppRunner(self.app(), access_log=None)
+        await self._runner.setup()
+        if socket_path:
+            site = web.UnixSite(self._runner, socket_path)
+            await site.start()
+            return socket_path
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        # With port 0 the OS picks the port; addresses holds what was bound
+        bound_port = self._runner.addresses[0][1]
+        return f"http://{host}:{bound_port}"
+
+    async def stop(self):
+        """Stop serving, then flush and close everything opened by setup"""
+        from database.storage import close_stores
+
+        self.ready = False
+        if self._runner:
+            await self._runner.cleanup()
+            self._runner = None
+        # setup() may have failed part way, so only close what it opened
+        if self.feed_poller:
+            await self.feed_poller.stop()
+        if self.toolkit:
+            await self.toolkit.cleanup()
+        if self.memory_manager:
+            self.memory_manager.close()
+        if self.knowledge_base:
+            self.knowledge_base.close()
+        close_stores()
+
+
+async def serve(host: Optional[str] = None, port: Optional[int] = None,
+                socket_path: Optional[str] = None, **kwargs):
+    """Run a DexterServer until cancelled; fails fast if setup or binding fails"""
+    server = DexterServer(**kwargs)
+    try:
+        await server.setup()
+        address = await server.start(
+            host or get_setting("server", "host", "127.0.0.1"),
+            port or get_setting("server", "port", DEFAULT_PORT),
+            socket_path or get_setting("server", "socket") or None
+        )
+        logger.info(f"DexterGPT server listening on {address}")
+        await asyncio.Event().wait()
+    finally:
+        await server.stop()
+
+async def stream_objective(objective: str, address: str) -> AsyncIterator[Dict[str, Any]]:
+    """Send an objective to a running server and yield its events.
+
+    address is the server's http:// URL or the path of its unix socket.
+    """
+    if address.startswith(("http://", "https://")):
+        connector, base_url = None, address.rstrip("/")
+    else:
+        connector, base_url = aiohttp.UnixConnector(path=address), "http://localhost"
+    timeout = aiohttp.ClientTimeout(total=None, sock_connect=10)
+    async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+        async with session.post(f"{base_url}/objective", json={"objective": objective}) as response:
+            if response.status != 200:
+                raise RuntimeError((await response.json()).get("error", f"HTTP {response.status}"))
+            buffer = b""
+            async for chunk in response.content.iter_any():
+                buffer += chunk
+                *lines, buffer = buffer.split(b"\n")
+                for line in lines:
+                    if line.strip():
+                        yield json.loads(line)
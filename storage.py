@@ -0,0 +1,279 @@
+# database/storage.py
+from typing import Any, Callable, Dict, Iterator, List, Optional
+from contextlib import contextmanager
+from pathlib import Path
+import asyncio
+import atexit
+import queue
+import sqlite3
+import threading
+import time
+from utils.logger import logger
+
+DEFAULT_PRAGMAS = {
+    "synchronous": "NORMAL",
+    "mmap_size": 256 * 1024 * 1024,
+    "cache_size": -64000,  # negative values are KiB, i.e. 64 MB
+    "temp_store": "MEMORY",
+    "busy_timeout": 5000,
+}
+
+class SQLiteStore:
+    """Long-lived connections for one SQLite database.
+
+    Writes go through a single WAL-mode connection guarded by a lock, reads
+    borrow a connection from a pool of read-only connections so they never
+    wait on the writer. ``run_read``/``run_write`` run a callable with a
+    connection on a worker thread to keep queries off the event loop.
+    """
+
+    def __init__(self, db_path: str, pool_size: int = 4, pragmas: Dict[str, Any] = None):
+        self.db_path = db_path
+        self.pool_size = pool_size
+        self.pragmas = {**DEFAULT_PRAGMAS, **(pragmas or {})}
+        self.in_memory = db_path == ":memory:"
+        self._write_lock = threading.RLock()
+        self._write_depth = 0
+        self._readers: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue()
+        self._reader_slots = threading.BoundedSemaphore(pool_size)
+        self._all_readers = []
+        # BatchWriters feeding this store, drained before connections close
+        self._batch_writers: List["BatchWriter"] = []
+
+        if not self.in_memory:
+            Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        self._writer = self._connect(read_only=False)
+        if not self.in_memory:
+            self._writer.execute("PRAGMA journal_mode=WAL")
+
+    def _connect(self, read_only: bool) -> sqlite3.Connection:
+        if read_only:
+            uri = f"{Path(self.db_path).resolve().as_uri()}?mode=ro"
+            conn = sqlite3.connect(uri, uri=True, check_same_thread=False)
+        else:
+            # Autocommit mode, transactions are managed explicitly in writer()
+            conn = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None)
+        for name, value in self.pragmas.items():
+            conn.execute(f"PRAGMA {name}={value}")
+        return conn
+
+    @contextmanager
+    def writer(self) -> Iterator[sqlite3.Connection]:
+        """Yield the writer connection inside a transaction, committing on success"""
+        with self._write_lock:
+            outermost = self._write_depth == 0
+            if outermost:
+                self._writer.execute("BEGIN IMMEDIATE")
+            self._write_depth += 1
+            try:
+                yield self._writer
+            except BaseException:
+                if outermost:
+                    self._writer.execute("ROLLBACK")
+                raise
+            else:
+                if outermost:
+                    self._writer.execute("COMMIT")
+            finally:
+                self._write_depth -= 1
+
+    @contextmanager
+    def reader(self) -> Iterator[sqlite3.Connection]:
+        """Borrow a read-only connection from the pool"""
+        if self.in_memory:
+            # An in-memory database only exists on the writer connection
+            with self._write_lock:
+                yield self._writer
+            return
+
+        with self._reader_slots:
+            try:
+                conn = self._readers.get_nowait()
+            except queue.Empty:
+                conn = self._connect(read_only=True)
+                self._all_readers.append(conn)
+            try:
+                yield conn
+            finally:
+                self._readers.put(conn)
+
+    def _call_read(self, fn: Callable, *args, **kwargs) -> Any:
+        with self.reader() as conn:
+            return fn(conn, *args, **kwargs)
+
+    def _call_write(self, fn: Callable, *args, **kwargs) -> Any:
+        with self.writer() as conn:
+            return fn(conn, *args, **kwargs)
+
+    async def run_read(self, fn: Callable, *args, **kwargs) -> Any:
+        """Run fn(conn, *args) with a reader connection on a worker thread"""
+        return await asyncio.to_thread(self._call_read, fn, *args, **kwargs)
+
+    async def run_write(self, fn: Callable, *args, **kwargs) -> Any:
+        """Run fn(conn, *args) inside a write transaction on a worker thread"""
+        return await asyncio.to_thread(self._call_write, fn, *args, **kwargs)
+
+    def close(self):
+        """Drain every BatchWriter registered on this store, then close its connections"""
+        for batch_writer in list(self._batch_writers):
+            batch_writer.close()
+        with self._write_lock:
+            for conn in self._all_readers:
+                conn.close()
+            self._all_readers.clear()
+            self._readers = queue.LifoQueue()
+            self._writer.close()
+
+
+class BatchWriter:
+    """Write-behind queue that applies submitted items in batched transactions.
+
+    A background thread collects up to ``batch_size`` items, waiting at most
+    ``flush_interval`` seconds for a batch to fill, and passes them to
+    ``write_batch(conn, items)`` inside one write transaction. If a batch
+    fails, its items are retried one by one so a single bad row cannot drop
+    the rest. ``after_write(items)`` runs once a batch is committed and
+    ``on_failure(items)`` with the items that were dropped.
+    ``submit`` only blocks when ``max_pending`` items are waiting, and
+    ``submit_nowait`` drops the item instead of blocking. The queue
+    is drained on ``close()``, which also runs at interpreter exit and
+    before the store itself is closed.
+    """
+
+    _STOP = object()
+
+    def __init__(self,
+                 store: SQLiteStore,
+                 write_batch: Callable[[sqlite3.Connection, List[Any]], None],
+                 after_write: Optional[Callable[[List[Any]], None]] = None,
+                 on_failure: Optional[Callable[[List[Any]], None]] = None,
+                 batch_size: int = 500,
+                 flush_interval: float = 0.05,
+                 max_pending: int = 100_000,
+                 name: str = "batch-writer"):
+        self.store = store
+        self.write_batch = write_batch
+        self.after_write = after_write
+        self.on_failure = on_failure
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.written = 0
+        self.failed = 0
+        self._queue: queue.Queue = queue.Queue(maxsize=max_pending)
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+        store._batch_writers.append(self)
+        atexit.register(self.close)
+
+    def submit(self, item: Any):
+        if self._closed:
+            raise RuntimeError("BatchWriter is closed")
+        self._queue.put(item)
+
+    def submit_nowait(self, item: Any) -> bool:
+        """Queue an item without ever blocking; returns False if it was dropped"""
+        if self._closed:
+            return False
+        try:
+            self._queue.put_nowait(item)
+            return True
+        except queue.Full:
+            return False
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    @property
+    def pending(self) -> int:
+        return self._queue.unfinished_tasks
+
+    def flush(self):
+        """Block until every item submitted so far is committed"""
+        self._queue.join()
+
+    def close(self):
+        """Drain pending items and stop the writer thread"""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(self._STOP)
+        self._thread.join()
+        if self in self.store._batch_writers:
+            self.store._batch_writers.remove(self)
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is self._STOP:
+                self._queue.task_done()
+                return
+            batch = [item]
+            stop = False
+            deadline = time.monotonic() + self.flush_interval
+            try:
+                while len(batch) < self.batch_size:
+                    item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                    if item is self._STOP:
+                        stop = True
+                        break
+                    batch.append(item)
+            except queue.Empty:
+                pass
+
+            self._write(batch)
+            for _ in range(len(batch) + stop):
+                self._queue.task_done()
+            if stop:
+                return
+
+    def _write(self, batch: List[Any]):
+        try:
+            with self.store.writer() as conn:
+                self.write_batch(conn, batch)
+            written = batch
+        except Exception as e:
+            logger.error(f"Batch write of {len(batch)} items failed, retrying individually: {str(e)}")
+            written, dropped = [], []
+            for item in batch:
+                try:
+                    with self.store.writer() as conn:
+                        self.write_batch(conn, [item])
+                    written.append(item)
+                except Exception as item_error:
+                    self.failed += 1
+                    dropped.append(item)
+                    logger.error(f"Dropping item that could not be written: {str(item_error)}")
+            if self.on_failure and dropped:
+                try:
+                    self.on_failure(dropped)
+                except Exception as e:
+                    logger.error(f"Error handling dropped items: {str(e)}")
+
+        self.written += len(written)
+        if self.after_write and written:
+            try:
+                self.after_write(written)
+            except Exception as e:
+                logger.error(f"Error after batch write: {str(e)}")
+
+
+_stores: Dict[str, SQLiteStore] = {}
+_stores_lock = threading.Lock()
+
+def get_store(db_path: str, **kwargs) -> SQLiteStore:
+    """Return the process-wide store for db_path, creating it on first use"""
+    key = db_path if db_path == ":memory:" else str(Path(db_path).resolve())
+    with _stores_lock:
+        store = _stores.get(key)
+        if store is None:
+            store = _stores[key] = SQLiteStore(db_path, **kwargs)
+        return store
+
+def close_stores():
+    """Close every shared store, e.g. on shutdown"""
+    with _stores_lock:
+        for store in _stores.values():
+            store.close()
+        _stores.clear()
@@ -0,0 +1,231 @@
+# database/telemetry.py
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+import sqlite3
+import threading
+import time
+from database.storage import BatchWriter, SQLiteStore
+from utils.config import get_setting
+from utils.logger import logger
+
+INTERACTION_COLUMNS = ("timestamp", "type", "status", "content", "error", "duration")
+TASK_RESULT_COLUMNS = ("created_at", "task_id", "agent_name", "status", "content", "error", "duration", "task_type")
+
+class TelemetryStore:
+    """Append-only log of interactions and task results.
+
+    Logging only builds a row tuple and hands it to a BatchWriter, so the
+    request path never waits on SQLite; rows are committed in batches by
+    the writer thread. Logging never raises: if the queue is full or a
+    value cannot be stored, the row is dropped and counted in ``dropped``.
+
+    Rows older than ``retention_days`` are rolled up into hourly counts
+    (``interaction_rollups`` and ``task_result_rollups``) and deleted,
+    at most once per ``retention_interval`` seconds.
+    """
+
+    def __init__(self, store: SQLiteStore,
+                 retention_days: Optional[int] = None,
+                 retention_interval: float = 3600,
+                 max_content_chars: Optional[int] = None,
+                 max_pending: int = 100_000):
+        self.store = store
+        self.retention_days = retention_days or get_setting("telemetry", "retention_days", 30)
+        self.retention_interval = retention_interval
+        self.max_content_chars = max_content_chars or get_setting("telemetry", "max_content_chars", 4000)
+        self.dropped = 0
+        self._last_retention = time.monotonic()
+        self._retaining = threading.Lock()
+        self.setup_database()
+        self.writer = BatchWriter(
+            store,
+            self._write_rows,
+            batch_size=1000,
+            flush_interval=0.1,
+            max_pending=max_pending,
+            name="telemetry-writer"
+        )
+
+    def setup_database(self):
+        with self.store.writer() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS interactions (
+                    id INTEGER PRIMARY KEY,
+                    timestamp TEXT NOT NULL,
+                    type TEXT,
+                    status TEXT,
+                    content TEXT,
+                    error TEXT,
+                    duration REAL
+                )
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS task_results (
+                    id INTEGER PRIMARY KEY,
+                    created_at TEXT NOT NULL,
+                    task_id TEXT,
+                    agent_name TEXT,
+                    status TEXT,
+                    content TEXT,
+                    error TEXT,
+                    duration REAL,
+                    task_type TEXT
+                )
+            """)
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(task_results)")}
+            if "task_type" not in columns:
+                conn.execute("ALTER TABLE task_results ADD COLUMN task_type TEXT")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS interaction_rollups (
+                    hour TEXT,
+                    type TEXT,
+                    status TEXT,
+                    count INTEGER,
+                    total_duration REAL,
+                    max_duration REAL,
+                    PRIMARY KEY(hour, type, status)
+                )
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS task_result_rollups (
+                    hour TEXT,
+                    agent_name TEXT,
+                    status TEXT,
+                    count INTEGER,
+                    total_duration REAL,
+                    max_duration REAL,
+                    PRIMARY KEY(hour, agent_name, status)
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_interactions_timestamp ON interactions(timestamp)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_interactions_type ON interactions(type, timestamp)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_interactions_status ON interactions(status, timestamp)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_task_results_created ON task_results(created_at)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_task_results_status ON task_results(status, created_at)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_task_results_task ON task_results(task_id)")
+
+    def log_interaction(self, interaction_type: str, content: Any = None,
+                        status: str = "success", error: Optional[str] = None,
+                        duration: Optional[float] = None):
+        self._submit("interactions", (
+            str(datetime.now()), interaction_type, status, self._clip(content), error, duration
+        ))
+
+    def log_task_result(self, task_id: str, agent_name: Optional[str], status: str,
+                        content: Any = None, error: Optional[str] = None,
+                        duration: Optional[float] = None, task_type: Optional[str] = None):
+        self._submit("task_results", (
+            str(datetime.now()), task_id, agent_name, status, self._clip(content), error, duration, task_type
+        ))
+
+    def _clip(self, content: Any) -> Optional[str]:
+        if content is None:
+            return None
+        text = content if isinstance(content, str) else str(content)
+        return text[:self.max_content_chars]
+
+    def _submit(self, table: str, row: Tuple):
+        try:
+            if not self.writer.submit_nowait((table, row)):
+                self.dropped += 1
+            self._maybe_apply_retention()
+        except Exception as e:
+            self.dropped += 1
+            logger.debug(f"Dropped telemetry row: {str(e)}")
+
+    def _write_rows(self, conn: sqlite3.Connection, items: List[Tuple[str, Tuple]]):
+        interactions = [row for table, row in items if table == "interactions"]
+        task_results = [row for table, row in items if table == "task_results"]
+        if interactions:
+            conn.executemany(
+                f"INSERT INTO interactions ({', '.join(INTERACTION_COLUMNS)}) VALUES (?, ?, ?, ?, ?, ?)",
+                interactions
+            )
+        if task_results:
+            conn.executemany(
+                f"INSERT INTO task_results ({', '.join(TASK_RESULT_COLUMNS)}) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                task_results
+            )
+
+    def flush(self):
+        """Wait until every row logged so far is committed"""
+        self.writer.flush()
+
+    @property
+    def closed(self) -> bool:
+        return self.writer.closed
+
+    def close(self):
+        """Commit every queued row and stop the writer thread"""
+        self.writer.close()
+
+    def _maybe_apply_retention(self):
+        """Start a background rollup once per retention_interval"""
+        if time.monotonic() - self._last_retention < self.retention_interval:
+            return
+        self._last_retention = time.monotonic()
+        threading.Thread(target=self.apply_retention, daemon=True).start()
+
+    def apply_retention(self, retention_days: Optional[int] = None) -> Dict[str, int]:
+        """Roll rows older than retention_days up into hourly counts and delete them"""
+        if not self._retaining.acquire(blocking=False):
+            return {}
+        try:
+            cutoff = str(datetime.now() - timedelta(days=retention_days or self.retention_days))
+            with self.store.writer() as conn:
+                conn.execute(
+                    """
+                    INSERT INTO interaction_rollups (hour, type, status, count, total_duration, max_duration)
+                    SELECT substr(timestamp, 1, 13), COALESCE(type, ''), COALESCE(status, ''), COUNT(*),
+                           COALESCE(SUM(duration), 0), COALESCE(MAX(duration), 0)
+                    FROM interactions WHERE timestamp < ?
+                    GROUP BY 1, 2, 3
+                    ON CONFLICT(hour, type, status) DO UPDATE SET
+                        count = count + excluded.count,
+                        total_duration = total_duration + excluded.total_duration,
+                        max_duration = MAX(max_duration, excluded.max_duration)
+                    """,
+                    (cutoff,)
+                )
+                conn.execute(
+                    """
+                    INSERT INTO task_result_rollups (hour, agent_name, status, count, total_duration, max_duration)
+                    SELECT substr(created_at, 1, 13), COALESCE(agent_name, ''), COALESCE(status, ''), COUNT(*),
+                           COALESCE(SUM(duration), 0), COALESCE(MAX(duration), 0)
+                    FROM task_results WHERE created_at < ?
+                    GROUP BY 1, 2, 3
+                    ON CONFLICT(hour, agent_name, status) DO UPDATE SET
+                        count = count + excluded.count,
+                        total_duration = total_duration + excluded.total_duration,
+                        max_duration = MAX(max_duration, excluded.max_duration)
+                    """,
+                    (cutoff,)
+                )
+                interactions = conn.execute("DELETE FROM interactions WHERE timestamp < ?", (cutoff,)).rowcount
+                task_results = conn.execute("DELETE FROM task_results WHERE created_at < ?", (cutoff,)).rowcount
+            if interactions or task_results:
+                logger.info(f"Rolled up {interactions} interactions and {task_results} task results older than {cutoff}")
+            return {"interactions": interactions, "task_results": task_results}
+        except Exception as e:
+            logger.warning(f"Telemetry retention failed: {str(e)}")
+            return {}
+        finally:
+            self._retaining.release()
+
+
+_telemetry: Dict[int, TelemetryStore] = {}
+_telemetry_lock = threading.Lock()
+
+def get_telemetry(store: SQLiteStore, create: bool = True) -> Optional[TelemetryStore]:
+    """Return the telemetry store shared by everything using this database.
+
+    A new one (and writer thread) is only started on first use or after
+    the previous one was closed; with create=False None is returned then.
+    """
+    with _telemetry_lock:
+        telemetry = _telemetry.get(id(store))
+        if telemetry is None or telemetry.closed or telemetry.store is not store:
+            if not create:
+                return None
+            telemetry = _telemetry[id(store)] = TelemetryStore(store)
+        return telemetry
@@ -0,0 +1,87 @@
+# tests/test_analysis.py
+import json
+import sqlite3
+import pytest
+from database.storage import close_stores, get_store
+from database.telemetry import get_telemetry
+from utils.analysis import export_rows, iter_rows, page_rows
+
+@pytest.fixture
+def db_path(tmp_path) -> str:
+    """Telemetry database with 25 interactions, several sharing a timestamp"""
+    path = str(tmp_path / "dexter.db")
+    store = get_store(path)
+    get_telemetry(store)
+    with store.writer() as conn:
+        conn.executemany(
+            "INSERT INTO interactions (timestamp, type, status, content) VALUES (?, ?, ?, ?)",
+            [(f"2024-01-01 10:00:{i // 3:02d}", "objective", "error" if i % 5 == 0 else "success", f"item {i}")
+             for i in range(25)]
+        )
+    close_stores()
+    return path
+
+def _all_pages(db_path: str, limit: int, **kwargs):
+    pages, cursor = [], None
+    while True:
+        rows, cursor = page_rows(db_path, "interactions", limit, before=cursor, **kwargs)
+        pages.append(rows)
+        if cursor is None:
+            return pages
+
+def test_pages_cover_every_row_once_newest_first(db_path):
+    pages = _all_pages(db_path, limit=4)
+    contents = [row[3] for page in pages for row in page]
+
+    assert [len(page) for page in pages] == [4] * 6 + [1]
+    assert contents == [f"item {i}" for i in reversed(range(25))]
+
+def test_cursor_breaks_timestamp_ties_by_id(db_path):
+    rows, cursor = page_rows(db_path, "interactions", 2)
+
+    # item 24 is alone at :08, item 23 shares :07 with items 21 and 22
+    assert cursor[0] == "2024-01-01 10:00:07"
+    next_rows, _ = page_rows(db_path, "interactions", 2, before=cursor)
+    assert [row[3] for row in next_rows] == ["item 22", "item 21"]
+
+def test_pages_apply_filters(db_path):
+    pages = _all_pages(db_path, limit=2, filters={"status": "error"})
+
+    assert [row[3] for page in pages for row in page] == ["item 20", "item 15", "item 10", "item 5", "item 0"]
+    with pytest.raises(ValueError):
+        page_rows(db_path, "interactions", filters={"nope": "x"})
+
+def test_iter_rows_reads_in_id_batches(db_path):
+    rows = list(iter_rows(db_path, "interactions", batch_size=7))
+
+    assert [row["id"] for row in rows] == list(range(1, 26))
+
+def test_export_rows_writes_jsonl(db_path, tmp_path):
+    output = str(tmp_path / "interactions.jsonl")
+
+    assert export_rows(db_path, "interactions", output, batch_size=10) == 25
+    with open(output, encoding="utf-8") as f:
+        assert json.loads(f.readline())["content"] == "item 0"
+
+def test_database_path_may_contain_uri_characters(db_path, tmp_path):
+    odd_path = tmp_path / "odd ?#%20 dir" / "dexter.db"
+    odd_path.parent.mkdir()
+    (tmp_path / "dexter.db").rename(odd_path)
+
+    rows, _ = page_rows(str(odd_path), "interactions", 3)
+
+    assert [row[3] for row in rows] == ["item 24", "item 23", "item 22"]
+
+def test_reads_close_their_connection(db_path, monkeypatch):
+    from utils import analysis
+    opened = []
+    connect = analysis._connect
+    monkeypatch.setattr(analysis, "_connect", lambda path: opened.append(connect(path)) or opened[-1])
+
+    page_rows(db_path, "interactions", 3)
+    list(iter_rows(db_path, "interactions"))
+
+    assert len(opened) == 2
+    for conn in opened:
+        with pytest.raises(sqlite3.ProgrammingError):
+            conn.execute("SELECT 1")
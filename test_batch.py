@@ -0,0 +1,118 @@
+# tests/test_batch.py
+import asyncio
+import json
+from agents.base import Task
+from utils.batch import iter_objectives, load_completed_ids, percentile, run_batch
+
+class EchoOrchestrator:
+    """Stands in for DexterOrchestrator, failing the task of objectives that mention 'fail'.
+
+    Like the real orchestrator, a failed task still comes back with
+    status "success" and the error text as its result.
+    """
+
+    def __init__(self):
+        self.seen = []
+
+    async def process_objective(self, objective, agent=None):
+        self.seen.append(objective)
+        task = Task(id=f"task_{len(self.seen)}", content=objective, type="general", priority=1, context={})
+        if "fail" in objective:
+            task.status, task.result = "failed", "Error: All connection attempts failed"
+        else:
+            task.status, task.result = "completed", objective.upper()
+        return {"status": "success", "result": task.result, "task_id": task.id, "task": task}
+
+def _write(path, lines):
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    return str(path)
+
+def test_iter_objectives_reads_jsonl(tmp_path):
+    path = _write(tmp_path / "objectives.jsonl", [
+        '{"id": "a", "objective": "first"}',
+        '"second"',
+        '',
+        '{"content": "third"}',
+        '{"id": "empty"}',
+    ])
+
+    assert list(iter_objectives(path)) == [("a", "first"), ("line_2", "second"), ("line_4", "third")]
+
+def test_iter_objectives_skips_malformed_lines(tmp_path):
+    path = _write(tmp_path / "objectives.jsonl", ['"first"', '{"objective": ', '"third"'])
+    invalid = []
+
+    objectives = list(iter_objectives(path, on_invalid=lambda line, error: invalid.append(line)))
+
+    assert objectives == [("line_1", "first"), ("line_3", "third")]
+    assert invalid == [2]
+
+def test_iter_objectives_reads_text_lines(tmp_path):
+    path = _write(tmp_path / "objectives.txt", ["first", "", "{not json}"])
+
+    assert list(iter_objectives(path)) == [("line_1", "first"), ("line_3", "{not json}")]
+
+def test_run_batch_records_every_line(tmp_path):
+    input_path = _write(tmp_path / "objectives.jsonl", ['"one"', '"please fail"', '{oops', '"two"'])
+    output_path = str(tmp_path / "results.jsonl")
+
+    summary = asyncio.run(run_batch(EchoOrchestrator(), input_path, output_path, concurrency=2))
+
+    records = {record["id"]: record for record in map(json.loads, open(output_path, encoding="utf-8"))}
+    assert summary["succeeded"] == 2
+    assert summary["failed"] == 1
+    assert summary["invalid"] == 1
+    assert records["line_3"]["status"] == "invalid"
+    assert records["line_2"]["status"] == "failed"
+    assert records["line_1"]["status"] == "completed"
+    assert records["line_1"]["result"] == "ONE"
+
+def test_failed_tasks_are_retried_on_resume(tmp_path):
+    input_path = _write(tmp_path / "objectives.jsonl", ['"one"', '"please fail"'])
+    output_path = str(tmp_path / "results.jsonl")
+    first = asyncio.run(run_batch(EchoOrchestrator(), input_path, output_path))
+
+    orchestrator = EchoOrchestrator()
+    second = asyncio.run(run_batch(orchestrator, input_path, output_path))
+
+    assert (first["succeeded"], first["failed"]) == (1, 1)
+    assert orchestrator.seen == ["please fail"]
+    assert (second["skipped"], second["failed"]) == (1, 1)
+
+def test_raised_errors_are_recorded(tmp_path):
+    class BrokenOrchestrator:
+        async def process_objective(self, objective, agent=None):
+            raise RuntimeError("no database")
+
+    input_path = _write(tmp_path / "objectives.jsonl", ['"one"'])
+    output_path = str(tmp_path / "results.jsonl")
+
+    summary = asyncio.run(run_batch(BrokenOrchestrator(), input_path, output_path))
+
+    record = json.loads(open(output_path, encoding="utf-8").readline())
+    assert (record["status"], record["error"]) == ("error", "no database")
+    assert summary["failed"] == 1
+
+def test_run_batch_resumes_after_successes(tmp_path):
+    input_path = _write(tmp_path / "objectives.jsonl", ['"one"', '"please fail"', '"two"'])
+    output_path = str(tmp_path / "results.jsonl")
+    asyncio.run(run_batch(EchoOrchestrator(), input_path, output_path))
+    # A run killed mid-write leaves a truncated line behind
+    with open(output_path, "a", encoding="utf-8") as f:
+        f.write('{"id": "line_9", "sta')
+
+    orchestrator = EchoOrchestrator()
+    summary = asyncio.run(run_batch(orchestrator, input_path, output_path))
+
+    assert load_completed_ids(output_path) == {"line_1", "line_3"}
+    assert orchestrator.seen == ["please fail"]
+    assert summary["skipped"] == 2
+    last = json.loads(open(output_path, encoding="utf-8").read().splitlines()[-1])
+    assert last["id"] == "line_2"
+
+def test_percentile_uses_nearest_rank():
+    values = list(range(1, 101))
+
+    assert percentile(values, 50) == 50
+    assert percentile(values, 99) == 99
+    assert percentile([], 95) == 0.0
@@ -0,0 +1,44 @@
+# tests/test_chunks.py
+import time
+from database.operator import content_hash, iter_chunks
+
+TEXT = "\n\n".join(
+    " ".join(f"Sentence {p}.{s} has a few words in it." for s in range(12))
+    for p in range(40)
+)
+
+def test_chunks_fit_and_keep_every_word():
+    chunks = list(iter_chunks([TEXT], 300))
+
+    assert len(chunks) > 1
+    assert all(len(chunk) <= 300 for chunk in chunks)
+    assert " ".join(chunks).split() == TEXT.split()
+
+def test_chunks_prefer_paragraph_breaks():
+    paragraphs = ["a" * 60, "b" * 60, "c" * 60]
+    chunks = list(iter_chunks(["\n\n".join(paragraphs)], 130))
+
+    assert chunks == ["a" * 60 + "\n\n" + "b" * 60, "c" * 60]
+
+def test_chunks_do_not_depend_on_block_boundaries():
+    blocks = [TEXT[i:i + 77] for i in range(0, len(TEXT), 77)]
+
+    assert list(iter_chunks(blocks, 300)) == list(iter_chunks([TEXT], 300))
+
+def test_text_without_breaks_is_cut_at_max_size():
+    assert list(iter_chunks(["x" * 2500], 1000)) == ["x" * 1000, "x" * 1000, "x" * 500]
+
+def test_blank_input_yields_nothing():
+    assert list(iter_chunks(["", "   \n\n  "], 100)) == []
+
+def test_large_block_splits_in_linear_time():
+    text = TEXT * 200  # about 3.5 MB
+    start = time.perf_counter()
+    count = sum(1 for _ in iter_chunks([text], 1000))
+
+    assert count >= len(text) // 1000
+    assert time.perf_counter() - start < 5
+
+def test_content_hash_ignores_whitespace():
+    assert content_hash("a  b\n c") == content_hash(" a b c ")
+    assert content_hash("a b c") != content_hash("a b d")
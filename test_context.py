@@ -0,0 +1,48 @@
+# tests/test_context.py
+import asyncio
+import time
+from agents.context import ContextGatherer
+
+def test_slow_source_times_out_without_delaying_the_others():
+    gatherer = ContextGatherer(default_timeout=1.0)
+
+    async def slow(task):
+        await asyncio.sleep(5)
+        return "too late"
+
+    async def memories(task):
+        await asyncio.sleep(0.05)
+        return ["memory"]
+
+    def knowledge(task):
+        time.sleep(0.05)
+        return ["fact"]
+
+    gatherer.add_source("slow", slow, timeout=0.2)
+    gatherer.add_source("memories", memories)
+    gatherer.add_source("knowledge", knowledge)
+    timings = {}
+    start = time.perf_counter()
+
+    context = asyncio.run(gatherer.gather("task", timings))
+
+    # Sources run together, so the wait is the slow source's timeout, not the sum
+    assert time.perf_counter() - start < 0.5
+    assert context == {"memories": ["memory"], "knowledge": ["fact"]}
+    assert {name: timing["status"] for name, timing in timings.items()} == {
+        "slow": "timeout", "memories": "ok", "knowledge": "ok"
+    }
+
+def test_failing_and_empty_sources_are_left_out():
+    gatherer = ContextGatherer()
+
+    async def broken(task):
+        raise ConnectionError("store offline")
+
+    gatherer.add_source("broken", broken)
+    gatherer.add_source("empty", lambda task: [])
+    gatherer.add_source("echo", lambda task: task)
+    timings = {}
+
+    assert asyncio.run(gatherer.gather("objective", timings)) == {"echo": "objective"}
+    assert timings["broken"]["status"] == "error"
@@ -0,0 +1,48 @@
+# tests/test_extract.py
+import asyncio
+from toolbox.extract import Extractor, extract_html
+
+PAGES = [
+    b"<html><head><title>One</title><script>var x = 1;</script></head>"
+    b"<body><nav>Menu</nav><h1>Heading</h1><p>First paragraph.</p><p>Second.</p></body></html>",
+    "<html><body><p>Café crème</p><footer>Footer</footer></body></html>".encode("latin-1"),
+]
+
+def _without_timing(page):
+    return {key: value for key, value in page.items() if key != "parse_time"}
+
+def test_process_pool_matches_inline_parsing():
+    async def main():
+        pooled, inline = Extractor(workers=1), Extractor(workers=0)
+        try:
+            return (await asyncio.gather(*[pooled.extract(PAGES[0]), pooled.extract(PAGES[1], "latin-1")]),
+                    await asyncio.gather(*[inline.extract(PAGES[0]), inline.extract(PAGES[1], "latin-1")]))
+        finally:
+            pooled.close()
+
+    pooled, inline = asyncio.run(main())
+
+    assert [_without_timing(page) for page in pooled] == [_without_timing(page) for page in inline]
+    assert pooled[0]["title"] == "One"
+    assert pooled[0]["content"] == "Heading\nFirst paragraph.\nSecond."
+    assert pooled[1]["content"] == "Café crème"
+
+def test_a_failing_document_does_not_affect_the_others():
+    async def main():
+        extractor = Extractor(workers=1)
+        try:
+            results = await asyncio.gather(
+                extractor.extract(PAGES[0]),
+                extractor.extract(PAGES[0], "no-such-encoding"),
+                extractor.extract(PAGES[0]),
+                return_exceptions=True
+            )
+            # The pool keeps serving after a worker raised
+            return results, await extractor.extract(PAGES[0])
+        finally:
+            extractor.close()
+
+    (first, failed, third), after = asyncio.run(main())
+
+    assert isinstance(failed, LookupError)
+    assert first["content"] == third["content"] == after["content"] == extract_html(PAGES[0])["content"]
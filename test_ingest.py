@@ -0,0 +1,105 @@
+# tests/test_ingest.py
+from concurrent.futures import Future
+from database import ingest
+from database.ingest import Deduplicator, ingest_path
+from database.operator import KnowledgeBase
+
+PARAGRAPHS = ["a" * 60, "b" * 60, "c" * 60]
+
+def _names(knowledge_base):
+    with knowledge_base.store.reader() as conn:
+        return sorted(row[0] for row in conn.execute("SELECT name FROM documents"))
+
+def _write(path, paragraphs):
+    path.write_text("\n\n".join(paragraphs))
+
+def test_duplicates_are_dropped_across_files_and_reingests(tmp_path):
+    docs = tmp_path / "docs"
+    docs.mkdir()
+    _write(docs / "one.txt", PARAGRAPHS)
+    _write(docs / "two.txt", PARAGRAPHS[:2] + ["d" * 60])
+    knowledge_base = KnowledgeBase(str(tmp_path / "kb.db"))
+
+    first = ingest_path(knowledge_base, str(docs), workers=1, max_chunk_size=100)
+    second = ingest_path(knowledge_base, str(docs), workers=1, max_chunk_size=100)
+
+    assert (first["chunks"], first["duplicates"], first["files"]) == (4, 2, 2)
+    assert _names(knowledge_base) == ["one.txt#1", "one.txt#2", "one.txt#3", "two.txt#3"]
+    assert (second["chunks"], second["duplicates"], second["skipped_files"]) == (0, 6, 2)
+
+def test_chunks_are_named_by_position_in_the_file(tmp_path):
+    path = tmp_path / "notes.txt"
+    _write(path, PARAGRAPHS)
+    knowledge_base = KnowledgeBase(str(tmp_path / "kb.db"))
+    ingest_path(knowledge_base, str(path), workers=1, max_chunk_size=100)
+
+    _write(path, [PARAGRAPHS[0], "x" * 60, PARAGRAPHS[2]])
+    ingest_path(knowledge_base, str(path), workers=1, max_chunk_size=100)
+
+    assert _names(knowledge_base) == ["notes.txt#1", "notes.txt#2", "notes.txt#2", "notes.txt#3"]
+
+def test_a_failing_file_does_not_stop_the_run(tmp_path, monkeypatch):
+    docs = tmp_path / "docs"
+    docs.mkdir()
+    _write(docs / "bad.txt", ["bad " * 20])
+    _write(docs / "good.txt", PARAGRAPHS)
+    (docs / "missing.txt").symlink_to(docs / "nowhere.txt")
+    read_blocks = ingest.read_blocks
+
+    def failing_read(path, *args):
+        if path.name == "bad.txt":
+            raise OSError("disk error")
+        yield from read_blocks(path, *args)
+
+    # Stream every file in-process so the failure is raised while chunking
+    monkeypatch.setattr(ingest, "STREAM_THRESHOLD", 0)
+    monkeypatch.setattr(ingest, "read_blocks", failing_read)
+    summary = ingest_path(KnowledgeBase(str(tmp_path / "kb.db")), str(docs), max_chunk_size=100)
+
+    assert summary["chunks"] == 3 and summary["files"] == 1
+    assert summary["failed_files"] == 2
+    assert sorted(error[0].rsplit("/", 1)[1] for error in summary["errors"]) == ["bad.txt", "missing.txt"]
+    assert summary["bytes"] == (docs / "good.txt").stat().st_size
+
+class InlinePool:
+    """ProcessPoolExecutor stand-in that parses on submit and records what is in flight"""
+    submitted = []
+
+    def __init__(self, max_workers):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def submit(self, fn, path, *args):
+        InlinePool.submitted.append(path)
+        future = Future()
+        future.set_result(fn(path, *args))
+        return future
+
+def test_parsed_files_stay_within_the_inflight_byte_window(tmp_path, monkeypatch):
+    files = []
+    for number in range(10):
+        path = tmp_path / f"{number}.txt"
+        path.write_text("x" * 100)
+        files.append((path, 100))
+    InlinePool.submitted = []
+    monkeypatch.setattr(ingest, "ProcessPoolExecutor", InlinePool)
+    monkeypatch.setattr(ingest, "MAX_INFLIGHT_BYTES", 250)
+
+    yielded = []
+    for path, size, chunks in ingest._parsed_files(files, 1000, workers=4):
+        yielded.append(path)
+        inflight = len(InlinePool.submitted) - len(yielded)
+        assert inflight * 100 <= 250
+    assert yielded == [path for path, _ in files]
+
+def test_deduplicator_forgets_the_oldest_hashes():
+    deduplicator = Deduplicator(batch_size=2, max_seen=2)
+
+    assert [chunk for _, chunk in deduplicator.filter(["a", "b", "a", "c", "a"])] == ["a", "b", "c", "a"]
+    assert len(deduplicator.seen) == 2
+    assert deduplicator.duplicates == 1
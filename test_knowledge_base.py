@@ -0,0 +1,63 @@
+# tests/test_knowledge_base.py
+import sqlite3
+from database.operator import KnowledgeBase, content_hash
+
+FILLER = " ".join(f"word{n}" for n in range(40))
+
+def _contents(results):
+    return [result["content"] for result in results]
+
+def test_upgrade_backfills_index_and_hashes_for_existing_rows(tmp_path):
+    path = tmp_path / "old.db"
+    conn = sqlite3.connect(path)
+    # Schema from before full-text search and content hashes
+    conn.executescript("""
+        CREATE TABLE documents (id INTEGER PRIMARY KEY, name TEXT, content TEXT, doc_type TEXT,
+                                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP);
+        CREATE TABLE knowledge_entries (id INTEGER PRIMARY KEY, topic TEXT, content TEXT, source TEXT,
+                                        relevance REAL, created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP);
+        INSERT INTO documents (name, content, doc_type) VALUES ('notes', 'Raft elects a leader', 'text');
+        INSERT INTO knowledge_entries (topic, content) VALUES ('paxos', 'Paxos reaches consensus');
+    """)
+    conn.commit()
+    conn.close()
+
+    knowledge_base = KnowledgeBase(str(path))
+
+    assert _contents(knowledge_base.search_knowledge("leader")) == ["Raft elects a leader"]
+    assert _contents(knowledge_base.search_knowledge("consensus")) == ["Paxos reaches consensus"]
+    with knowledge_base.store.reader() as conn:
+        assert conn.execute("PRAGMA user_version").fetchone()[0] == 1
+        assert conn.execute("SELECT content_hash FROM documents").fetchone()[0] == content_hash("Raft elects a leader")
+
+def test_triggers_keep_the_index_in_sync(tmp_path):
+    knowledge_base = KnowledgeBase(str(tmp_path / "kb.db"))
+    doc_id = knowledge_base.add_document("notes", "Gossip spreads membership", "text")
+    assert _contents(knowledge_base.search_knowledge("gossip")) == ["Gossip spreads membership"]
+
+    with knowledge_base.store.writer() as conn:
+        conn.execute("UPDATE documents SET content = 'Heartbeats detect failures' WHERE id = ?", (doc_id,))
+    assert knowledge_base.search_knowledge("gossip") == []
+    assert _contents(knowledge_base.search_knowledge("heartbeats")) == ["Heartbeats detect failures"]
+
+    with knowledge_base.store.writer() as conn:
+        conn.execute("DELETE FROM documents WHERE id = ?", (doc_id,))
+    assert knowledge_base.search_knowledge("heartbeats") == []
+
+def test_results_from_both_tables_are_ranked_together(tmp_path):
+    knowledge_base = KnowledgeBase(str(tmp_path / "kb.db"))
+    knowledge_base.add_documents([
+        {"name": "weak", "content": f"quorum {FILLER}", "doc_type": "text"},
+        {"name": "strong", "content": "quorum quorum quorum", "doc_type": "text"},
+    ])
+    knowledge_base.add_knowledge_entries([
+        {"topic": "weak", "content": f"quorum {FILLER} {FILLER}"},
+        {"topic": "quorum", "content": "quorum quorum writes"},
+    ])
+
+    results = knowledge_base.search_knowledge("quorum", limit=3)
+    scores = [result["score"] for result in results]
+
+    assert scores == sorted(scores, reverse=True)
+    assert {result["type"] for result in results[:2]} == {"text", "knowledge"}
+    assert f"quorum {FILLER} {FILLER}" not in _contents(results)
@@ -0,0 +1,71 @@
+# tests/test_llm_client.py
+import asyncio
+import pytest
+from agents.llm_client import FirstTokenTimeout, GenerationTimeout, LLMClient
+
+class FakeOllama:
+    """Streams ``tokens`` after ``delay`` seconds, ``interval`` seconds apart"""
+
+    def __init__(self, tokens, delay: float = 0.0, interval: float = 0.0):
+        self.tokens = tokens
+        self.delay = delay
+        self.interval = interval
+
+    async def generate(self, **kwargs):
+        return self._stream()
+
+    async def _stream(self):
+        await asyncio.sleep(self.delay)
+        for token in self.tokens:
+            yield {"response": token, "done": False}
+            await asyncio.sleep(self.interval)
+        yield {"response": "", "done": True, "eval_count": len(self.tokens), "prompt_eval_count": 3}
+
+def _generate(client: LLMClient, **kwargs):
+    return asyncio.run(client.generate("llama3.2", "prompt", **kwargs))
+
+def test_generate_streams_tokens_and_counts():
+    received = []
+    client = LLMClient(client=FakeOllama(["Hello", " world"]))
+
+    generation = _generate(client, on_token=received.append)
+
+    assert received == ["Hello", " world"]
+    assert generation.text == "Hello world"
+    assert (generation.prompt_tokens, generation.completion_tokens) == (3, 2)
+    assert generation.complete
+
+def test_first_token_timeout_is_reported_separately():
+    client = LLMClient(client=FakeOllama(["late"], delay=1), first_token_timeout=0.05)
+
+    with pytest.raises(FirstTokenTimeout, match="no output within 0.05s") as raised:
+        _generate(client)
+    assert raised.value.generation.text == ""
+
+def test_overall_timeout_keeps_partial_text():
+    client = LLMClient(client=FakeOllama(["a", "b", "c", "d"], interval=0.1), timeout=0.25)
+
+    with pytest.raises(GenerationTimeout, match="timed out after 0.25s") as raised:
+        _generate(client)
+    assert not isinstance(raised.value, FirstTokenTimeout)
+    assert raised.value.generation.text.startswith("ab")
+    assert not raised.value.generation.complete
+
+def test_callback_errors_keep_partial_text():
+    def on_token(token):
+        if token == "c":
+            raise ConnectionResetError("client went away")
+
+    client = LLMClient(client=FakeOllama(["a", "b", "c", "d"]))
+
+    with pytest.raises(ConnectionResetError) as raised:
+        _generate(client, on_token=on_token)
+    assert raised.value.generation.text == "abc"
+
+def test_explicit_zero_timeouts_are_not_replaced_by_defaults():
+    client = LLMClient(client=FakeOllama(["late"], delay=0.05))
+
+    with pytest.raises(FirstTokenTimeout, match="within 0s"):
+        _generate(client, first_token_timeout=0)
+    with pytest.raises(GenerationTimeout, match="after 0s"):
+        _generate(client, timeout=0)
@@ -0,0 +1,27 @@
+# tests/test_logger.py
+import json
+import logging
+from utils import logger as logger_module
+
+def test_queued_records_are_written_when_logging_stops(tmp_path, monkeypatch):
+    log_file = tmp_path / "logs" / "test.log"
+    settings = {"file": str(log_file), "json": True, "console_level": "CRITICAL", "level": "INFO"}
+    get_setting = logger_module.get_setting
+    monkeypatch.setattr(logger_module, "get_setting",
+                        lambda section, key, default=None: settings.get(key, default) if section == "logging"
+                        else get_setting(section, key, default))
+
+    logger_module.stop_logging()
+    try:
+        log = logger_module.setup_logger("test")
+        for number in range(500):
+            log.info("record %d", number, extra={"request_id": number})
+        logger_module.stop_logging()
+
+        entries = [json.loads(line) for line in log_file.read_text().splitlines()]
+        assert [entry["message"] for entry in entries] == [f"record {number}" for number in range(500)]
+        assert entries[-1]["request_id"] == 499
+    finally:
+        logger_module.stop_logging()
+        monkeypatch.undo()
+        logger_module.setup_logger()
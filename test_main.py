@@ -0,0 +1,43 @@
+# tests/test_main.py
+import argparse
+import asyncio
+import io
+import pytest
+from rich.console import Console
+import main
+
+class InterruptedComponents:
+    """Stands in for main.Components; the agent streams two tokens, then the user presses Ctrl-C"""
+    closed = False
+
+    def __init__(self, model_name):
+        self.agent = self
+
+    async def process_task(self, task, on_token=None):
+        on_token("partial ")
+        on_token("answer")
+        raise KeyboardInterrupt
+
+    async def close(self):
+        InterruptedComponents.closed = True
+
+def test_interrupted_answer_keeps_partial_output(monkeypatch):
+    output = io.StringIO()
+    monkeypatch.setattr(main, "_console", Console(file=output, width=60))
+    monkeypatch.setattr(main, "Components", InterruptedComponents)
+    args = argparse.Namespace(server=None, model="fake", objective="hi")
+
+    with pytest.raises(KeyboardInterrupt):
+        asyncio.run(main.run_command(args))
+
+    text = output.getvalue()
+    assert "partial answer" in text
+    assert "Stopped after 2 tokens" in text
+    assert InterruptedComponents.closed
+
+def test_legacy_flags_map_to_commands(monkeypatch):
+    monkeypatch.setattr(main, "_console", Console(file=io.StringIO()))
+
+    assert main.translate_legacy_args(["-o", "hi", "--metrics-out", "m.json"]) == ["--metrics-out", "m.json", "run", "hi"]
+    assert main.translate_legacy_args(["--file=objectives.jsonl", "-c", "8"]) == ["batch", "objectives.jsonl", "-c", "8"]
+    assert main.translate_legacy_args(["history", "-n", "5"]) == ["history", "-n", "5"]
@@ -0,0 +1,122 @@
+# tests/test_memory.py
+import json
+import sqlite3
+import time
+from memory.manager import EnhancedMemoryManager
+
+def _manager(tmp_path, **kwargs) -> EnhancedMemoryManager:
+    return EnhancedMemoryManager(
+        db_path=str(tmp_path / "memory.db"), embedding_model="hashing",
+        max_working_memory=1, max_short_term=1, **kwargs
+    )
+
+def _add(manager, count: int, memory_type: str = "note"):
+    ids = [manager.add_memory(f"{memory_type} {i} reached a conclusion", memory_type) for i in range(count)]
+    manager.flush()
+    return ids
+
+def _age(manager, ids, timestamp: str = "2020-01-01 10:00:00"):
+    with manager.store.writer() as conn:
+        conn.executemany("UPDATE memories SET timestamp = ? WHERE id = ?", [(timestamp, i) for i in ids])
+
+def _rows(manager, table: str):
+    with manager.store.reader() as conn:
+        return conn.execute(f"SELECT id, context FROM {table}").fetchall()
+
+def test_compaction_is_off_by_default(tmp_path):
+    manager = _manager(tmp_path, compaction_interval=0)
+    ids = _add(manager, 4)
+    _age(manager, ids)
+
+    manager._maybe_compact()
+
+    assert not manager.compaction_enabled
+    assert len(_rows(manager, "memories")) == 4
+    manager.close()
+
+def test_compaction_archives_originals_behind_a_digest(tmp_path):
+    manager = _manager(tmp_path)
+    ids = _add(manager, 6)
+    manager.tiers.discard(ids)
+    _age(manager, ids)
+
+    assert manager.compact_long_term() == 6
+
+    memories = _rows(manager, "memories")
+    assert len(memories) == 1
+    digest_id, context = memories[0]
+    assert digest_id.startswith("cmp_20200101_")
+    assert json.loads(context)["digest_of"] == ids
+    assert len(_rows(manager, "memories_archive")) == 6
+    assert manager.get_memory(ids[0])["content"] == "note 0 reached a conclusion"
+    assert digest_id in manager.index
+    assert not any(memory_id in manager.index for memory_id in ids)
+    manager.close()
+
+def test_compaction_leaves_recent_and_cached_memories(tmp_path):
+    manager = _manager(tmp_path)
+    recent = _add(manager, 2)
+    old = _add(manager, 4)
+    _age(manager, old)
+
+    # The tiers still hold the last two old memories
+    assert manager.compact_long_term() == 2
+
+    remaining = {memory_id for memory_id, _ in _rows(manager, "memories")}
+    assert set(recent) | set(old[2:]) <= remaining
+    assert not set(old[:2]) & remaining
+    manager.close()
+
+def test_memories_that_fail_to_write_are_forgotten(tmp_path):
+    manager = _manager(tmp_path)
+    write = manager.writer.write_batch
+
+    def write_or_fail(conn, memories):
+        if any(memory["content"] == "unwritable" for memory in memories):
+            raise ValueError("cannot store")
+        write(conn, memories)
+
+    manager.writer.write_batch = write_or_fail
+    kept = manager.add_memory("kept", "note")
+    lost = manager.add_memory("unwritable", "note")
+    manager.flush()
+
+    assert manager.get_memory(kept)["content"] == "kept"
+    assert manager.get_memory(lost) is None
+    assert lost not in manager.index
+    assert not manager._pending
+    manager.close()
+
+def test_explicit_zero_sizes_disable_the_caches(tmp_path):
+    manager = EnhancedMemoryManager(db_path=str(tmp_path / "memory.db"), embedding_model="hashing",
+                                    max_working_memory=0, max_short_term=0, compression_ratio=0)
+    _add(manager, 3)
+
+    assert (manager.tiers.max_working, manager.tiers.max_short_term, manager.compression_ratio) == (0, 0, 0)
+    assert not manager.tiers.working and not manager.tiers.short_term
+
+def test_local_timestamps_are_converted_to_utc_once(tmp_path, monkeypatch):
+    monkeypatch.setenv("TZ", "America/New_York")
+    time.tzset()
+    path = tmp_path / "memory.db"
+    conn = sqlite3.connect(path)
+    # Database from before timestamps were UTC, without a user_version
+    conn.execute("CREATE TABLE memories (id TEXT PRIMARY KEY, content TEXT, type TEXT, timestamp DATETIME, context TEXT)")
+    conn.executemany("INSERT INTO memories VALUES (?, ?, 'note', ?, '{}')", [
+        ("winter", "written in January", "2024-01-15 10:00:00"),
+        ("summer", "written in July", "2024-07-15 10:00:00.250000"),
+    ])
+    conn.commit()
+    conn.close()
+
+    try:
+        _manager(tmp_path).close()
+        manager = _manager(tmp_path)
+        with manager.store.reader() as conn:
+            timestamps = dict(conn.execute("SELECT id, timestamp FROM memories"))
+    finally:
+        monkeypatch.undo()
+        time.tzset()
+
+    # EST is UTC-5 and EDT UTC-4; reopening does not shift them again
+    assert timestamps == {"winter": "2024-01-15 15:00:00", "summer": "2024-07-15 14:00:00.250000"}
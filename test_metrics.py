@@ -0,0 +1,63 @@
+# tests/test_metrics.py
+import asyncio
+import pytest
+from utils.metrics import NOOP_SPAN, Metrics
+
+def test_nested_spans_form_one_trace_and_feed_the_histogram():
+    metrics = Metrics()
+
+    with metrics.span("objective", agent="dexter"):
+        with metrics.span("context"):
+            pass
+        with pytest.raises(RuntimeError):
+            with metrics.span("generate"):
+                raise RuntimeError("model went away")
+
+    (trace,) = metrics.traces
+    assert [child["name"] for child in trace["children"]] == ["context", "generate"]
+    assert trace["labels"] == {"agent": "dexter"}
+    assert trace["children"][1]["status"] == "error"
+    snapshot = metrics.snapshot()
+    spans = {series["labels"]["span"]: series["count"] for series in snapshot["histograms"]["dexter_span_seconds"]}
+    assert spans == {"objective": 1, "context": 1, "generate": 1}
+    assert snapshot["counters"]["dexter_span_errors_total"][0]["labels"] == {"span": "generate", "status": "error"}
+
+def test_concurrent_tasks_keep_their_own_parent_span():
+    metrics = Metrics()
+
+    @metrics.timed("stage")
+    async def stage():
+        await asyncio.sleep(0.01)
+
+    async def objective(name):
+        async with metrics.span(name):
+            await asyncio.gather(stage(), stage())
+
+    async def main():
+        await asyncio.gather(objective("first"), objective("second"))
+
+    asyncio.run(main())
+
+    assert sorted((trace["name"], len(trace["children"])) for trace in metrics.traces) == [("first", 2), ("second", 2)]
+
+def test_disabled_metrics_record_nothing():
+    metrics = Metrics(enabled=False)
+
+    with metrics.span("objective") as span:
+        metrics.inc("requests_total")
+        metrics.observe("latency", 1.0)
+
+    assert span is NOOP_SPAN
+    assert metrics.snapshot()["counters"] == {} and not metrics.traces
+    assert metrics.to_prometheus() == "\n"
+
+def test_prometheus_export_has_cumulative_buckets():
+    metrics = Metrics()
+    for value in (0.002, 0.02, 0.2):
+        metrics.observe("latency_seconds", value, stage="llm")
+
+    lines = metrics.to_prometheus().splitlines()
+
+    assert 'latency_seconds_bucket{stage="llm",le="0.0025"} 1' in lines
+    assert 'latency_seconds_bucket{stage="llm",le="+Inf"} 3' in lines
+    assert 'latency_seconds_count{stage="llm"} 3' in lines
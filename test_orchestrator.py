@@ -0,0 +1,49 @@
+# tests/test_orchestrator.py
+import asyncio
+from agents.base import BaseAgent, Task
+from agents.orchestrator import DexterOrchestrator
+from database.operator import KnowledgeBase
+
+class EchoAgent(BaseAgent):
+    """Completes every task with its content, after a short pause"""
+
+    def __init__(self, name: str = "echo"):
+        super().__init__(name=name, capabilities=["task_analysis", "research", "code_generation"],
+                         model_name="echo")
+
+    async def process_task(self, task: Task) -> Task:
+        await asyncio.sleep(0.01)
+        task.mark_completed(task.content)
+        return task
+
+def _orchestrator(tmp_path) -> DexterOrchestrator:
+    orchestrator = DexterOrchestrator(None, KnowledgeBase(str(tmp_path / "dexter.db")), None)
+    orchestrator.register_agent(EchoAgent())
+    return orchestrator
+
+def test_concurrent_objectives_get_distinct_task_ids(tmp_path):
+    orchestrator = _orchestrator(tmp_path)
+
+    async def run_all():
+        return await asyncio.gather(*[orchestrator.process_objective(f"objective {i}") for i in range(8)])
+
+    responses = asyncio.run(run_all())
+
+    assert all(response["task"].status == "completed" for response in responses)
+    assert len({response["task_id"] for response in responses}) == 8
+    orchestrator.knowledge_base.close()
+
+def test_subtask_ids_are_scoped_to_their_objective(tmp_path):
+    orchestrator = _orchestrator(tmp_path)
+    objective = "1. Collect the facts\n2. Then summarize step 1"
+
+    async def run_twice():
+        return await asyncio.gather(orchestrator.process_objective(objective),
+                                    orchestrator.process_objective(objective))
+
+    first, second = asyncio.run(run_twice())
+
+    first_ids = {subtask.id for subtask in first["task"].subtasks}
+    second_ids = {subtask.id for subtask in second["task"].subtasks}
+    assert first_ids and not first_ids & second_ids
+    orchestrator.knowledge_base.close()
@@ -0,0 +1,94 @@
+# tests/test_pool.py
+import asyncio
+from agents.base import BaseAgent, Task
+from agents.pool import AgentPool, ModelLimiter, PoolMember
+
+class ModelAgent(BaseAgent):
+    def __init__(self, name: str, model_name: str):
+        super().__init__(name=name, capabilities=["research"], model_name=model_name)
+
+    async def process_task(self, task: Task) -> Task:
+        task.mark_completed(task.content)
+        return task
+
+def _task(number: int) -> Task:
+    return Task(id=f"task_{number}", content=str(number), type="research", priority=1, context={})
+
+def test_tasks_go_to_the_member_with_fewest_outstanding():
+    pool = AgentPool("research", ModelLimiter(default_limit=10))
+    for name in ("a", "b", "c"):
+        pool.add(PoolMember(ModelAgent(name, f"model-{name}")))
+    release = {}
+    assigned = []
+
+    async def runner(task, agent):
+        assigned.append(agent.name)
+        # "a" holds its tasks until released, the others finish at once
+        if agent.name == "a":
+            release[task.id] = asyncio.Event()
+            await release[task.id].wait()
+        task.mark_completed(agent.name)
+        return task
+
+    async def main():
+        held = asyncio.create_task(pool.dispatch(_task(0), runner))
+        await asyncio.sleep(0.01)
+        await asyncio.gather(*[pool.dispatch(_task(n), runner) for n in range(1, 5)])
+        outstanding = pool.metrics()["outstanding"]
+        release["task_0"].set()
+        await held
+        return outstanding
+
+    outstanding = asyncio.run(main())
+
+    assert assigned[0] == "a"
+    # While "a" is busy, new work is spread over the idle members only
+    assert sorted(assigned[1:]) == ["b", "b", "c", "c"]
+    assert outstanding == {"a#0": 1, "b#1": 0, "c#2": 0}
+    assert pool.stats.completed == 5
+
+def test_model_limiter_caps_requests_per_model():
+    limiter = ModelLimiter(limits={"big": 1, "small": 3}, default_limit=2)
+    active = {}
+    peak = {}
+
+    async def call(model_name):
+        async with limiter.slot(model_name):
+            active[model_name] = active.get(model_name, 0) + 1
+            peak[model_name] = max(peak.get(model_name, 0), active[model_name])
+            await asyncio.sleep(0.01)
+            active[model_name] -= 1
+
+    async def main():
+        await asyncio.gather(*[call(model) for model in ["big", "small", "other"] for _ in range(6)])
+
+    asyncio.run(main())
+
+    assert peak == {"big": 1, "small": 3, "other": 2}
+    assert limiter.waiting == {"big": 0, "small": 0, "other": 0}
+
+def test_pools_sharing_a_model_share_its_slots():
+    limiter = ModelLimiter(limits={"shared": 1})
+    pools = [AgentPool(name, limiter) for name in ("research", "code")]
+    for pool in pools:
+        pool.add(PoolMember(ModelAgent(pool.capability, "shared")))
+    active = 0
+    peak = 0
+
+    async def runner(task, agent):
+        nonlocal active, peak
+        active += 1
+        peak = max(peak, active)
+        await asyncio.sleep(0.01)
+        active -= 1
+        task.mark_completed(agent.name)
+        return task
+
+    async def main():
+        await asyncio.gather(*[pool.dispatch(_task(n), runner) for pool in pools for n in range(3)])
+
+    asyncio.run(main())
+
+    assert peak == 1
+    # All three code tasks queued behind the research task holding the model's one slot
+    assert pools[1].metrics()["max_queue_depth"] == 3
@@ -0,0 +1,34 @@
+# tests/test_prompt_builder.py
+from datetime import datetime, timedelta, timezone
+from agents.prompt_builder import ContextItem, PromptBuilder
+
+NOW = datetime.now(timezone.utc)
+
+def _lines(build):
+    return [line for line in build.text.splitlines() if line.startswith("- ")]
+
+def test_mixed_naive_and_aware_timestamps_rank_by_age():
+    context = {"knowledge": [
+        {"content": "three days old", "timestamp": (NOW - timedelta(days=3)).isoformat(), "score": 1},
+        # SQLite CURRENT_TIMESTAMP style: naive UTC
+        {"content": "just written", "timestamp": NOW.strftime("%Y-%m-%d %H:%M:%S"), "score": 1},
+        {"content": "an hour old", "score": 1,
+         "timestamp": (NOW - timedelta(hours=1)).astimezone(timezone(timedelta(hours=5))).isoformat()},
+    ]}
+
+    build = PromptBuilder(max_context_tokens=500, half_life_hours=24).build("Header", context, "Footer")
+
+    assert [line.split("] ")[1] for line in _lines(build)] == ["just written", "an hour old", "three days old"]
+
+def test_naive_timestamps_are_treated_as_utc():
+    item = ContextItem("memories", "text", timestamp=(NOW - timedelta(hours=24)).replace(tzinfo=None))
+
+    assert abs(item.rank(NOW, half_life_hours=24) - 0.75) < 0.01
+
+def test_context_is_fit_to_the_budget():
+    context = {"knowledge": [{"content": "word " * 200, "score": 1.0 - i / 10} for i in range(10)]}
+
+    build = PromptBuilder(max_context_tokens=300).build("Header", context, "Footer")
+
+    assert build.sections["knowledge"] <= 300
+    assert build.truncated and build.dropped
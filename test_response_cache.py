@@ -0,0 +1,58 @@
+# tests/test_response_cache.py
+from pathlib import Path
+from agents import dexter_agent
+from agents.base import Task
+from agents.dexter_agent import DexterAgent
+from agents.prompt_builder import PromptBuilder
+from agents.response_cache import ResponseCache
+
+def test_default_database_lives_under_cache_dir():
+    ResponseCache()
+
+    assert Path("cache/llm_cache.db").exists()
+    assert not Path("llm_cache.db").exists()
+
+def test_entries_are_keyed_on_content_and_context_version(tmp_path):
+    cache = ResponseCache(str(tmp_path / "cache.db"))
+    cache.set("llama3.2", "What is  the capital\nof France?", "Paris", context_version="v1")
+
+    assert cache.get("llama3.2", "What is the capital of France?", "v1") == "Paris"
+    assert cache.get("llama3.2", "What is the capital of France?", "v2") is None
+    assert cache.get("mistral", "What is the capital of France?", "v1") is None
+
+def test_disk_tier_survives_a_new_cache(tmp_path):
+    path = str(tmp_path / "cache.db")
+    ResponseCache(path).set("llama3.2", "question", "answer")
+    cache = ResponseCache(path)
+
+    assert cache.get("llama3.2", "question") == "answer"
+    assert cache.stats()["disk_hits"] == 1
+
+def test_expired_entries_miss(tmp_path):
+    cache = ResponseCache(str(tmp_path / "cache.db"), ttl=0)
+    cache.set("llama3.2", "question", "answer")
+
+    assert cache.get("llama3.2", "question") is None
+
+def test_context_version_ignores_memories():
+    task = Task(id="t1", content="What is the capital of France?", type="analysis", priority=1, context={})
+    knowledge = [{"id": 1, "type": "document", "content": "Paris is the capital"}]
+    first = {"knowledge": knowledge, "memories": []}
+    later = {"knowledge": knowledge, "memories": [{"id": "mem_1", "content": "Paris"}]}
+
+    assert DexterAgent._context_version(task, first) == DexterAgent._context_version(task, later)
+    changed = {"knowledge": knowledge + [{"id": 2, "type": "document", "content": "Lyon"}]}
+    assert DexterAgent._context_version(task, first) != DexterAgent._context_version(task, changed)
+
+def test_prompt_template_and_budget_are_part_of_the_version(tmp_path, monkeypatch):
+    cache = ResponseCache(str(tmp_path / "cache.db"))
+
+    def version(max_context_tokens):
+        agent = DexterAgent(response_cache=cache, prompt_builder=PromptBuilder("llama3.2", max_context_tokens))
+        return agent._prompt_version()
+
+    original = version(2048)
+    assert version(2048) == original
+    assert version(1024) != original
+    monkeypatch.setattr(dexter_agent, "PROMPT_FOOTER", "Answer in one sentence.\nResponse:\n")
+    assert version(2048) != original
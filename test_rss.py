@@ -0,0 +1,46 @@
+# tests/test_rss.py
+import asyncio
+from database.operator import KnowledgeBase
+from toolbox.rss import FeedPoller, iter_feed_items
+
+RSS = b"""<rss><channel>
+<item><guid>1</guid><title>First</title><description>Hello world</description></item>
+<item><guid>2</guid><title>Second</title><description>&lt;p&gt;More news&lt;/p&gt;</description></item>
+</channel></rss>"""
+
+class FakeToolKit:
+    """Serves RSS for every URL except those containing 'down', which raise"""
+
+    async def fetch(self, url):
+        if "down" in url:
+            raise ConnectionError("host unreachable")
+        return {"status": 200, "cache": "miss", "body": RSS}
+
+def _poller(tmp_path, feeds):
+    knowledge_base = KnowledgeBase(db_path=str(tmp_path / "dexter.db"))
+    return FeedPoller(knowledge_base, FakeToolKit(), feeds=feeds, default_interval=60)
+
+def test_iter_feed_items_parses_rss():
+    items = list(iter_feed_items(RSS))
+
+    assert [item["guid"] for item in items] == ["1", "2"]
+    assert items[0]["title"] == "First"
+
+def test_one_failing_feed_does_not_stop_the_others(tmp_path):
+    poller = _poller(tmp_path, [{"name": "down", "url": "http://down/feed"},
+                                {"name": "news", "url": "http://news/feed"}])
+
+    counts = asyncio.run(poller.poll_due())
+
+    assert counts == {"down": 0, "news": 2}
+    assert "host unreachable" in poller.feeds[0].last_error
+    poller.knowledge_base.close()
+
+def test_items_are_stored_once(tmp_path):
+    poller = _poller(tmp_path, [{"name": "news", "url": "http://news/feed"}])
+
+    first = asyncio.run(poller.poll_feed(poller.feeds[0]))
+    second = asyncio.run(poller.poll_feed(poller.feeds[0]))
+
+    assert (first, second) == (2, 0)
+    poller.knowledge_base.close()
@@ -0,0 +1,44 @@
+# tests/test_scheduler.py
+import asyncio
+import pytest
+from agents.base import Task
+from agents.scheduler import TaskScheduler
+
+def _task(task_id, depends_on=(), priority=1):
+    return Task(id=task_id, content=task_id, type="analysis", priority=priority,
+                context={}, depends_on=list(depends_on))
+
+def _runner(started, fail=()):
+    async def run(task):
+        started.append(task.id)
+        await asyncio.sleep(0.01)
+        if task.id in fail:
+            raise RuntimeError(f"{task.id} broke")
+        task.mark_completed(f"result of {task.id}")
+        return task
+    return run
+
+def test_failed_dependency_skips_its_dependents_only():
+    tasks = [_task("a"), _task("b", ["a"]), _task("c", ["b"]), _task("d"), _task("e", ["d"])]
+    started = []
+
+    asyncio.run(TaskScheduler().run(tasks, _runner(started, fail={"a"})))
+
+    assert [task.status for task in tasks] == ["failed", "failed", "failed", "completed", "completed"]
+    assert sorted(started) == ["a", "d", "e"]
+    assert tasks[2].error_message == "Dependency b did not complete"
+
+def test_dependents_receive_results_and_wait_for_all_dependencies():
+    tasks = [_task("a"), _task("b"), _task("c", ["a", "b"])]
+    started = []
+
+    asyncio.run(TaskScheduler(max_concurrency=1).run(tasks, _runner(started)))
+
+    assert started[-1] == "c"
+    assert tasks[2].context["dependency_results"] == {"a": "result of a", "b": "result of b"}
+
+def test_cycles_and_unknown_dependencies_are_rejected():
+    with pytest.raises(ValueError, match="cycle"):
+        TaskScheduler.validate([_task("a", ["b"]), _task("b", ["a"])])
+    with pytest.raises(ValueError, match="unknown"):
+        TaskScheduler.validate([_task("a", ["missing"])])
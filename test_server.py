@@ -0,0 +1,129 @@
+# tests/test_server.py
+import asyncio
+import json
+import aiohttp
+from aiohttp.test_utils import TestClient, TestServer
+from agents.base import Task
+from server import DexterServer
+
+class FakeOrchestrator:
+    """Streams tokens for each objective; "wait" holds until released, "endless" never finishes"""
+
+    def __init__(self):
+        self.release = asyncio.Event()
+        self.cancelled = asyncio.Event()
+
+    async def process_objective(self, objective, on_token=None):
+        task = Task(id=f"task_{objective}", content=objective, type="analysis", priority=1, context={})
+        try:
+            if objective == "wait":
+                await self.release.wait()
+            while objective == "endless":
+                await on_token("more ")
+                await asyncio.sleep(0.01)
+            for token in ("Hello", " world"):
+                await on_token(token)
+        except asyncio.CancelledError:
+            self.cancelled.set()
+            raise
+        task.mark_completed("Hello world")
+        return {"status": "success", "result": task.result, "task_id": task.id, "task": task}
+
+    def pool_metrics(self):
+        return {"pools": {}, "models_waiting": {}}
+
+class FakeFeeds:
+    def stats(self):
+        return []
+
+def _ready_server(**kwargs) -> DexterServer:
+    """A server with setup() replaced by fakes"""
+    server = DexterServer(model_name="fake", **kwargs)
+    server.orchestrator = FakeOrchestrator()
+    server.feed_poller = FakeFeeds()
+    server._slots = asyncio.Semaphore(server.concurrency)
+    server.ready = True
+    return server
+
+async def _events(response):
+    return [json.loads(line) for line in (await response.text()).splitlines()]
+
+def _run(server, scenario):
+    async def main():
+        async with TestClient(TestServer(server.app())) as client:
+            return await scenario(client)
+    return asyncio.run(main())
+
+def test_requests_before_setup_are_rejected():
+    async def scenario(client):
+        health = await client.get("/health")
+        objective = await client.post("/objective", json={"objective": "hi"})
+        return health.status, await health.json(), objective.status
+
+    assert _run(DexterServer(model_name="fake"), scenario) == (503, {"status": "starting", "model": "fake"}, 503)
+
+def test_objective_streams_queued_tokens_then_result():
+    async def scenario(client):
+        response = await client.post("/objective", json={"objective": "hi"})
+        return response.headers["Content-Type"], await _events(response)
+
+    content_type, events = _run(_ready_server(), scenario)
+
+    assert content_type == "application/x-ndjson"
+    assert [event["event"] for event in events] == ["queued", "token", "token", "result"]
+    assert [event["text"] for event in events[1:3]] == ["Hello", " world"]
+    assert events[-1]["status"] == "success" and events[-1]["task_status"] == "completed"
+
+def test_full_queue_answers_503():
+    server = _ready_server(concurrency=1, max_queue=1)
+
+    async def scenario(client):
+        running = await client.post("/objective", json={"objective": "wait"})
+        waiting = await client.post("/objective", json={"objective": "hi"})
+        assert json.loads(await waiting.content.readline())["event"] == "queued"
+        rejected = await client.post("/objective", json={"objective": "hi"})
+        health = await (await client.get("/health")).json()
+        server.orchestrator.release.set()
+        return rejected.status, health, await _events(running), await _events(waiting)
+
+    status, health, running, waiting = _run(server, scenario)
+
+    assert status == 503
+    assert (health["running"], health["queued"]) == (1, 1)
+    assert running[-1]["task_status"] == "completed"
+    assert [event["event"] for event in waiting] == ["token", "token", "result"]
+
+def test_client_disconnect_cancels_the_objective():
+    server = _ready_server()
+
+    async def scenario(client):
+        response = await client.post("/objective", json={"objective": "endless"})
+        await response.content.readline()
+        await response.content.readline()
+        response.close()
+        await asyncio.wait_for(server.orchestrator.cancelled.wait(), 5)
+        # Let the handler unwind past its finally block
+        for _ in range(10):
+            if not server.running:
+                break
+            await asyncio.sleep(0.01)
+        return await (await client.get("/health")).json()
+
+    health = _run(server, scenario)
+
+    assert (health["running"], health["queued"], health["served"]) == (0, 0, 1)
+
+def test_start_reports_the_port_it_bound():
+    async def main():
+        server = _ready_server()
+        address = await server.start("127.0.0.1", 0)
+        try:
+            async with aiohttp.ClientSession() as session:
+                async with session.get(f"{address}/health") as response:
+                    return address, response.status
+        finally:
+            await server._runner.cleanup()
+
+    address, status = asyncio.run(main())
+
+    assert not address.endswith(":0") and status == 200
@@ -0,0 +1,88 @@
+# tests/test_storage.py
+import pytest
+from database.storage import BatchWriter, SQLiteStore, close_stores, get_store
+from database.telemetry import get_telemetry
+
+def _store(path) -> SQLiteStore:
+    store = SQLiteStore(str(path))
+    with store.writer() as conn:
+        conn.execute("CREATE TABLE IF NOT EXISTS items (value INTEGER)")
+    return store
+
+def _insert(conn, items):
+    conn.executemany("INSERT INTO items (value) VALUES (?)", [(item,) for item in items])
+
+def _count(path, table: str = "items") -> int:
+    store = SQLiteStore(str(path))
+    try:
+        with store.reader() as conn:
+            return conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+    finally:
+        store.close()
+
+def test_store_close_drains_registered_writers(tmp_path):
+    path = tmp_path / "items.db"
+    store = _store(path)
+    # A long flush interval keeps the items queued until close
+    writer = BatchWriter(store, _insert, flush_interval=30)
+    for value in range(100):
+        writer.submit(value)
+
+    store.close()
+
+    assert writer.closed
+    assert writer.written == 100
+    assert writer not in store._batch_writers
+    assert _count(path) == 100
+
+def test_closed_writer_rejects_items(tmp_path):
+    store = _store(tmp_path / "items.db")
+    writer = BatchWriter(store, _insert)
+    writer.close()
+
+    assert writer not in store._batch_writers
+    assert not writer.submit_nowait(1)
+    with pytest.raises(RuntimeError):
+        writer.submit(1)
+    store.close()
+
+def test_close_stores_commits_queued_telemetry(tmp_path):
+    path = tmp_path / "telemetry.db"
+    telemetry = get_telemetry(get_store(str(path)))
+    for i in range(50):
+        telemetry.log_interaction("objective", f"objective {i}")
+
+    close_stores()
+
+    assert telemetry.closed
+    assert _count(path, "interactions") == 50
+
+def test_get_telemetry_replaces_a_closed_store(tmp_path):
+    store = get_store(str(tmp_path / "telemetry.db"))
+    telemetry = get_telemetry(store)
+    assert get_telemetry(store) is telemetry
+
+    telemetry.close()
+
+    assert get_telemetry(store, create=False) is None
+    assert get_telemetry(store) is not telemetry
+
+def test_dropped_items_are_reported(tmp_path):
+    path = tmp_path / "items.db"
+    store = _store(path)
+    dropped = []
+
+    def insert_or_fail(conn, items):
+        if any(item < 0 for item in items):
+            raise ValueError("negative value")
+        _insert(conn, items)
+
+    writer = BatchWriter(store, insert_or_fail, on_failure=dropped.extend)
+    for value in (1, -1, 2):
+        writer.submit(value)
+    writer.flush()
+
+    assert dropped == [-1]
+    assert writer.failed == 1
+    assert writer.written == 2
+    store.close()
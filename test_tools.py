@@ -0,0 +1,113 @@
+# tests/test_tools.py
+import asyncio
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from toolbox.extract import Extractor
+from toolbox.http_cache import HTTPCache
+from toolbox.tools import ToolKit
+
+class Site:
+    """Test pages: /etag revalidates, /slow/* tracks concurrency, /flaky fails twice, /big is large"""
+
+    def __init__(self):
+        self.requests = []
+        self.active = 0
+        self.peak = 0
+        self.flaky_calls = 0
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_get("/etag", self.etag)
+        app.router.add_get("/slow/{page}", self.slow)
+        app.router.add_get("/flaky", self.flaky)
+        app.router.add_get("/down", self.down)
+        app.router.add_get("/big", self.big)
+        return app
+
+    async def etag(self, request):
+        self.requests.append(request.headers.get("If-None-Match"))
+        if request.headers.get("If-None-Match") == '"v1"':
+            return web.Response(status=304, headers={"ETag": '"v1"'})
+        return web.Response(body=b"<p>cached page</p>", headers={"ETag": '"v1"'})
+
+    async def slow(self, request):
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        await asyncio.sleep(0.05)
+        self.active -= 1
+        return web.Response(body=b"done")
+
+    async def flaky(self, request):
+        self.flaky_calls += 1
+        if self.flaky_calls <= 2:
+            return web.Response(status=503)
+        return web.Response(body=b"recovered")
+
+    async def down(self, request):
+        return web.Response(status=502)
+
+    async def big(self, request):
+        return web.Response(body=b"x" * 200_000, headers={"ETag": '"big"'})
+
+def _serve(tmp_path, scenario, **kwargs):
+    """Run scenario(toolkit, base_url, site) against a local test server"""
+    site = Site()
+
+    async def main():
+        server = TestServer(site.app())
+        await server.start_server()
+        toolkit = ToolKit(cache=HTTPCache(str(tmp_path / "cache")), extractor=Extractor(workers=0), **kwargs)
+        try:
+            return await scenario(toolkit, str(server.make_url("")).rstrip("/"), site)
+        finally:
+            await toolkit.cleanup()
+            await server.close()
+
+    return asyncio.run(main()), site
+
+def test_stored_page_is_revalidated_with_a_conditional_get(tmp_path):
+    async def scenario(toolkit, base, site):
+        return await toolkit.fetch(f"{base}/etag"), await toolkit.fetch(f"{base}/etag")
+
+    (first, second), site = _serve(tmp_path, scenario)
+
+    assert (first["cache"], second["cache"]) == ("miss", "revalidated")
+    assert second["body"] == first["body"] == b"<p>cached page</p>"
+    assert site.requests == [None, '"v1"']
+
+def test_requests_per_host_are_capped_and_idle_hosts_forgotten(tmp_path):
+    async def scenario(toolkit, base, site):
+        results = await asyncio.gather(*[toolkit.fetch(f"{base}/slow/{n}") for n in range(6)])
+        return results, dict(toolkit._host_slots)
+
+    (results, host_slots), site = _serve(tmp_path, scenario, max_per_host=2)
+
+    assert [result["body"] for result in results] == [b"done"] * 6
+    assert site.peak == 2
+    assert host_slots == {}
+
+def test_server_errors_are_retried_with_backoff(tmp_path):
+    async def scenario(toolkit, base, site):
+        return await toolkit.fetch(f"{base}/flaky"), await toolkit.fetch(f"{base}/down")
+
+    (recovered, failed), site = _serve(tmp_path, scenario, retries=2, backoff=0.01)
+
+    assert recovered["body"] == b"recovered" and site.flaky_calls == 3
+    assert failed == {"url": failed["url"], "error": "HTTP 502"}
+
+def test_bodies_are_cut_off_at_max_bytes_and_not_cached(tmp_path):
+    async def scenario(toolkit, base, site):
+        return await toolkit.fetch(f"{base}/big"), await toolkit.fetch(f"{base}/big")
+
+    (first, second), site = _serve(tmp_path, scenario, max_bytes=100_000)
+
+    assert first["truncated"] and len(first["body"]) == 100_000
+    assert second["cache"] == "miss"
+
+def test_cache_directory_is_created_on_first_write(tmp_path):
+    cache = HTTPCache(str(tmp_path / "cache"))
+
+    assert not cache.cache_dir.exists()
+    assert cache.get("http://example.com/") is None
+    cache.set("http://example.com/", 200, {"ETag": '"1"'}, b"body")
+    assert cache.get("http://example.com/").body == b"body"
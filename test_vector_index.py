@@ -0,0 +1,53 @@
+# tests/test_vector_index.py
+import numpy as np
+from memory.vector_index import HashingEmbedder, VectorIndex, _normalize
+
+def _random_vectors(count: int, dim: int, seed: int = 0) -> np.ndarray:
+    return _normalize(np.random.default_rng(seed).normal(size=(count, dim)).astype(np.float32))
+
+def _ivf_index(count: int = 2000, dim: int = 16, **kwargs) -> VectorIndex:
+    index = VectorIndex(dim, ivf_threshold=1000, nprobe=1, **kwargs)
+    index.add([f"m{i}" for i in range(count)], _random_vectors(count, dim))
+    return index
+
+def test_exact_search_finds_the_closest_text():
+    embedder = HashingEmbedder()
+    index = VectorIndex(embedder.dim)
+    texts = ["the cat sat on the mat", "stock prices fell sharply", "a dog chased the cat"]
+    index.add(["a", "b", "c"], embedder.embed(texts))
+
+    assert index.search(embedder.embed(["stock prices"])[0], 1)[0][0] == "b"
+
+def test_replaced_vector_moves_to_its_new_list():
+    index = _ivf_index()
+    query = _random_vectors(1, 16, seed=1)[0]
+    # The row closest to the opposite direction sits in a list far from the query
+    moved = index.search(-query, 1)[0][0]
+
+    index.add([moved], query[None, :])
+
+    assert index.search(query, 1)[0][0] == moved
+
+def test_replacement_survives_save_and_load(tmp_path):
+    path = str(tmp_path / "memory.vectors")
+    index = _ivf_index(path=path)
+    index.save()
+    query = _random_vectors(1, 16, seed=1)[0]
+    moved = index.search(-query, 1)[0][0]
+
+    index.add([moved], query[None, :])
+    index.save()
+    loaded = VectorIndex.load(path, 16, "", ivf_threshold=1000, nprobe=1)
+
+    assert len(loaded) == 2000
+    assert loaded.search(query, 1)[0][0] == moved
+
+def test_removed_ids_are_not_returned():
+    index = _ivf_index()
+    query = _random_vectors(1, 16, seed=1)[0]
+    best = index.search(query, 1)[0][0]
+
+    index.remove([best])
+
+    assert best not in index
+    assert index.search(query, 1)[0][0] != best
@@ -0,0 +1,90 @@
+# memory/tiers.py
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+import threading
+
+class MemoryTiers:
+    """In-process working and short-term tiers in front of the memories table.
+
+    New memories enter the working set. When it overflows, the least
+    recently used entry is demoted to the short-term LRU, and entries
+    falling out of short-term are left to long-term storage only. A
+    short-term hit promotes the memory back into the working set, and rows
+    read from long-term are cached in short-term.
+    """
+
+    def __init__(self, max_working: int = 10, max_short_term: int = 20):
+        self.max_working = max_working
+        self.max_short_term = max_short_term
+        self.working: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self.short_term: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def __contains__(self, memory_id: str) -> bool:
+        return memory_id in self.working or memory_id in self.short_term
+
+    def add(self, memory: Dict[str, Any]):
+        """Place a newly written memory in the working set"""
+        with self._lock:
+            self.short_term.pop(memory['id'], None)
+            self._into_working(memory)
+
+    def cache(self, memory: Dict[str, Any]):
+        """Cache a memory read from long-term storage in short-term"""
+        with self._lock:
+            if memory['id'] not in self.working:
+                self._into_short_term(memory)
+
+    def get(self, memory_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            memory = self.working.get(memory_id)
+            if memory is not None:
+                self.working.move_to_end(memory_id)
+                self.hits += 1
+                return memory
+
+            memory = self.short_term.pop(memory_id, None)
+            if memory is not None:
+                # Promote: a memory used again is part of the current context
+                self._into_working(memory)
+                self.hits += 1
+                return memory
+
+            self.misses += 1
+            return None
+
+    def discard(self, memory_ids: List[str]):
+        with self._lock:
+            for memory_id in memory_ids:
+                self.working.pop(memory_id, None)
+                self.short_term.pop(memory_id, None)
+
+    def recent(self, limit: int) -> List[Dict[str, Any]]:
+        """Most recently used memories from the working set, newest first"""
+        with self._lock:
+            return list(reversed(self.working.values()))[:limit]
+
+    def _into_working(self, memory: Dict[str, Any]):
+        self.working[memory['id']] = memory
+        self.working.move_to_end(memory['id'])
+        while len(self.working) > self.max_working:
+            _, demoted = self.working.popitem(last=False)
+            self._into_short_term(demoted)
+
+    def _into_short_term(self, memory: Dict[str, Any]):
+        self.short_term[memory['id']] = memory
+        self.short_term.move_to_end(memory['id'])
+        while len(self.short_term) > self.max_short_term:
+            self.short_term.popitem(last=False)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "working": len(self.working),
+            "short_term": len(self.short_term),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0
+        }
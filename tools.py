@@ -1,35 +1,218 @@
 # toolbox/tools.py
-from typing import Dict, Any
+from typing import Dict, Any, Iterable, List, Optional, Tuple
+from urllib.parse import urlsplit
+import asyncio
+import codecs
+import random
+import time
 from rich.console import Console
 import aiohttp
-from bs4 import BeautifulSoup
+from multidict import CIMultiDict
+from toolbox.extract import Extractor
+from toolbox.http_cache import HTTPCache, CachedResponse
+from utils.config import get_setting
+from utils.logger import logger
+from utils.metrics import metrics
 
 console = Console()
 
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+CHUNK_SIZE = 64 * 1024
+
 class ToolKit:
-    def __init__(self):
+    def __init__(self,
+                 max_connections: Optional[int] = None,
+                 max_per_host: Optional[int] = None,
+                 timeout: float = 30.0,
+                 retries: int = 3,
+                 backoff: float = 0.5,
+                 max_bytes: Optional[int] = None,
+                 cache: Optional[HTTPCache] = None,
+                 extractor: Optional[Extractor] = None):
         self.session = None
-    
+        self.max_connections = max_connections or get_setting("tools", "max_connections", 100)
+        self.max_per_host = max_per_host or get_setting("tools", "max_per_host", 8)
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.max_bytes = max_bytes or get_setting("tools", "max_page_bytes", 5 * 1024 * 1024)
+        self.cache = cache or HTTPCache(get_setting("tools", "http_cache_dir", "cache/http"))
+        self.extractor = extractor or Extractor()
+        self._slots = None
+        # host -> (semaphore, fetches using it); dropped once no fetch needs it
+        self._host_slots: Dict[str, Tuple[asyncio.Semaphore, int]] = {}
+
     async def initialize(self):
         if not self.session:
-            self.session = aiohttp.ClientSession()
-    
+            connector = aiohttp.TCPConnector(
+                limit=self.max_connections,
+                limit_per_host=self.max_per_host,
+                ttl_dns_cache=300,
+                enable_cleanup_closed=True
+            )
+            self.session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.timeout, connect=min(10.0, self.timeout))
+            )
+            self._slots = asyncio.Semaphore(self.max_connections)
+
     async def cleanup(self):
         if self.session:
             await self.session.close()
-    
+            self.session = None
+        self.extractor.close()
+
+    @metrics.timed("toolkit.fetch")
+    async def fetch(self, url: str) -> Dict[str, Any]:
+        """GET a URL through the HTTP cache, with concurrency limits and retries.
+
+        Cached responses still within their max-age are returned without a
+        request; others are revalidated with a conditional GET. Bodies are
+        streamed and cut off at max_bytes; truncated bodies are not cached.
+        Returns {"url", "status", "body", "truncated", "headers", "cache",
+        "duration"} or {"url", "error"}.
+        """
+        await self.initialize()
+        start = time.perf_counter()
+        cached = await asyncio.to_thread(self.cache.get, url)
+        if cached and cached.is_fresh():
+            metrics.inc("toolkit_http_cache_requests_total", result="fresh")
+            return self._cached_result(cached, "fresh", start)
+
+        host = urlsplit(url).netloc
+        host_slots = self._acquire_host(host)
+        try:
+            return await self._fetch_with_retries(url, cached, host_slots, start)
+        finally:
+            self._release_host(host)
+
+    def _acquire_host(self, host: str) -> asyncio.Semaphore:
+        slots, users = self._host_slots.get(host) or (asyncio.Semaphore(self.max_per_host), 0)
+        self._host_slots[host] = (slots, users + 1)
+        return slots
+
+    def _release_host(self, host: str):
+        slots, users = self._host_slots[host]
+        if users > 1:
+            self._host_slots[host] = (slots, users - 1)
+        else:
+            del self._host_slots[host]
+
+    async def _fetch_with_retries(self, url: str, cached: Optional[CachedResponse],
+                                  host_slots: asyncio.Semaphore, start: float) -> Dict[str, Any]:
+        headers = cached.validators() if cached else {}
+        last_error = None
+
+        for attempt in range(self.retries + 1):
+            if attempt:
+                metrics.inc("toolkit_retries_total")
+                await asyncio.sleep(self.backoff * 2 ** (attempt - 1) * (1 + random.random()))
+            try:
+                # Hold the slots only while the request is in flight, not while backing off
+                async with self._slots, host_slots:
+                    async with self.session.get(url, headers=headers) as response:
+                        if response.status == 304 and cached:
+                            cached = await asyncio.to_thread(self.cache.touch, cached, response.headers)
+                            metrics.inc("toolkit_http_cache_requests_total", result="revalidated")
+                            return self._cached_result(cached, "revalidated", start)
+                        if response.status in RETRY_STATUSES:
+                            last_error = f"HTTP {response.status}"
+                            continue
+                        body, truncated = await self._read_capped(response)
+                        result_headers = CIMultiDict(response.headers)
+                        status = response.status
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                last_error = str(e) or type(e).__name__
+                continue
+
+            if status == 200 and not truncated:
+                await asyncio.to_thread(self.cache.set, url, status, result_headers, body)
+            metrics.inc("toolkit_http_cache_requests_total", result="miss")
+            metrics.observe("toolkit_page_bytes", len(body))
+            return {
+                "url": url,
+                "status": status,
+                "body": body,
+                "truncated": truncated,
+                "headers": result_headers,
+                "cache": "miss",
+                "duration": time.perf_counter() - start
+            }
+
+        metrics.inc("toolkit_fetch_errors_total")
+        logger.warning(f"Fetching {url} failed after {self.retries + 1} attempts: {last_error}")
+        return {"url": url, "error": last_error}
+
+    async def _read_capped(self, response: aiohttp.ClientResponse):
+        """Read the body in chunks, stopping at max_bytes; returns (body, truncated)"""
+        chunks = []
+        size = 0
+        async for chunk in response.content.iter_chunked(CHUNK_SIZE):
+            chunks.append(chunk)
+            size += len(chunk)
+            if size >= self.max_bytes:
+                return b"".join(chunks)[:self.max_bytes], True
+        return b"".join(chunks), False
+
+    def _cached_result(self, cached: CachedResponse, outcome: str, start: float) -> Dict[str, Any]:
+        return {
+            "url": cached.url,
+            "status": 200,
+            "body": cached.body,
+            "truncated": False,
+            "headers": cached.headers,
+            "cache": outcome,
+            "duration": time.perf_counter() - start
+        }
+
     async def web_scrape(self, url: str) -> Dict[str, Any]:
+        """Fetch a page and extract its title and readable text.
+
+        Besides url, content and title, the result reports bytes downloaded,
+        whether the body was truncated, extracted text size and parse time.
+        """
         try:
-            async with self.session.get(url) as response:
-                if response.status != 200:
-                    return {"error": f"HTTP {response.status}"}
-                
-                html = await response.text()
-                soup = BeautifulSoup(html, 'html.parser')
-                return {
-                    "url": url,
-                    "content": soup.get_text(strip=True),
-                    "title": soup.title.string if soup.title else None
-                }
+            response = await self.fetch(url)
+            if "error" in response:
+                return {"error": response["error"]}
+            if response["status"] != 200:
+                return {"error": f"HTTP {response['status']}"}
+
+            page = await self.extractor.extract(response["body"], _charset(response["headers"]))
+            metrics.observe("toolkit_parse_seconds", page["parse_time"], parser=page["parser"])
+            return {
+                "url": url,
+                "content": page["content"],
+                "title": page["title"],
+                "bytes": len(response["body"]),
+                "truncated": response["truncated"],
+                "text_size": page["text_size"],
+                "parse_time": page["parse_time"],
+                "cache": response["cache"]
+            }
         except Exception as e:
-            return {"error": str(e)}
\ No newline at end of file
+            return {"error": str(e)}
+
+    async def scrape_many(self, urls: Iterable[str]) -> List[Dict[str, Any]]:
+        """Scrape many URLs concurrently, returning results in input order.
+
+        Concurrency is bounded globally by max_connections and per host by
+        max_per_host; duplicate URLs are fetched once.
+        """
+        urls = list(urls)
+        unique = list(dict.fromkeys(urls))
+        results = await asyncio.gather(*[self.web_scrape(url) for url in unique])
+        by_url = dict(zip(unique, results))
+        return [by_url[url] for url in urls]
+
+
+def _charset(headers: Dict[str, str]) -> str:
+    content_type = headers.get("Content-Type", "")
+    for part in content_type.split(";")[1:]:
+        name, _, value = part.strip().partition("=")
+        if name.lower() == "charset" and value:
+            try:
+                return codecs.lookup(value.strip('"')).name
+            except LookupError:
+                break
+    return "utf-8"
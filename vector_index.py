@@ -0,0 +1,320 @@
+# memory/vector_index.py
+from typing import List, Tuple, Optional, Iterable, Sequence
+from pathlib import Path
+import hashlib
+import json
+import re
+import numpy as np
+from rich.console import Console
+
+console = Console()
+
+TOKEN_PATTERN = re.compile(r"\w+")
+
+class HashingEmbedder:
+    """Deterministic local embedder using signed feature hashing of words and word pairs"""
+
+    def __init__(self, dim: int = 384):
+        self.dim = dim
+        self.name = f"hashing-{dim}"
+
+    def _features(self, text: str) -> List[str]:
+        tokens = TOKEN_PATTERN.findall(text.lower())
+        return tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for feature in self._features(text or ""):
+                digest = int.from_bytes(
+                    hashlib.blake2b(feature.encode(), digest_size=8).digest(), "little"
+                )
+                sign = 1.0 if digest & 1 else -1.0
+                vectors[row, (digest >> 1) % self.dim] += sign
+        return _normalize(vectors)
+
+
+class SentenceTransformerEmbedder:
+    """Embedder backed by a sentence-transformers model"""
+
+    def __init__(self, model_name: str):
+        from sentence_transformers import SentenceTransformer
+        self.model = SentenceTransformer(model_name)
+        self.dim = self.model.get_sentence_embedding_dimension()
+        self.name = model_name
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        vectors = self.model.encode(
+            list(texts), normalize_embeddings=True, convert_to_numpy=True
+        )
+        return vectors.astype(np.float32)
+
+
+def get_embedder(model_name: Optional[str] = None):
+    """Return an embedder for model_name, falling back to the local hashing embedder"""
+    if model_name and model_name != "hashing":
+        try:
+            return SentenceTransformerEmbedder(model_name)
+        except ImportError:
+            console.print(
+                f"[yellow]sentence-transformers not installed, using hashing embedder instead of {model_name}[/yellow]"
+            )
+        except Exception as e:
+            console.print(f"[yellow]Could not load embedding model {model_name}:[/yellow] {str(e)}")
+    return HashingEmbedder()
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+class VectorIndex:
+    """Cosine-similarity index over normalized vectors.
+
+    Search is exact until the index reaches ``ivf_threshold`` rows, after which
+    vectors are partitioned into ``sqrt(n)`` k-means lists and only the
+    ``nprobe`` closest lists are scanned. Rows are persisted append-only, so
+    saving after incremental adds only writes the new rows.
+    """
+
+    def __init__(self, dim: int, path: Optional[str] = None, model_name: str = "",
+                 ivf_threshold: int = 50_000, nprobe: int = 8):
+        self.dim = dim
+        self.path = path
+        self.model_name = model_name
+        self.ivf_threshold = ivf_threshold
+        self.nprobe = nprobe
+        self.ids: List[str] = []
+        self.last_rowid = 0
+        self._positions = {}
+        self._vectors = np.empty((1024, dim), dtype=np.float32)
+        self._assign = np.empty(1024, dtype=np.int32)
+        self._centroids: Optional[np.ndarray] = None
+        self._trained_size = 0
+        self._persisted = 0
+        self._needs_rewrite = False
+        self._lists_size = 0
+        self._list_order = None
+        self._list_offsets = None
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __contains__(self, memory_id: str) -> bool:
+        return memory_id in self._positions
+
+    # Files
+    def _file(self, suffix: str) -> Path:
+        return Path(f"{self.path}{suffix}")
+
+    @classmethod
+    def load(cls, path: Optional[str], dim: int, model_name: str, **kwargs) -> "VectorIndex":
+        """Load an index from disk, starting empty if missing or built with another model"""
+        index = cls(dim, path=path, model_name=model_name, **kwargs)
+        if not path or not index._file(".json").exists():
+            return index
+
+        try:
+            meta = json.loads(index._file(".json").read_text())
+            if meta.get("model") != model_name or meta.get("dim") != dim:
+                console.print("[yellow]Embedding model changed, rebuilding vector index[/yellow]")
+                index.reset()
+                return index
+
+            count = meta["count"]
+            vectors = np.fromfile(index._file(".vec"), dtype=np.float32, count=count * dim)
+            ids = index._file(".ids").read_text().splitlines()[:count]
+            if len(ids) != count or vectors.size != count * dim:
+                raise ValueError("index files are incomplete")
+
+            index._ensure_capacity(count)
+            index._vectors[:count] = vectors.reshape(count, dim)
+            index.ids = ids
+            index._positions = {memory_id: i for i, memory_id in enumerate(ids)}
+            index.last_rowid = meta.get("last_rowid", 0)
+            index._persisted = count
+
+            if index._file(".ivf.npy").exists():
+                index._centroids = np.load(index._file(".ivf.npy"))
+                index._trained_size = len(index._centroids) ** 2
+                index._assign[:count] = np.fromfile(index._file(".assign"), dtype=np.int32, count=count)
+        except Exception as e:
+            console.print(f"[yellow]Could not load vector index, rebuilding:[/yellow] {str(e)}")
+            index.reset()
+        return index
+
+    def save(self):
+        """Append rows added since the last save and update index metadata"""
+        if not self.path:
+            return
+        if self._needs_rewrite:
+            self._rewrite()
+            return
+
+        count = len(self.ids)
+
+        mode = "ab" if self._persisted else "wb"
+        with self._file(".vec").open(mode) as f:
+            self._vectors[self._persisted:count].tofile(f)
+        with self._file(".ids").open(mode.replace("b", "")) as f:
+            f.writelines(f"{memory_id}\n" for memory_id in self.ids[self._persisted:count])
+        if self._centroids is not None:
+            with self._file(".assign").open(mode) as f:
+                self._assign[self._persisted:count].tofile(f)
+        self._persisted = count
+        self._write_meta()
+
+    def _rewrite(self):
+        self._persisted = 0
+        self._needs_rewrite = False
+        for suffix in (".vec", ".ids", ".assign", ".ivf.npy"):
+            self._file(suffix).unlink(missing_ok=True)
+        if self._centroids is not None:
+            np.save(self._file(".ivf.npy"), self._centroids)
+        self.save()
+
+    def _write_meta(self):
+        self._file(".json").write_text(json.dumps({
+            "model": self.model_name,
+            "dim": self.dim,
+            "count": self._persisted,
+            "last_rowid": self.last_rowid
+        }))
+
+    def reset(self):
+        """Drop all vectors, including any persisted files"""
+        self.ids = []
+        self._positions = {}
+        self._centroids = None
+        self._trained_size = 0
+        self.last_rowid = 0
+        if self.path:
+            self._rewrite()
+
+    # Mutation
+    def _ensure_capacity(self, size: int):
+        capacity = len(self._vectors)
+        if size <= capacity:
+            return
+        while capacity < size:
+            capacity *= 2
+        vectors = np.empty((capacity, self.dim), dtype=np.float32)
+        vectors[:len(self._vectors)] = self._vectors
+        assign = np.empty(capacity, dtype=np.int32)
+        assign[:len(self._assign)] = self._assign
+        self._vectors, self._assign = vectors, assign
+
+    def add(self, ids: Iterable[str], vectors: np.ndarray):
+        """Add (or replace) vectors for the given ids"""
+        positions = []
+        for memory_id in ids:
+            position = self._positions.get(memory_id)
+            if position is None:
+                position = len(self.ids)
+                self.ids.append(memory_id)
+                self._positions[memory_id] = position
+            else:
+                if position < self._persisted:
+                    # Overwriting persisted rows requires a full rewrite on save
+                    self._needs_rewrite = True
+                if position < self._lists_size:
+                    # The row may move to another list; rebuild them on next search
+                    self._lists_size = 0
+            positions.append(position)
+
+        self._ensure_capacity(len(self.ids))
+        positions = np.asarray(positions, dtype=np.int64)
+        self._vectors[positions] = vectors
+        if self._centroids is not None and len(positions):
+            self._assign[positions] = np.argmax(vectors @ self._centroids.T, axis=1)
+
+        # Retrain as the index grows so lists stay around sqrt(n) rows each
+        if len(self.ids) >= max(self.ivf_threshold, 4 * self._trained_size):
+            self.train()
+
+    def remove(self, ids: Iterable[str]):
+        """Remove vectors for the given ids"""
+        drop = {self._positions[memory_id] for memory_id in ids if memory_id in self._positions}
+        if not drop:
+            return
+        count = len(self.ids)
+        mask = np.ones(count, dtype=bool)
+        mask[list(drop)] = False
+        keep = np.flatnonzero(mask)
+        remaining = len(keep)
+        self._vectors[:remaining] = self._vectors[keep]
+        self._assign[:remaining] = self._assign[keep]
+        self.ids = [self.ids[i] for i in keep]
+        self._positions = {memory_id: i for i, memory_id in enumerate(self.ids)}
+        self._lists_size = 0
+        self._needs_rewrite = True
+
+    def train(self, iterations: int = 10, sample_size: int = 20_000):
+        """Partition vectors into k-means lists for approximate search"""
+        count = len(self.ids)
+        if count == 0:
+            return
+        vectors = self._vectors[:count]
+        nlist = max(1, int(np.sqrt(count)))
+        rng = np.random.default_rng(0)
+        sample = vectors[rng.choice(count, size=min(sample_size, count), replace=False)]
+        centroids = sample[rng.choice(len(sample), size=min(nlist, len(sample)), replace=False)].copy()
+
+        for _ in range(iterations):
+            labels = np.argmax(sample @ centroids.T, axis=1)
+            for i in range(len(centroids)):
+                members = sample[labels == i]
+                if len(members):
+                    centroids[i] = members.mean(axis=0)
+            centroids = _normalize(centroids)
+
+        self._centroids = centroids
+        self._trained_size = count
+        for start in range(0, count, 65_536):
+            block = vectors[start:start + 65_536]
+            self._assign[start:start + len(block)] = np.argmax(block @ centroids.T, axis=1)
+        self._lists_size = 0
+        self._needs_rewrite = True
+
+    # Search
+    def _probe_candidates(self, probes: np.ndarray, count: int) -> np.ndarray:
+        """Rows in the probed lists, plus rows added since the lists were last built"""
+        if self._lists_size > count or count - self._lists_size > max(1024, count // 10):
+            self._lists_size = 0
+        if not self._lists_size:
+            self._list_order = np.argsort(self._assign[:count], kind="stable")
+            self._list_offsets = np.searchsorted(
+                self._assign[:count][self._list_order], np.arange(len(self._centroids) + 1)
+            )
+            self._lists_size = count
+
+        parts = [
+            self._list_order[self._list_offsets[p]:self._list_offsets[p + 1]] for p in probes
+        ]
+        parts.append(np.arange(self._lists_size, count))
+        return np.concatenate(parts)
+
+    def search(self, vector: np.ndarray, k: int = 5) -> List[Tuple[str, float]]:
+        """Return up to k (id, score) pairs ordered by descending cosine similarity"""
+        count = len(self.ids)
+        if count == 0 or k <= 0:
+            return []
+
+        if self._centroids is not None:
+            probes = np.argsort(self._centroids @ vector)[-self.nprobe:]
+            candidates = self._probe_candidates(probes, count)
+            if len(candidates) < k:
+                candidates = np.arange(count)
+        else:
+            candidates = None
+
+        vectors = self._vectors[:count] if candidates is None else self._vectors[candidates]
+        scores = vectors @ vector
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        if candidates is not None:
+            return [(self.ids[candidates[i]], float(scores[i])) for i in top]
+        return [(self.ids[i], float(scores[i])) for i in top]